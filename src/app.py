@@ -1,8 +1,21 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
 from src.controllers import matching_algorithm
+from src.controllers.jobs import job_store
+from src.controllers.solver_pool import solver_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    solver_pool.shutdown()
+    job_store.shutdown()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(matching_algorithm.router, prefix="/assignTeachers")
 
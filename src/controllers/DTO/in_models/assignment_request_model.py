@@ -2,7 +2,7 @@ from typing import Dict
 
 from pydantic import BaseModel
 
-from src.matching_algorithm import ClassModel, Module, TeacherModel
+from src.matching_algorithm import ClassModel, Module, SolveMode, SolverOptions, TeacherModel
 
 
 class AssignmentRequestModel(BaseModel):
@@ -11,3 +11,6 @@ class AssignmentRequestModel(BaseModel):
     modules: list[Module]
     teacher_names_with_classes: list[str]
     preassigned: Dict[str, Dict[str, list[str]]] | None
+    mode: SolveMode = "weighted"
+    solver_options: SolverOptions | None = None
+    previous_matches: Dict[str, Dict[str, list[str]]] | None = None
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import multiprocessing
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from multiprocessing.managers import SyncManager
+from typing import Any, AsyncIterator, Literal, Optional
+
+from pydantic import BaseModel
+
+from src.matching_algorithm import Assignments, SolveProgress, solve_timetable
+
+from .settings import SOLVER_JOBS_PROGRESS_POLL_SECONDS, SOLVER_JOBS_TTL_SECONDS
+from .solver_pool import SolverPool, solver_pool
+
+JobStatus = Literal["queued", "running", "done", "failed", "cancelled"]
+
+
+class JobModel(BaseModel):
+    id: str
+    status: JobStatus
+    result: Optional[Assignments] = None
+    error: Optional[str] = None
+    # Last improving solution reported by the search
+    progress: Optional[SolveProgress] = None
+
+
+def run_job(
+    started: threading.Event,
+    stop_event: threading.Event,
+    progress: list[dict[str, Any]],
+    **kwargs: Any,
+) -> Assignments:
+    """Pool entry point of a job: flag it as running and solve, publishing the progress."""
+    started.set()
+    return solve_timetable(
+        stop_event=stop_event,
+        on_progress=lambda solve_progress: progress.append(solve_progress.model_dump()),
+        **kwargs,
+    )
+
+
+@dataclass
+class Job:
+    id: str
+    future: "asyncio.Future[Assignments]"
+    started: threading.Event
+    stop_event: threading.Event
+    # Every SolveProgress of the search as a dict, shared with the pool worker
+    progress: list[dict[str, Any]]
+    cancelled: bool = False
+    finished_at: Optional[float] = None
+
+    def to_model(self) -> JobModel:
+        progress = SolveProgress(**self.progress[-1]) if len(self.progress) else None
+        if not self.future.done():
+            if self.cancelled:
+                return JobModel(id=self.id, status="cancelled", progress=progress)
+            return JobModel(
+                id=self.id,
+                status="running" if self.started.is_set() else "queued",
+                progress=progress,
+            )
+        if self.future.cancelled():
+            return JobModel(id=self.id, status="cancelled", progress=progress)
+        error = self.future.exception()
+        if error is not None:
+            return JobModel(id=self.id, status="failed", error=str(error), progress=progress)
+        # A cancelled search still returns the best solution it found
+        return JobModel(
+            id=self.id,
+            status="cancelled" if self.cancelled else "done",
+            result=self.future.result(),
+            progress=progress,
+        )
+
+    async def stream(self) -> AsyncIterator[str]:
+        """
+        NDJSON lines with every progress report of the search, ending with the job.
+
+        Progress lines are {"event": "progress", "progress": SolveProgress} and the
+        last line is {"event": "job", "job": JobModel}.
+        """
+        sent = 0
+        while True:
+            done = self.future.done()
+            for progress in self.progress[sent:]:
+                sent += 1
+                yield json.dumps({"event": "progress", "progress": progress}) + "\n"
+            if done:
+                break
+            await asyncio.sleep(SOLVER_JOBS_PROGRESS_POLL_SECONDS)
+        yield json.dumps({"event": "job", "job": self.to_model().model_dump(mode="json")}) + "\n"
+
+
+class JobStore:
+    """
+    In-memory registry of the solves started through the job API.
+
+    Jobs run in the shared solver pool, so they count against the same
+    concurrency and queue limits as the blocking endpoint. Finished jobs are
+    kept for `ttl` seconds. The stop events live in a manager process because
+    the pool workers are spawned and can't inherit plain events.
+    """
+
+    def __init__(self, pool: SolverPool, ttl: float) -> None:
+        self.pool = pool
+        self.ttl = ttl
+        self.jobs: dict[str, Job] = {}
+        self._manager: SyncManager | None = None
+
+    @property
+    def manager(self) -> SyncManager:
+        if self._manager is None:
+            self._manager = multiprocessing.get_context("spawn").Manager()
+        return self._manager
+
+    def submit(self, **kwargs: Any) -> Job:
+        """Queue a solve_timetable call, raises SolverPoolFullError if the pool is full."""
+        self.prune()
+        started, stop_event = self.manager.Event(), self.manager.Event()
+        progress = self.manager.list()
+        future = self.pool.submit(run_job, started, stop_event, progress, **kwargs)
+        job = Job(
+            id=uuid.uuid4().hex,
+            future=future,
+            started=started,
+            stop_event=stop_event,
+            progress=progress,  # type: ignore[arg-type]
+        )
+        future.add_done_callback(lambda _: setattr(job, "finished_at", time.monotonic()))
+        self.jobs[job.id] = job
+        return job
+
+    def add_finished(self, assignments: Assignments) -> Job:
+        """Register a job whose result is already known, e.g. from the result cache."""
+        self.prune()
+        future: asyncio.Future[Assignments] = asyncio.get_running_loop().create_future()
+        future.set_result(assignments)
+        started = threading.Event()
+        started.set()
+        job = Job(
+            id=uuid.uuid4().hex,
+            future=future,
+            started=started,
+            stop_event=threading.Event(),
+            progress=[],
+            finished_at=time.monotonic(),
+        )
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        self.prune()
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Job | None:
+        job = self.get(job_id)
+        if job is None or job.future.done():
+            return job
+        job.cancelled = True
+        job.stop_event.set()
+        if not job.started.is_set():
+            # Still queued, drop it. A running search is only stopped, so the best
+            # solution it found so far is kept.
+            job.future.cancel()
+        return job
+
+    def prune(self) -> None:
+        now = time.monotonic()
+        for job_id in [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.ttl
+        ]:
+            del self.jobs[job_id]
+
+    def shutdown(self) -> None:
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+job_store = JobStore(solver_pool, SOLVER_JOBS_TTL_SECONDS)
@@ -1,13 +1,61 @@
+import asyncio
+from typing import Any
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 
 from src.matching_algorithm import Assignments, solve_timetable
+from src.matching_algorithm.matching_algorithm import order_assignments
 
 from .DTO.in_models.assignment_request_model import AssignmentRequestModel
+from .jobs import JobModel, job_store
+from .result_cache import (
+    CacheStatsModel,
+    is_deterministic,
+    normalize_request,
+    request_key,
+    result_cache,
+)
+from .settings import resolve_solver_options
+from .solver_pool import SolverPoolFullError, solver_pool
 
 router = APIRouter()
 
 
+def solve_arguments(data: AssignmentRequestModel) -> dict[str, Any]:
+    """Keyword arguments of solve_timetable for a request, with the server solver limits."""
+    return {
+        "teachers": data.teachers,
+        "classes": data.classes,
+        "modules": data.modules,
+        "teacher_names_with_classes": data.teacher_names_with_classes,
+        "pre_assignments": data.preassigned,
+        "mode": data.mode,
+        "solver_options": resolve_solver_options(data.solver_options),
+        "previous_matches": data.previous_matches,
+    }
+
+
+def cached_result(
+    data: AssignmentRequestModel, arguments: dict[str, Any]
+) -> tuple[str | None, Assignments | None]:
+    """
+    Cache key of a request and its cached result, if any.
+
+    Only deterministic solves have a key. A hit is put in the order of the request,
+    which may list the same teachers and classes in another order.
+    """
+    if not is_deterministic(arguments["solver_options"]):
+        result_cache.skip()
+        return None, None
+    key = request_key(data, arguments["solver_options"])
+    assignments = result_cache.get(key)
+    if assignments is not None:
+        assignments = order_assignments(assignments, data.teachers, data.classes)
+    return key, assignments
+
+
 @router.post(
     "/",
     summary="Assign teachers to classes",
@@ -20,12 +68,22 @@ router = APIRouter()
 )
 async def assign_teachers_to_classes(data: AssignmentRequestModel) -> Assignments:
     try:
-        teachers = data.teachers
-        classes = data.classes
-        modules = data.modules
-        teacher_names_with_classes = data.teacher_names_with_classes
-        preassigned = data.preassigned
-        return solve_timetable(teachers, classes, modules, teacher_names_with_classes, preassigned)
+        data = normalize_request(data)
+        arguments = solve_arguments(data)
+        key, assignments = cached_result(data, arguments)
+        if assignments is not None:
+            return assignments
+        assignments = await solver_pool.run(solve_timetable, **arguments)
+        if key is not None:
+            result_cache.put(key, assignments)
+        return assignments
+    except SolverPoolFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
     except ValidationError as ve:
         # Handle Pydantic validation errors
         raise HTTPException(
@@ -49,3 +107,98 @@ async def assign_teachers_to_classes(data: AssignmentRequestModel) -> Assignment
                 f"Details: {str(e)}"
             ),
         )
+
+
+@router.post(
+    "/jobs",
+    summary="Start an assignment job",
+    description=(
+        "Start assigning teachers to classes in the background and return the job id "
+        "right away, the result is polled with GET /jobs/{job_id}. With progress_matches "
+        "the progress reports also carry the matches of each solution."
+    ),
+    response_model=JobModel,
+    status_code=202,
+)
+async def create_assignment_job(
+    data: AssignmentRequestModel, progress_matches: bool = False
+) -> JobModel:
+    try:
+        data = normalize_request(data)
+        arguments = solve_arguments(data)
+        key, assignments = cached_result(data, arguments)
+        if assignments is not None:
+            return job_store.add_finished(assignments).to_model()
+        job = job_store.submit(**arguments, progress_matches=progress_matches)
+        if key is not None:
+            cache_key = key
+
+            def store_result(future: "asyncio.Future[Assignments]") -> None:
+                # A cancelled job stopped its search early, its result isn't the
+                # one the request solves to
+                if job.cancelled or future.cancelled() or future.exception() is not None:
+                    return
+                result_cache.put(cache_key, future.result())
+
+            job.future.add_done_callback(store_result)
+        return job.to_model()
+    except SolverPoolFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Get an assignment job",
+    description="Status of an assignment job, with the assignments once it is done.",
+    response_model=JobModel,
+)
+async def get_assignment_job(job_id: str) -> JobModel:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_model()
+
+
+@router.get(
+    "/jobs/{job_id}/progress",
+    summary="Stream the progress of an assignment job",
+    description=(
+        "NDJSON stream with one line per improving solution (objective, bound, gap, "
+        "elapsed time and coverage) and a last line with the job once it ends."
+    ),
+)
+async def stream_assignment_job(job_id: str) -> StreamingResponse:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return StreamingResponse(job.stream(), media_type="application/x-ndjson")
+
+
+@router.delete(
+    "/jobs/{job_id}",
+    summary="Cancel an assignment job",
+    description=(
+        "Drop a queued job or stop the search of a running one, a stopped search keeps "
+        "the best assignments found so far."
+    ),
+    response_model=JobModel,
+)
+async def cancel_assignment_job(job_id: str) -> JobModel:
+    job = job_store.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_model()
+
+
+@router.get(
+    "/cache/stats",
+    summary="Result cache statistics",
+    description="Hits, misses and size of the cache of deterministic solve results.",
+    response_model=CacheStatsModel,
+)
+async def get_cache_stats() -> CacheStatsModel:
+    return result_cache.get_stats()
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+from src.matching_algorithm import Assignments, SolverOptions
+from src.matching_algorithm.models.available_times_model import AvailableTimesModel
+
+from .DTO.in_models.assignment_request_model import AssignmentRequestModel
+from .settings import (
+    SOLVER_CACHE_DIR,
+    SOLVER_CACHE_DISK_MAX_BYTES,
+    SOLVER_CACHE_MAX_ENTRIES,
+    SOLVER_CACHE_TTL_SECONDS,
+)
+
+assignments_adapter = TypeAdapter(Assignments)
+
+# Statuses that depend on the problem only, a Feasible or Unknown result depends
+# on when the time limit hit
+CACHEABLE_STATUSES = ("Optimal", "Infeasible")
+
+
+class CacheStatsModel(BaseModel):
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    # Requests that skipped the cache because their solve isn't deterministic
+    uncacheable: int = 0
+    memory_entries: int = 0
+    disk_entries: Optional[int] = None
+
+
+def normalize_name(name: str) -> str:
+    return unicodedata.normalize("NFC", name).strip()
+
+
+def normalize_request(data: AssignmentRequestModel) -> AssignmentRequestModel:
+    """Same request with every teacher, class and subject name NFC-normalized and stripped."""
+    payload = data.model_dump()
+    for teacher in payload["teachers"].values():
+        for subject in teacher["subject_he_know_how_to_teach"]:
+            subject["subject"] = normalize_name(subject["subject"])
+        for group in teacher["groups"] or []:
+            group["subject"] = normalize_name(group["subject"])
+            for other_teacher in group["other_teacher"]:
+                other_teacher["teacher"] = normalize_name(other_teacher["teacher"])
+    for class_info in payload["classes"].values():
+        class_info["subject"] = normalize_name(class_info["subject"])
+    payload["teachers"] = {normalize_name(name): info for name, info in payload["teachers"].items()}
+    payload["classes"] = {normalize_name(name): info for name, info in payload["classes"].items()}
+    payload["teacher_names_with_classes"] = [
+        normalize_name(name) for name in payload["teacher_names_with_classes"]
+    ]
+    for matches_field in ("preassigned", "previous_matches"):
+        if payload[matches_field] is not None:
+            payload[matches_field] = {
+                normalize_name(class_name): {
+                    role: [normalize_name(name) for name in teacher_names]
+                    for role, teacher_names in class_matches.items()
+                }
+                for class_name, class_matches in payload[matches_field].items()
+            }
+    return AssignmentRequestModel(**payload)
+
+
+def sorted_json(items: list) -> list:
+    return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+
+
+def canonical_times(times: AvailableTimesModel) -> dict[str, list[int]]:
+    # Repeated hours are kept, the solver counts every hour listed
+    return {day: sorted(hours) for day, hours in times.model_dump().items() if hours}
+
+
+def canonical_request(data: AssignmentRequestModel) -> dict[str, Any]:
+    """
+    JSON-able form of a normalized request that doesn't depend on any ordering
+    the solver doesn't care about: dict keys, lists that behave as sets and the
+    hours of each day. The pre-assigned teachers keep their order, only the first
+    num_teachers of them count.
+    """
+    return {
+        "teachers": {
+            teacher_name: {
+                "seniority": teacher.seniority,
+                "subjects": sorted_json(
+                    [
+                        [subject.subject, sorted(subject.role)]
+                        for subject in teacher.subject_he_know_how_to_teach
+                    ]
+                ),
+                "available_times": canonical_times(teacher.available_times),
+                "weekly_hours_max_work": teacher.weekly_hours_max_work,
+                "groups": sorted_json(
+                    [
+                        {
+                            "my_role": sorted(group.my_role),
+                            "subject": group.subject,
+                            "other_teacher": sorted_json(
+                                [
+                                    [other_teacher.teacher, sorted(other_teacher.role)]
+                                    for other_teacher in group.other_teacher
+                                ]
+                            ),
+                        }
+                        for group in teacher.groups or []
+                    ]
+                ),
+            }
+            for teacher_name, teacher in data.teachers.items()
+        },
+        "classes": {
+            class_name: {
+                "subject": class_info.subject,
+                "subClasses": sorted_json(
+                    [
+                        [subclass.role, canonical_times(subclass.times), subclass.num_teachers]
+                        for subclass in class_info.subClasses
+                    ]
+                ),
+            }
+            for class_name, class_info in data.classes.items()
+        },
+        "modules": sorted({module.id for module in data.modules}),
+        "teacher_names_with_classes": sorted(set(data.teacher_names_with_classes)),
+        "preassigned": data.preassigned or {},
+        "mode": data.mode,
+        "previous_matches": (
+            {
+                class_name: {role: sorted(names) for role, names in class_matches.items()}
+                for class_name, class_matches in data.previous_matches.items()
+            }
+            if data.previous_matches is not None
+            else None
+        ),
+    }
+
+
+def request_key(data: AssignmentRequestModel, solver_options: SolverOptions) -> str:
+    """Content hash of a normalized request and the solver options it is solved with."""
+    fingerprint = solver_options.model_dump(exclude={"log_search_progress"})
+    content = json.dumps(
+        {"request": canonical_request(data), "solver_options": fingerprint},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def is_deterministic(solver_options: SolverOptions) -> bool:
+    """A single CP-SAT worker with a fixed seed always follows the same search."""
+    return solver_options.random_seed is not None and solver_options.num_workers == 1
+
+
+class ResultCache:
+    """
+    Solve results keyed by request_key.
+
+    An in-memory LRU of `max_entries` results, backed by JSON files in
+    `directory` if one is given. The files are evicted oldest first once they add
+    up to more than `max_disk_bytes`. Entries of both tiers expire after `ttl`
+    seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        directory: Path | None = None,
+        max_disk_bytes: int = 0,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.entries: OrderedDict[str, tuple[float, Assignments]] = OrderedDict()
+        self.stats = CacheStatsModel()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Assignments | None:
+        entry = self.entries.get(key)
+        if entry is not None and time.time() - entry[0] <= self.ttl:
+            self.entries.move_to_end(key)
+            self.stats.memory_hits += 1
+            return entry[1]
+        self.entries.pop(key, None)
+
+        if self.directory is not None:
+            path = self.directory / f"{key}.json"
+            try:
+                stored_at = path.stat().st_mtime
+                if time.time() - stored_at <= self.ttl:
+                    assignments = assignments_adapter.validate_json(path.read_bytes())
+                    self._remember(key, stored_at, assignments)
+                    self.stats.disk_hits += 1
+                    return assignments
+                path.unlink()
+            except (OSError, ValueError):
+                # Missing, evicted meanwhile or unreadable, the solve overwrites it
+                pass
+
+        self.stats.misses += 1
+        return None
+
+    def put(self, key: str, assignments: Assignments) -> None:
+        if assignments.status not in CACHEABLE_STATUSES:
+            return
+        self._remember(key, time.time(), assignments)
+        if self.directory is not None:
+            (self.directory / f"{key}.json").write_bytes(assignments_adapter.dump_json(assignments))
+            self._evict_disk()
+
+    def skip(self) -> None:
+        self.stats.uncacheable += 1
+
+    def get_stats(self) -> CacheStatsModel:
+        disk_entries = None
+        if self.directory is not None:
+            disk_entries = sum(1 for _ in self.directory.glob("*.json"))
+        return self.stats.model_copy(
+            update={"memory_entries": len(self.entries), "disk_entries": disk_entries}
+        )
+
+    def _remember(self, key: str, stored_at: float, assignments: Assignments) -> None:
+        self.entries[key] = (stored_at, assignments)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        assert self.directory is not None
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                files.append((path.stat(), path))
+            except OSError:
+                continue
+        now = time.time()
+        total_size = sum(stat.st_size for stat, _ in files)
+        for stat, path in sorted(files, key=lambda file: file[0].st_mtime):
+            if total_size <= self.max_disk_bytes and now - stat.st_mtime <= self.ttl:
+                continue
+            path.unlink(missing_ok=True)
+            total_size -= stat.st_size
+
+
+result_cache = ResultCache(
+    SOLVER_CACHE_MAX_ENTRIES,
+    SOLVER_CACHE_TTL_SECONDS,
+    Path(SOLVER_CACHE_DIR) if SOLVER_CACHE_DIR else None,
+    SOLVER_CACHE_DISK_MAX_BYTES,
+)
@@ -0,0 +1,49 @@
+import os
+
+from src.matching_algorithm import SolverOptions
+
+# Server-side solver limits, a request can ask for less but never for more
+SOLVER_DEFAULT_MAX_TIME_IN_SECONDS = float(os.getenv("SOLVER_DEFAULT_MAX_TIME_IN_SECONDS", "60"))
+SOLVER_MAX_TIME_IN_SECONDS_CAP = float(os.getenv("SOLVER_MAX_TIME_IN_SECONDS_CAP", "300"))
+SOLVER_DEFAULT_NUM_WORKERS = int(os.getenv("SOLVER_DEFAULT_NUM_WORKERS", "8"))
+SOLVER_NUM_WORKERS_CAP = int(os.getenv("SOLVER_NUM_WORKERS_CAP", "8"))
+SOLVER_DEFAULT_NUM_PROCESSES = int(os.getenv("SOLVER_DEFAULT_NUM_PROCESSES", "1"))
+SOLVER_NUM_PROCESSES_CAP = int(os.getenv("SOLVER_NUM_PROCESSES_CAP", str(os.cpu_count() or 1)))
+
+# Solves run in a process pool, requests beyond the running and queued ones are rejected
+SOLVER_POOL_MAX_CONCURRENT_SOLVES = int(os.getenv("SOLVER_POOL_MAX_CONCURRENT_SOLVES", "2"))
+SOLVER_POOL_MAX_QUEUED_SOLVES = int(os.getenv("SOLVER_POOL_MAX_QUEUED_SOLVES", "8"))
+SOLVER_POOL_RETRY_AFTER_SECONDS = int(
+    os.getenv("SOLVER_POOL_RETRY_AFTER_SECONDS", str(int(SOLVER_DEFAULT_MAX_TIME_IN_SECONDS)))
+)
+
+# Finished jobs of the job API are forgotten after this many seconds
+SOLVER_JOBS_TTL_SECONDS = float(os.getenv("SOLVER_JOBS_TTL_SECONDS", "3600"))
+# How often the progress stream of a job checks for new solutions
+SOLVER_JOBS_PROGRESS_POLL_SECONDS = float(os.getenv("SOLVER_JOBS_PROGRESS_POLL_SECONDS", "0.5"))
+
+# Results of deterministic solves are cached in memory and, if a directory is set, on disk
+SOLVER_CACHE_MAX_ENTRIES = int(os.getenv("SOLVER_CACHE_MAX_ENTRIES", "128"))
+SOLVER_CACHE_TTL_SECONDS = float(os.getenv("SOLVER_CACHE_TTL_SECONDS", "86400"))
+SOLVER_CACHE_DIR = os.getenv("SOLVER_CACHE_DIR", "")
+SOLVER_CACHE_DISK_MAX_BYTES = int(os.getenv("SOLVER_CACHE_DISK_MAX_BYTES", str(100 * 1024 * 1024)))
+
+
+def resolve_solver_options(requested: SolverOptions | None) -> SolverOptions:
+    """Fill the options missing from a request with the server defaults and apply the caps."""
+    options = requested.model_copy(deep=True) if requested is not None else SolverOptions()
+    if options.max_time_in_seconds is None:
+        options.max_time_in_seconds = SOLVER_DEFAULT_MAX_TIME_IN_SECONDS
+    options.max_time_in_seconds = min(options.max_time_in_seconds, SOLVER_MAX_TIME_IN_SECONDS_CAP)
+    if options.num_workers is None:
+        options.num_workers = SOLVER_DEFAULT_NUM_WORKERS
+    options.num_workers = min(options.num_workers, SOLVER_NUM_WORKERS_CAP)
+    if options.num_processes is None:
+        options.num_processes = SOLVER_DEFAULT_NUM_PROCESSES
+    options.num_processes = min(options.num_processes, SOLVER_NUM_PROCESSES_CAP)
+    if options.stage_time_limits is not None:
+        options.stage_time_limits = {
+            stage: min(time_limit, options.max_time_in_seconds)
+            for stage, time_limit in options.stage_time_limits.items()
+        }
+    return options
@@ -0,0 +1,90 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from .settings import (
+    SOLVER_POOL_MAX_CONCURRENT_SOLVES,
+    SOLVER_POOL_MAX_QUEUED_SOLVES,
+    SOLVER_POOL_RETRY_AFTER_SECONDS,
+)
+
+T = TypeVar("T")
+
+
+class SolverPoolFullError(Exception):
+    """Raised when every solver process is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("The solver is busy, too many assignments are waiting")
+        self.retry_after = retry_after
+
+
+class SolverPool:
+    """
+    Process pool that runs the CPU-bound solves away from the event loop.
+
+    At most `max_concurrent_solves` solves run at the same time and at most
+    `max_queued_solves` more wait for a process, anything beyond that is rejected
+    right away with SolverPoolFullError. A solve is counted until its worker
+    returns, even if the caller stopped waiting for it (a client that disconnected,
+    a cancelled job), since the process stays busy. Workers finish on the executor's
+    thread, so the counter is behind a lock.
+    """
+
+    def __init__(
+        self, max_concurrent_solves: int, max_queued_solves: int, retry_after: int
+    ) -> None:
+        self.max_concurrent_solves = max_concurrent_solves
+        self.max_queued_solves = max_queued_solves
+        self.retry_after = retry_after
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # Created on first use, so importing the app doesn't start any process
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_concurrent_solves,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def submit(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> "asyncio.Future[T]":
+        """Start `function` in the pool, raises SolverPoolFullError if the queue is full."""
+        with self._lock:
+            if self.pending >= self.max_concurrent_solves + self.max_queued_solves:
+                raise SolverPoolFullError(self.retry_after)
+            future = self.executor.submit(partial(function, *args, **kwargs))
+            self.pending += 1
+        # Cancelling the asyncio future doesn't stop a worker that already started,
+        # the slot is only released once the concurrent future is done
+        future.add_done_callback(self._on_done)
+        return asyncio.wrap_future(future)
+
+    async def run(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self.submit(function, *args, **kwargs)
+
+    def _on_done(self, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                # A worker died (e.g. killed for memory), start a fresh pool for the next solves
+                self._executor = None
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+solver_pool = SolverPool(
+    SOLVER_POOL_MAX_CONCURRENT_SOLVES,
+    SOLVER_POOL_MAX_QUEUED_SOLVES,
+    SOLVER_POOL_RETRY_AFTER_SECONDS,
+)
@@ -1,2 +1,13 @@
-from .matching_algorithm import solve_timetable
-from .models import Assignments, ClassModel, ConflictModel, Module, TeacherModel
+from .incremental import solve_incremental
+from .matching_algorithm import SolveMode, solve_timetable
+from .models import (
+    AssignmentDelta,
+    Assignments,
+    ClassModel,
+    ConflictModel,
+    Module,
+    SolveDiagnostics,
+    SolveProgress,
+    SolverOptions,
+    TeacherModel,
+)
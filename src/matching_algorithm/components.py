@@ -0,0 +1,99 @@
+from dataclasses import dataclass, field
+
+from .eligibility import SubclassKey
+from .models import ClassModel, TeacherModel
+
+
+@dataclass
+class Component:
+    """Teachers and subclasses that can only interact with each other."""
+
+    teacher_names: list[str] = field(default_factory=list)
+    subclass_keys: list[SubclassKey] = field(default_factory=list)
+    # Number of (teacher, subclass) variables, used to balance the parts
+    num_pairs: int = 0
+
+
+def find_components(
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    eligible_teachers: dict[SubclassKey, list[str]],
+    pre_assignments: dict[str, dict[str, list[str]]],
+) -> list[Component]:
+    """
+    Connected components of the teacher-subclass eligibility graph.
+
+    Besides the eligibility pairs, a teacher is linked to the other teachers of
+    their groups (a group match spans several subclasses) and to the subclasses
+    they are pre-assigned to (an ineligible pre-assignment must still make the
+    part that holds the subclass infeasible). Teachers and subclasses come out in
+    the order of `teachers` and `classes`.
+    """
+    teacher_names = list(teachers)
+    subclass_keys = [
+        (class_name, subclass.role)
+        for class_name, class_info in classes.items()
+        for subclass in class_info.subClasses
+    ]
+    teacher_node = {teacher_name: i for i, teacher_name in enumerate(teacher_names)}
+    subclass_node: dict[tuple[str, str], int] = {
+        key: len(teacher_names) + i for i, key in enumerate(subclass_keys)
+    }
+    parent = list(range(len(teacher_names) + len(subclass_keys)))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(a: int, b: int) -> None:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    for key in subclass_keys:
+        for teacher_name in eligible_teachers[key]:
+            union(teacher_node[teacher_name], subclass_node[key])
+
+    for class_name, class_pre_assignments in pre_assignments.items():
+        for role, pre_assigned_teachers in class_pre_assignments.items():
+            if (class_name, role) not in subclass_node:
+                continue
+            for teacher_name in pre_assigned_teachers:
+                if teacher_name in teacher_node:
+                    union(teacher_node[teacher_name], subclass_node[(class_name, role)])
+
+    for teacher_name, teacher_info in teachers.items():
+        for group in teacher_info.groups or []:
+            for other_teacher_info in group.other_teacher:
+                if other_teacher_info.teacher in teacher_node:
+                    union(teacher_node[teacher_name], teacher_node[other_teacher_info.teacher])
+
+    components: dict[int, Component] = {}
+    for teacher_name in teacher_names:
+        component = components.setdefault(find(teacher_node[teacher_name]), Component())
+        component.teacher_names.append(teacher_name)
+    for key in subclass_keys:
+        component = components.setdefault(find(subclass_node[key]), Component())
+        component.subclass_keys.append(key)
+        component.num_pairs += len(eligible_teachers[key])
+    return list(components.values())
+
+
+def pack_components(components: list[Component], num_parts: int) -> list[Component]:
+    """
+    Merge the components into at most `num_parts` parts of similar size.
+
+    Greedy longest-processing-time packing: the biggest components go first, each
+    one to the part with the fewest pairs so far. Components without pairs (lone
+    teachers or subclasses nobody can teach) don't get a part of their own.
+    """
+    num_parts = min(num_parts, sum(1 for component in components if component.num_pairs))
+    parts = [Component() for _ in range(max(num_parts, 1))]
+    for component in sorted(components, key=lambda component: -component.num_pairs):
+        lightest = min(parts, key=lambda part: part.num_pairs)
+        lightest.teacher_names += component.teacher_names
+        lightest.subclass_keys += component.subclass_keys
+        lightest.num_pairs += component.num_pairs
+    return [part for part in parts if part.teacher_names or part.subclass_keys]
@@ -0,0 +1,222 @@
+from dataclasses import dataclass
+
+import numpy as np
+from ortools.graph.python import max_flow
+
+from .eligibility import AssignmentKey, SlotMasks, SubclassKey
+from .models import ClassModel, Module, TeacherModel
+from .overlap import Slot, build_slot_index
+
+SOURCE = 0
+SINK = 1
+
+
+@dataclass
+class GreedySolution:
+    # Assignments set to 1, they break none of the constraints of the model
+    assignments: list[AssignmentKey]
+    # Number of subclasses that got all their teachers, like the total_assigned
+    # objective only those with eligible teachers count
+    num_fully_assigned: int
+
+
+def count_fitting(sizes: list[int], capacity: int) -> int:
+    """Most of `sizes` that fit together in `capacity`, taking the smallest first."""
+    count = 0
+    for size in sorted(sizes):
+        if size > capacity:
+            break
+        capacity -= size
+        count += 1
+    return count
+
+
+def max_coverage(
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    modules: list[Module],
+    eligible_teachers: dict[SubclassKey, list[str]],
+    subclass_hours: dict[SubclassKey, int],
+) -> int:
+    """
+    Upper bound on the number of teachers any timetable can assign, counting a
+    teacher once per subclass.
+
+    A max flow from a source to every teacher, from every teacher to the
+    subclasses they are eligible for and from every subclass to a sink. A
+    subclass lets its num_teachers units through and a teacher as many subclasses
+    as fit in their weekly hours. A pair goes through a (teacher, slot) node of
+    capacity 1 for the busiest slot of the subclass: the subclasses that share
+    that slot overlap, so a teacher takes at most one of them. Other overlaps are
+    left out, so the bound is only tight when those don't get in the way.
+    """
+    slot_index = build_slot_index(classes, modules)
+    busiest_slot: dict[SubclassKey, Slot] = {}
+    for slot, keys in slot_index.items():
+        for key in keys:
+            if key not in busiest_slot or len(slot_index[busiest_slot[key]]) < len(keys):
+                busiest_slot[key] = slot
+
+    nodes: dict[tuple, int] = {}
+
+    def node(name: tuple) -> int:
+        return nodes.setdefault(name, len(nodes) + 2)
+
+    teacher_subclass_hours: dict[str, list[int]] = {teacher_name: [] for teacher_name in teachers}
+    tails: list[int] = []
+    heads: list[int] = []
+    capacities: list[int] = []
+
+    def add_arc(tail: int, head: int, capacity: int) -> None:
+        tails.append(tail)
+        heads.append(head)
+        capacities.append(capacity)
+
+    for class_name, class_info in classes.items():
+        for subclass in class_info.subClasses:
+            key = (class_name, subclass.role)
+            subclass_node = node(("subclass", key))
+            for teacher_name in eligible_teachers[key]:
+                teacher_subclass_hours[teacher_name].append(subclass_hours[key])
+                if key not in busiest_slot:
+                    # No time in the modules, it overlaps with nothing
+                    add_arc(node(("teacher", teacher_name)), subclass_node, 1)
+                    continue
+                slot_node_name = ("teacher_slot", teacher_name, busiest_slot[key])
+                if slot_node_name not in nodes:
+                    add_arc(node(("teacher", teacher_name)), node(slot_node_name), 1)
+                add_arc(node(slot_node_name), subclass_node, 1)
+            add_arc(subclass_node, SINK, subclass.num_teachers)
+    for teacher_name, hours in teacher_subclass_hours.items():
+        add_arc(
+            SOURCE,
+            node(("teacher", teacher_name)),
+            count_fitting(hours, teachers[teacher_name].weekly_hours_max_work),
+        )
+
+    flow = max_flow.SimpleMaxFlow()
+    flow.add_arcs_with_capacity(
+        np.array(tails, dtype=np.int32),
+        np.array(heads, dtype=np.int32),
+        np.array(capacities, dtype=np.int64),
+    )
+    if flow.solve(SOURCE, SINK) != flow.OPTIMAL:
+        # Can't happen with these capacities, fall back to the trivial bound
+        return sum(
+            subclass.num_teachers
+            for class_info in classes.values()
+            for subclass in class_info.subClasses
+        )
+    return flow.optimal_flow()
+
+
+def max_fully_assigned(
+    classes: dict[str, ClassModel],
+    eligible_teachers: dict[SubclassKey, list[str]],
+    coverage_bound: int,
+) -> int:
+    """
+    Upper bound on the number of subclasses that can get all their teachers out of
+    `coverage_bound` assigned teachers.
+    """
+    return count_fitting(
+        [
+            subclass.num_teachers
+            for class_name, class_info in classes.items()
+            for subclass in class_info.subClasses
+            if len(eligible_teachers[(class_name, subclass.role)]) >= max(subclass.num_teachers, 1)
+        ],
+        coverage_bound,
+    )
+
+
+def greedy_assignments(
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    eligible_teachers: dict[SubclassKey, list[str]],
+    subclass_hours: dict[SubclassKey, int],
+    fixed_assignments: dict[AssignmentKey, bool],
+) -> GreedySolution:
+    """
+    A quick timetable that fills as many subclasses as it can.
+
+    It starts from the assignments fixed to 1 and never uses the ones fixed to 0.
+    The subclasses with the fewest eligible teachers go first and only get
+    teachers if all the ones they need fit, then a second pass hands whatever is
+    left to the subclasses that are still missing teachers. Teachers eligible for
+    fewer subclasses are picked first, keeping the flexible ones for later, then
+    the most senior ones.
+    """
+    slot_masks = SlotMasks()
+    subclass_masks = {
+        (class_name, subclass.role): slot_masks.mask(subclass.times)
+        for class_name, class_info in classes.items()
+        for subclass in class_info.subClasses
+    }
+    num_teachers = {
+        (class_name, subclass.role): subclass.num_teachers
+        for class_name, class_info in classes.items()
+        for subclass in class_info.subClasses
+    }
+    num_options = dict.fromkeys(teachers, 0)
+    for subclass_teachers in eligible_teachers.values():
+        for teacher_name in subclass_teachers:
+            num_options[teacher_name] += 1
+
+    hours_left = {
+        teacher_name: teacher_info.weekly_hours_max_work
+        for teacher_name, teacher_info in teachers.items()
+    }
+    booked = dict.fromkeys(teachers, 0)
+    assigned: dict[SubclassKey, list[str]] = {key: [] for key in num_teachers}
+
+    def assign(teacher_name: str, key: SubclassKey) -> None:
+        assigned[key].append(teacher_name)
+        hours_left[teacher_name] -= subclass_hours[key]
+        booked[teacher_name] |= subclass_masks[key]
+
+    for (teacher_name, class_name, role), value in fixed_assignments.items():
+        if value and (class_name, role) in assigned:
+            assign(teacher_name, (class_name, role))
+
+    def candidates(key: SubclassKey) -> list[str]:
+        return sorted(
+            (
+                teacher_name
+                for teacher_name in eligible_teachers[key]
+                if teacher_name not in assigned[key]
+                and fixed_assignments.get((teacher_name, *key), True)
+                and hours_left[teacher_name] >= subclass_hours[key]
+                and not booked[teacher_name] & subclass_masks[key]
+            ),
+            key=lambda teacher_name: (
+                num_options[teacher_name],
+                -teachers[teacher_name].seniority,
+                -hours_left[teacher_name],
+            ),
+        )
+
+    keys = sorted(eligible_teachers, key=lambda key: len(eligible_teachers[key]))
+    for only_full in (True, False):
+        for key in keys:
+            missing = num_teachers[key] - len(assigned[key])
+            if missing <= 0:
+                continue
+            available = candidates(key)
+            if only_full and len(available) < missing:
+                continue
+            for teacher_name in available[:missing]:
+                assign(teacher_name, key)
+
+    return GreedySolution(
+        assignments=[
+            (teacher_name, class_name, role)
+            for (class_name, role), assigned_teachers in assigned.items()
+            for teacher_name in assigned_teachers
+        ],
+        num_fully_assigned=sum(
+            1
+            for key, assigned_teachers in assigned.items()
+            if eligible_teachers[key] and len(assigned_teachers) >= num_teachers[key]
+        ),
+    )
@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .models import ClassModel, RoleType, TeacherModel
+from .models.available_times_model import AvailableTimesModel
+
+SubclassKey = tuple[str, RoleType]
+# (teacher_name, class_name, role)
+AssignmentKey = tuple[str, str, RoleType]
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+@dataclass
+class EligibilityMatrix:
+    """
+    Teacher x subclass eligibility compiled into boolean arrays.
+
+    Rows follow `subclass_keys` and columns follow `teacher_names`.
+    `knows_subject` only checks subject and role, `eligible` also checks that
+    the teacher is available at every time of the subclass.
+    """
+
+    teacher_names: list[str]
+    subclass_keys: list[SubclassKey]
+    knows_subject: np.ndarray
+    eligible: np.ndarray
+
+    def eligible_teachers(self) -> dict[SubclassKey, list[str]]:
+        return {
+            key: [self.teacher_names[j] for j in np.flatnonzero(row)]
+            for key, row in zip(self.subclass_keys, self.eligible)
+        }
+
+
+def build_slot_positions(classes: dict[str, ClassModel]) -> dict[tuple[str, int], int]:
+    """Give every (day, time) used by some subclass a column in the availability arrays."""
+    slot_positions: dict[tuple[str, int], int] = {}
+    for class_info in classes.values():
+        for subclass in class_info.subClasses:
+            for day in WEEKDAYS:
+                for time in getattr(subclass.times, day) or []:
+                    slot_positions.setdefault((day, time), len(slot_positions))
+    return slot_positions
+
+
+def times_to_array(
+    times: AvailableTimesModel, slot_positions: dict[tuple[str, int], int]
+) -> np.ndarray:
+    """Compile the times of a day -> hours model into a boolean array over `slot_positions`."""
+    array = np.zeros(len(slot_positions), dtype=bool)
+    for day in WEEKDAYS:
+        for time in getattr(times, day) or []:
+            position = slot_positions.get((day, time))
+            if position is not None:
+                array[position] = True
+    return array
+
+
+class SlotMasks:
+    """
+    Times compiled into integer bitmasks, one bit per (day, hour).
+
+    Bits are handed out as new times show up, so only the subclasses and
+    teachers that are looked up pay for their conversion.
+    """
+
+    def __init__(self) -> None:
+        self.bits: dict[tuple[str, int], int] = {}
+
+    def mask(self, times: AvailableTimesModel) -> int:
+        mask = 0
+        for day in WEEKDAYS:
+            for time in getattr(times, day) or []:
+                mask |= 1 << self.bits.setdefault((day, time), len(self.bits))
+        return mask
+
+
+def count_hours(times: AvailableTimesModel) -> int:
+    """Number of weekly hours in a day -> hours model."""
+    return sum(len(getattr(times, day) or []) for day in WEEKDAYS)
+
+
+def build_eligibility_matrix(
+    teachers: dict[str, TeacherModel], classes: dict[str, ClassModel]
+) -> EligibilityMatrix:
+    """
+    Decide up front which (teacher, subclass) pairs can ever be assigned.
+
+    Teacher knowledge and availability and subclass times are compiled into
+    boolean arrays once, and the whole matrix comes out of a few vectorized
+    operations instead of a Python loop per pair.
+    """
+    teacher_names = list(teachers)
+    subclass_keys: list[SubclassKey] = []
+    subject_roles: dict[tuple[str, RoleType], int] = {}
+    subclass_subject_role: list[int] = []
+    for class_name, class_info in classes.items():
+        for subclass in class_info.subClasses:
+            subclass_keys.append((class_name, subclass.role))
+            subclass_subject_role.append(
+                subject_roles.setdefault((class_info.subject, subclass.role), len(subject_roles))
+            )
+
+    teacher_subject_roles = np.zeros((len(teacher_names), len(subject_roles)), dtype=bool)
+    for j, teacher in enumerate(teachers.values()):
+        for subject in teacher.subject_he_know_how_to_teach:
+            for role in subject.role:
+                position = subject_roles.get((subject.subject, role))
+                if position is not None:
+                    teacher_subject_roles[j, position] = True
+    knows_subject = teacher_subject_roles[:, subclass_subject_role].T
+
+    slot_positions = build_slot_positions(classes)
+    subclass_times = np.array(
+        [
+            times_to_array(subclass.times, slot_positions)
+            for class_info in classes.values()
+            for subclass in class_info.subClasses
+        ],
+        dtype=np.int32,
+    ).reshape(len(subclass_keys), len(slot_positions))
+    teacher_unavailable = ~np.array(
+        [times_to_array(teacher.available_times, slot_positions) for teacher in teachers.values()],
+        dtype=bool,
+    ).reshape(len(teacher_names), len(slot_positions))
+    # Number of subclass times at which each teacher is not available
+    missing_times = subclass_times @ teacher_unavailable.T.astype(np.int32)
+
+    return EligibilityMatrix(
+        teacher_names=teacher_names,
+        subclass_keys=subclass_keys,
+        knows_subject=knows_subject,
+        eligible=knows_subject & (missing_times == 0),
+    )
+
+
+def get_eligible_teachers(
+    teachers: dict[str, TeacherModel], classes: dict[str, ClassModel]
+) -> dict[SubclassKey, list[str]]:
+    """
+    Returns:
+        For every (class_name, role) the names of the eligible teachers, in the
+        order they appear in `teachers`.
+    """
+    return build_eligibility_matrix(teachers, classes).eligible_teachers()
@@ -0,0 +1,388 @@
+import time
+
+from .coverage import greedy_assignments
+from .eligibility import AssignmentKey, SlotMasks, SubclassKey
+from .models import ClassModel, RoleType, TeacherModel
+
+# Time the local search of the "fast" mode gets, unless the solver options allow less
+FAST_MODE_MAX_TIME_IN_SECONDS = 0.5
+# How many other subclasses an ejection chain of the local search may go through
+EJECTION_CHAIN_DEPTH = 2
+
+# A group declared by a teacher in a class: the roles they can teach it in and, for
+# each other teacher of the group that can teach it, theirs
+GroupDeclaration = tuple[str, list[RoleType], list[tuple[str, list[RoleType]]]]
+
+# (teacher_name, subclass, True to assign or False to unassign)
+Change = tuple[str, SubclassKey, bool]
+
+
+class Timetable:
+    """
+    Teachers assigned to each subclass, kept within the eligibility, overlap and
+    weekly hours rules and scored with the weighted objective of the CP-SAT model.
+
+    The objective is split into the value of each subclass (its coverage and the
+    seniority of its teachers), of each teacher (having a class) and of each class
+    (its group matches), so a change is scored by the parts it touches.
+    """
+
+    def __init__(
+        self,
+        teachers: dict[str, TeacherModel],
+        classes: dict[str, ClassModel],
+        eligible_teachers: dict[SubclassKey, list[str]],
+        subclass_hours: dict[SubclassKey, int],
+        teacher_names_with_classes: list[str],
+        fixed_assignments: dict[AssignmentKey, bool],
+        objective_weights: dict[str, int],
+    ) -> None:
+        self.teachers = teachers
+        self.eligible_teachers = eligible_teachers
+        self.subclass_hours = subclass_hours
+        self.fixed_assignments = fixed_assignments
+        self.weights = objective_weights
+        # Must-have teachers are left out of the teacher_assignment objective
+        self.counted_teachers = {
+            teacher_name
+            for subclass_teachers in eligible_teachers.values()
+            for teacher_name in subclass_teachers
+        } - set(teacher_names_with_classes)
+
+        slot_masks = SlotMasks()
+        self.num_teachers: dict[SubclassKey, int] = {}
+        self.masks: dict[SubclassKey, int] = {}
+        for class_name, class_info in classes.items():
+            for subclass in class_info.subClasses:
+                key = (class_name, subclass.role)
+                self.num_teachers[key] = subclass.num_teachers
+                self.masks[key] = slot_masks.mask(subclass.times)
+        self.eligible_sets = {key: set(names) for key, names in eligible_teachers.items()}
+
+        self.assigned: dict[SubclassKey, list[str]] = {key: [] for key in self.num_teachers}
+        self.teacher_subclasses: dict[str, set[SubclassKey]] = {
+            teacher_name: set() for teacher_name in teachers
+        }
+        self.hours_left = {
+            teacher_name: teacher_info.weekly_hours_max_work
+            for teacher_name, teacher_info in teachers.items()
+        }
+        self.booked = dict.fromkeys(teachers, 0)
+        # Teachers whose subclasses try_changes changed, for the local search to know
+        # which moves are worth trying again
+        self.changed_teachers: set[str] = set()
+
+        class_names_by_subject: dict[str, list[str]] = {}
+        for class_name, class_info in classes.items():
+            class_names_by_subject.setdefault(class_info.subject, []).append(class_name)
+        self.class_groups: dict[str, list[GroupDeclaration]] = {}
+        for teacher_name, teacher_info in teachers.items():
+            for group in teacher_info.groups or []:
+                for class_name in class_names_by_subject.get(group.subject, []):
+                    teacher_roles = self.group_roles(teacher_name, class_name, group.my_role)
+                    other_teachers = []
+                    possible = True
+                    for other_teacher_info in group.other_teacher:
+                        if other_teacher_info.teacher not in teachers or not any(
+                            subclass.role in other_teacher_info.role
+                            for subclass in classes[class_name].subClasses
+                        ):
+                            continue
+                        other_roles = self.group_roles(
+                            other_teacher_info.teacher, class_name, other_teacher_info.role
+                        )
+                        if not other_roles:
+                            # The member can't teach the class, the group is never matched
+                            possible = False
+                            break
+                        other_teachers.append((other_teacher_info.teacher, other_roles))
+                    if possible and teacher_roles and other_teachers:
+                        self.class_groups.setdefault(class_name, []).append(
+                            (teacher_name, teacher_roles, other_teachers)
+                        )
+
+    def group_roles(
+        self, teacher_name: str, class_name: str, roles: list[RoleType]
+    ) -> list[RoleType]:
+        return [
+            role for role in roles if teacher_name in self.eligible_sets.get((class_name, role), ())
+        ]
+
+    def can_assign(self, teacher_name: str, key: SubclassKey) -> bool:
+        return (
+            teacher_name in self.eligible_sets[key]
+            and key not in self.teacher_subclasses[teacher_name]
+            and len(self.assigned[key]) < self.num_teachers[key]
+            and self.fixed_assignments.get((teacher_name, *key), True)
+            and self.hours_left[teacher_name] >= self.subclass_hours[key]
+            and not self.booked[teacher_name] & self.masks[key]
+        )
+
+    def can_unassign(self, teacher_name: str, key: SubclassKey) -> bool:
+        return not self.fixed_assignments.get((teacher_name, *key), False)
+
+    def assign(self, teacher_name: str, key: SubclassKey) -> None:
+        self.assigned[key].append(teacher_name)
+        self.teacher_subclasses[teacher_name].add(key)
+        self.hours_left[teacher_name] -= self.subclass_hours[key]
+        self.booked[teacher_name] |= self.masks[key]
+
+    def unassign(self, teacher_name: str, key: SubclassKey) -> None:
+        self.assigned[key].remove(teacher_name)
+        self.teacher_subclasses[teacher_name].discard(key)
+        self.hours_left[teacher_name] += self.subclass_hours[key]
+        self.booked[teacher_name] = 0
+        for other_key in self.teacher_subclasses[teacher_name]:
+            self.booked[teacher_name] |= self.masks[other_key]
+
+    def subclass_value(self, key: SubclassKey) -> int:
+        if not self.eligible_teachers[key]:
+            return 0
+        num_assigned = len(self.assigned[key])
+        num_teachers = self.num_teachers[key]
+        value = self.weights["seniority_preference"] * sum(
+            self.teachers[teacher_name].seniority for teacher_name in self.assigned[key]
+        )
+        # partially_assigned_i is worth i and holds for every i < num_teachers covered
+        partial = min(num_assigned, num_teachers - 1)
+        value += self.weights["partial_assignment"] * partial * (partial + 1) // 2
+        if num_assigned >= num_teachers:
+            value += self.weights["total_assigned"]
+        return value
+
+    def teacher_value(self, teacher_name: str) -> int:
+        if teacher_name in self.counted_teachers and self.teacher_subclasses[teacher_name]:
+            return self.weights["teacher_assignment"]
+        return 0
+
+    def teaches(self, teacher_name: str, class_name: str, roles: list[RoleType]) -> bool:
+        subclasses = self.teacher_subclasses.get(teacher_name, set())
+        return any((class_name, role) in subclasses for role in roles)
+
+    def class_value(self, class_name: str) -> int:
+        matches = sum(
+            1
+            for teacher_name, teacher_roles, other_teachers in self.class_groups.get(class_name, [])
+            if self.teaches(teacher_name, class_name, teacher_roles)
+            and all(
+                self.teaches(other_teacher, class_name, other_roles)
+                for other_teacher, other_roles in other_teachers
+            )
+        )
+        return self.weights["group_preference"] * matches
+
+    def value(self, changes: list[Change]) -> int:
+        """Value of the subclasses, teachers and classes that `changes` touch."""
+        keys = {key for _, key, _ in changes}
+        return (
+            sum(self.subclass_value(key) for key in keys)
+            + sum(self.teacher_value(teacher_name) for teacher_name in {t for t, _, _ in changes})
+            + sum(
+                self.class_value(class_name)
+                for class_name in {key[0] for key in keys}
+                if class_name in self.class_groups
+            )
+        )
+
+    def apply(self, changes: list[Change]) -> list[Change]:
+        """Apply `changes` in order up to the first one that breaks a rule, return the applied."""
+        applied: list[Change] = []
+        for teacher_name, key, is_assignment in changes:
+            if is_assignment and self.can_assign(teacher_name, key):
+                self.assign(teacher_name, key)
+            elif not is_assignment and key in self.teacher_subclasses[teacher_name]:
+                self.unassign(teacher_name, key)
+            else:
+                break
+            applied.append((teacher_name, key, is_assignment))
+        return applied
+
+    def revert(self, applied: list[Change]) -> None:
+        for teacher_name, key, is_assignment in reversed(applied):
+            if is_assignment:
+                self.unassign(teacher_name, key)
+            else:
+                self.assign(teacher_name, key)
+
+    def gain(self, changes: list[Change]) -> int | None:
+        """How much `changes` would raise the objective, None if they break a rule."""
+        applied = self.apply(changes)
+        if len(applied) < len(changes):
+            self.revert(applied)
+            return None
+        after = self.value(changes)
+        self.revert(applied)
+        return after - self.value(changes)
+
+    def try_changes(self, changes: list[Change]) -> bool:
+        """Apply `changes` if they keep every rule and raise the objective."""
+        gain = self.gain(changes)
+        if gain is None or gain <= 0:
+            return False
+        self.apply(changes)
+        self.changed_teachers.update(teacher_name for teacher_name, _, _ in changes)
+        return True
+
+    def assignments(self) -> list[AssignmentKey]:
+        return [
+            (teacher_name, class_name, role)
+            for (class_name, role), assigned_teachers in self.assigned.items()
+            for teacher_name in assigned_teachers
+        ]
+
+
+def improve(timetable: Timetable, deadline: float) -> None:
+    """
+    Local search over `timetable` until no move improves it or `deadline` passes.
+
+    Every subclass that is missing teachers gets a fill, then every assigned
+    teacher is replaced by another one if that's better, which moves classes to
+    teachers without any, completes groups or raises the seniority. Subclasses
+    with the fewest eligible teachers go first. After the first pass a subclass is
+    only tried again if one of its eligible teachers changed.
+    """
+    keys = sorted(
+        timetable.eligible_teachers, key=lambda key: len(timetable.eligible_teachers[key])
+    )
+    retry = set(keys)
+    while retry:
+        timetable.changed_teachers.clear()
+        for key in keys:
+            if time.perf_counter() > deadline:
+                return
+            if key in retry and len(timetable.assigned[key]) < timetable.num_teachers[key]:
+                fill(timetable, key)
+
+        for key in keys:
+            if time.perf_counter() > deadline:
+                return
+            if key not in retry:
+                continue
+            for teacher_name in list(timetable.assigned[key]):
+                if not timetable.can_unassign(teacher_name, key):
+                    continue
+                for other_teacher in timetable.eligible_teachers[key]:
+                    if other_teacher != teacher_name and timetable.try_changes(
+                        [(teacher_name, key, False), (other_teacher, key, True)]
+                    ):
+                        break
+
+        retry = {
+            key
+            for key in keys
+            if not timetable.changed_teachers.isdisjoint(timetable.eligible_sets[key])
+        }
+
+
+def blocking_subclasses(
+    timetable: Timetable, teacher_name: str, key: SubclassKey
+) -> list[SubclassKey]:
+    """Subclasses of a teacher that one of which must leave for them to teach `key`."""
+    subclasses = [
+        other_key
+        for other_key in timetable.teacher_subclasses[teacher_name]
+        if timetable.can_unassign(teacher_name, other_key)
+    ]
+    overlapping = [
+        other_key for other_key in subclasses if timetable.masks[other_key] & timetable.masks[key]
+    ]
+    if overlapping:
+        return overlapping
+    missing_hours = timetable.subclass_hours[key] - timetable.hours_left[teacher_name]
+    return [
+        other_key
+        for other_key in subclasses
+        if missing_hours > 0 and timetable.subclass_hours[other_key] >= missing_hours
+    ]
+
+
+def best_insertion(
+    timetable: Timetable, key: SubclassKey, depth: int, moved_teachers: frozenset[str]
+) -> tuple[int, list[Change]] | None:
+    """
+    The gain and changes of the best way to give subclass `key` one more teacher,
+    even if the gain is negative: a free teacher, or an ejection chain where a
+    teacher leaves another subclass that then gets a teacher the same way, up to
+    `depth` more times.
+    """
+    best: tuple[int, list[Change]] | None = None
+    for teacher_name in timetable.eligible_teachers[key]:
+        if teacher_name in timetable.assigned[key] or teacher_name in moved_teachers:
+            continue
+        assignment: list[Change] = [(teacher_name, key, True)]
+        gain = timetable.gain(assignment)
+        if gain is not None:
+            if best is None or gain > best[0]:
+                best = (gain, assignment)
+            continue
+
+        for other_key in blocking_subclasses(timetable, teacher_name, key):
+            moved: list[Change] = [(teacher_name, other_key, False), (teacher_name, key, True)]
+            gain = timetable.gain(moved)
+            if gain is None:
+                continue
+            if best is None or gain > best[0]:
+                best = (gain, moved)
+            if depth == 0:
+                continue
+            applied = timetable.apply(moved)
+            replacement = best_insertion(
+                timetable, other_key, depth - 1, moved_teachers | {teacher_name}
+            )
+            timetable.revert(applied)
+            if replacement is not None and gain + replacement[0] > best[0]:
+                best = (gain + replacement[0], moved + replacement[1])
+    return best
+
+
+def fill(timetable: Timetable, key: SubclassKey) -> bool:
+    """
+    Give subclass `key` the teachers it is missing, one best_insertion at a time,
+    if all of them together raise the objective. A subclass that needs several
+    teachers may only pay off once they are all in.
+    """
+    changes: list[Change] = []
+    while len(timetable.assigned[key]) < timetable.num_teachers[key]:
+        insertion = best_insertion(timetable, key, EJECTION_CHAIN_DEPTH, frozenset())
+        if insertion is None:
+            break
+        changes += timetable.apply(insertion[1])
+    timetable.revert(changes)
+    return bool(changes) and timetable.try_changes(changes)
+
+
+def fast_assignments(
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    eligible_teachers: dict[SubclassKey, list[str]],
+    subclass_hours: dict[SubclassKey, int],
+    teacher_names_with_classes: list[str],
+    fixed_assignments: dict[AssignmentKey, bool],
+    objective_weights: dict[str, int],
+    max_time_in_seconds: float,
+) -> list[AssignmentKey]:
+    """
+    A good timetable without CP-SAT: the greedy timetable of coverage.py improved
+    by a local search for at most `max_time_in_seconds`.
+
+    It keeps the assignments fixed to 1 and never makes the ones fixed to 0, but
+    unlike CP-SAT it doesn't check that the fixed ones are compatible.
+    """
+    deadline = time.perf_counter() + max_time_in_seconds
+    timetable = Timetable(
+        teachers,
+        classes,
+        eligible_teachers,
+        subclass_hours,
+        teacher_names_with_classes,
+        fixed_assignments,
+        objective_weights,
+    )
+    greedy = greedy_assignments(
+        teachers, classes, eligible_teachers, subclass_hours, fixed_assignments
+    )
+    for teacher_name, class_name, role in greedy.assignments:
+        # Bypass the rules, the fixed assignments may break them
+        timetable.assign(teacher_name, (class_name, role))
+    improve(timetable, deadline)
+    return timetable.assignments()
@@ -0,0 +1,91 @@
+from .matching_algorithm import AssignmentKey, SolveMode, solve_timetable
+from .model_template import get_model_template
+from .models import AssignmentDelta, Assignments, ClassModel, Module, SolverOptions, TeacherModel
+from .overlap import build_slot_index
+
+
+def affected_neighborhood(
+    classes: dict[str, ClassModel],
+    modules: list[Module],
+    previous: Assignments,
+    delta: AssignmentDelta,
+) -> set[str]:
+    """
+    Classes whose assignments may change after `delta`.
+
+    These are the changed or new classes, the classes the changed teachers were
+    teaching and the classes that overlap one of them in time, since a teacher
+    moving into a free class may have to leave an overlapping one.
+    """
+    changed_teachers = set(delta.changed_teachers)
+    # Classes missing from the previous result are new even if the delta doesn't list them
+    changed_classes = {class_name for class_name in delta.changed_classes if class_name in classes}
+    changed_classes.update(
+        class_name for class_name in classes if class_name not in previous.matches
+    )
+    for class_name, class_assignments in previous.matches.items():
+        for assigned_teachers in class_assignments.values():
+            if class_name in classes and changed_teachers.intersection(assigned_teachers):
+                changed_classes.add(class_name)
+
+    free_classes = set(changed_classes)
+    for slot_subclasses in build_slot_index(classes, modules).values():
+        slot_classes = {class_name for class_name, role in slot_subclasses}
+        if slot_classes & changed_classes:
+            free_classes.update(slot_classes)
+    return free_classes
+
+
+def solve_incremental(
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    modules: list[Module],
+    previous: Assignments,
+    delta: AssignmentDelta,
+    teacher_names_with_classes: list[str] | None = None,
+    pre_assignments: dict[str, dict[str, list[str]]] | None = None,
+    mode: SolveMode = "weighted",
+    solver_options: SolverOptions | None = None,
+) -> Assignments:
+    """
+    Re-solve a timetable after a small change, only freeing the part it touches.
+
+    Every eligible (teacher, subclass) assignment of a class outside the affected
+    neighborhood (see `affected_neighborhood`) keeps its previous value, so
+    teachers keep the rest of their timetable. The free classes are re-optimized
+    with the previous matches as a hint. The fixed values grow with the eligible
+    pairs, not with every teacher times every subclass.
+
+    Args:
+        teachers, classes, modules: The updated problem data
+        previous: Result of the previous solve
+        delta: Teachers and classes that changed since the previous solve
+        The other arguments are passed to solve_timetable.
+    """
+    free_classes = affected_neighborhood(classes, modules, previous, delta)
+    previously_assigned = {
+        (teacher_name, class_name, role)
+        for class_name, class_assignments in previous.matches.items()
+        for role, assigned_teachers in class_assignments.items()
+        for teacher_name in assigned_teachers
+    }
+    # Only eligible pairs have a variable to fix. The template is the one
+    # solve_timetable gets from the cache right after, so it is built only once.
+    eligible_teachers = get_model_template(teachers, classes, modules).eligible_teachers
+    fixed_assignments: dict[AssignmentKey, bool] = {
+        (teacher_name, class_name, role): (teacher_name, class_name, role) in previously_assigned
+        for (class_name, role), subclass_teachers in eligible_teachers.items()
+        if class_name not in free_classes
+        for teacher_name in subclass_teachers
+    }
+    return solve_timetable(
+        teachers,
+        classes,
+        modules,
+        teacher_names_with_classes,
+        pre_assignments,
+        mode=mode,
+        solver_options=solver_options,
+        previous_matches=previous.matches,
+        fixed_assignments=fixed_assignments,
+    )
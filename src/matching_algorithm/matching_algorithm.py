@@ -1,6 +1,33 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Callable, Container, Iterable, Literal, Mapping, Protocol
+
+import numpy as np
 from ortools.sat.python import cp_model
 
-from .models import Assignments, ClassModel, ConflictModel, Module, TeacherModel
+from .components import Component, find_components, pack_components
+from .coverage import greedy_assignments, max_coverage
+from .eligibility import AssignmentKey, SubclassKey, count_hours, get_eligible_teachers
+from .heuristic import FAST_MODE_MAX_TIME_IN_SECONDS, fast_assignments
+from .model_template import ModelTemplate, get_model_template
+from .models import (
+    Assignments,
+    ClassModel,
+    ConflictModel,
+    Module,
+    RoleType,
+    SolveDiagnostics,
+    SolveProgress,
+    SolverOptions,
+    TeacherModel,
+)
+from .progress import ProgressCallback, relative_gap
+from .timing import PhaseTimer
+
+logger = logging.getLogger(__name__)
 
 status_map = {
     cp_model.FEASIBLE: "Feasible",
@@ -10,12 +37,42 @@ status_map = {
     cp_model.UNKNOWN: "Unknown",
 }
 
+SolveMode = Literal["weighted", "lexicographic", "fast"]
+
+
+class StopEvent(Protocol):
+    """threading.Event or any proxy of one, like multiprocessing.Manager().Event()."""
+
+    def is_set(self) -> bool: ...
+
+    def wait(self, timeout: float | None = None) -> bool: ...
+
+
+# Objectives in priority order. The weights are used by the "weighted" mode and the
+# local search of the "fast" mode, the "lexicographic" mode optimizes them one stage
+# at a time in this order.
+OBJECTIVE_WEIGHTS = {
+    "total_assigned": 1000000,
+    "partial_assignment": 100000,
+    "teacher_assignment": 10000,
+    "group_preference": 100,
+    "seniority_preference": 1,
+}
+
+
 def solve_timetable(
     teachers: dict[str, TeacherModel],
     classes: dict[str, ClassModel],
     modules: list[Module],
     teacher_names_with_classes: list[str] | None = None,
     pre_assignments: dict[str, dict[str, list[str]]] | None = None,
+    mode: SolveMode = "weighted",
+    solver_options: SolverOptions | None = None,
+    previous_matches: dict[str, dict[RoleType, list[str]]] | None = None,
+    fixed_assignments: dict[AssignmentKey, bool] | None = None,
+    stop_event: StopEvent | None = None,
+    on_progress: Callable[[SolveProgress], None] | None = None,
+    progress_matches: bool = False,
 ) -> Assignments:
     """
     Solve the timetable optimization problem with support for pre-assignments.
@@ -27,387 +84,870 @@ def solve_timetable(
         teacher_names_with_classes: List of teacher names who must have classes
         pre_assignments: Dictionary of pre-assigned teachers to classes
                         Format: {class_name: {role: [teacher_names]}}
+        mode: "weighted" optimizes a single weighted sum of the objectives,
+              "lexicographic" optimizes them one after the other and "fast" skips
+              CP-SAT for a greedy timetable improved by a short local search, whose
+              status is "Heuristic". Its matches can warm start an exact solve as
+              previous_matches
+        solver_options: CP-SAT parameters (time limits, workers, seed, gap limits). With
+                        num_processes > 1 the independent parts of the problem are
+                        solved in a process pool
+        previous_matches: Matches of a previous result, used as a hint to warm start
+                          the search. Format: {class_name: {role: [teacher_names]}}
+        fixed_assignments: Values that some (teacher, class, role) assignments must keep,
+                           pairs that can't be assigned are ignored
+        stop_event: When set the search stops and the best solution found so far is
+                    returned
+        on_progress: Called with the objective, bound, gap and coverage of every
+                     improving solution. Progress is only reported for a single
+                     model, so it turns off the num_processes split
+        progress_matches: Also send the full matches of each solution to on_progress
     """
 
     if teacher_names_with_classes is None:
         teacher_names_with_classes = []
     if pre_assignments is None:
         pre_assignments = {}
+    if solver_options is None:
+        solver_options = SolverOptions()
+    timer = PhaseTimer()
+
+    if mode == "fast":
+        return solve_fast(
+            teachers,
+            classes,
+            modules,
+            teacher_names_with_classes,
+            pre_assignments,
+            solver_options,
+            fixed_assignments,
+        )
 
-    model = cp_model.CpModel()
-
-    modules_ids = {module.id: module for module in modules}
-    weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    # Create variables
-    assignments = {}
-    for teacher_name, teacher in teachers.items():
-        for class_name, class_info in classes.items():
-            for subclass in class_info.subClasses:
-                for i in range(subclass.num_teachers):
-                    assignments[(teacher_name, class_name, subclass.role, i)] = model.NewBoolVar(
-                        f"{teacher_name}_{class_name}_{subclass.role}_{i}"
-                    )
+    # Independent parts of the problem are solved as separate models in parallel
+    if (
+        solver_options.num_processes is not None
+        and solver_options.num_processes > 1
+        and on_progress is None
+    ):
+        parts = pack_components(
+            find_components(
+                teachers, classes, get_eligible_teachers(teachers, classes), pre_assignments
+            ),
+            solver_options.num_processes,
+        )
+        if len(parts) > 1:
+            return solve_parts(
+                parts,
+                teachers,
+                classes,
+                modules,
+                teacher_names_with_classes,
+                pre_assignments,
+                mode,
+                solver_options,
+                previous_matches,
+                fixed_assignments,
+                stop_event,
+            )
 
-                    # Handle pre-assignments
-                    if (
-                        class_name in pre_assignments
-                        and subclass.role in pre_assignments[class_name]
-                    ):
-                        pre_assigned_teachers = pre_assignments[class_name][subclass.role]
-                        if teacher_name in pre_assigned_teachers:
-                            # Force this assignment to be 1 if the teacher is pre-assigned
-                            if (
-                                i < len(pre_assigned_teachers)
-                                and teacher_name == pre_assigned_teachers[i]
-                            ):
-                                model.Add(
-                                    assignments[(teacher_name, class_name, subclass.role, i)] == 1
-                                )
-
-    # Create 'is_assigned' variables for each subclass
-    is_assigned = {}
-    partially_assigned = {}
-    for class_name, class_info in classes.items():
-        for subclass in class_info.subClasses:
-            if subclass.num_teachers > 1:
-                # For multi-teacher classes, create variables for partial assignment
-                for i in range(1, subclass.num_teachers + 1):
-                    partially_assigned[(class_name, subclass.role, i)] = model.NewBoolVar(
-                        f"partially_assigned_{class_name}_{subclass.role}_{i}"
-                    )
+    # The structural model is compiled once per teachers/classes/modules, everything
+    # that is specific to this request is applied as bounds and hints on a copy
+    template = get_model_template(teachers, classes, modules)
+    model = template.model.Clone()
+    eligible_teachers = template.eligible_teachers
+    assignments = template.assignments
+    objectives = template.objectives
+    conflicts = ConflictModel()
+    for class_name, role, subject in template.classes_without_teachers:
+        conflicts.add_classes_without_teachers(class_name, role, subject)
+    timer.lap("model_template")
+
+    # Pre-assignments and the fixed part of the timetable, the greedy solution below
+    # keeps them too
+    forced_assignments, possible = decided_assignments(
+        teachers, classes, pre_assignments, fixed_assignments, assignments
+    )
+    if not possible:
+        model.AddBoolOr([])
+    for assignment_key, value in forced_assignments.items():
+        fix_variable(model, assignments[assignment_key], int(value))
+
+    # Teachers that must have classes are left out of the teacher_assignment objective
+    for teacher_name in teacher_names_with_classes:
+        if teacher_name in template.has_any_class:
+            fix_variable(model, template.has_any_class[teacher_name], 0)
+
+    # A greedy timetable that keeps the forced assignments. If it fully assigns as many
+    # subclasses as the coverage bound allows, total_assigned is already optimal.
+    known_stage_values: dict[str, int] = {}
+    greedy = None
+    if solver_options.greedy_hint:
+        greedy = greedy_assignments(
+            teachers, classes, eligible_teachers, template.subclass_hours, forced_assignments
+        )
+        if greedy.num_fully_assigned == template.total_assigned_bound:
+            known_stage_values["total_assigned"] = greedy.num_fully_assigned
+
+    # Warm start from a previous result, or else from the greedy timetable. Teachers,
+    # classes or pairs that are no longer eligible have no variable, so their hints
+    # are dropped.
+    hinted_assignments: set[tuple[str, str, str]] | None = None
+    if previous_matches is not None:
+        hinted_assignments = {
+            (teacher_name, class_name, role)
+            for class_name, class_assignments in previous_matches.items()
+            for role, assigned_teachers in class_assignments.items()
+            for teacher_name in assigned_teachers
+        }
+    elif greedy is not None:
+        hinted_assignments = set(greedy.assignments)
+    if hinted_assignments is not None:
+        for assignment_key, assignment in assignments.items():
+            model.AddHint(assignment, int(assignment_key in hinted_assignments))
+
+    timer.lap("request_constraints")
+    num_variables = len(model.Proto().variables)
+    num_constraints = len(model.Proto().constraints)
 
-            # Keep the original is_assigned variable for fully assigned classes
-            is_assigned[(class_name, subclass.role)] = model.NewBoolVar(
-                f"is_assigned_{class_name}_{subclass.role}"
+    # Solve the model
+    progress_callback = None
+    if on_progress is not None:
+        progress_callback = ProgressCallback(
+            assignments, classes, eligible_teachers, on_progress, progress_matches
+        )
+    objective_stage = None
+    if mode == "lexicographic":
+        solver, status, objective_stage, wall_time = solve_lexicographic(
+            model, objectives, solver_options, stop_event, progress_callback, known_stage_values
+        )
+    else:
+        model.Maximize(
+            cp_model.LinearExpr.WeightedSum(
+                list(objectives.values()),
+                [OBJECTIVE_WEIGHTS[objective] for objective in objectives],
             )
+        )
+        solver = configure_solver(solver_options)
+        status = run_solver(solver, model, stop_event, progress_callback)
+        wall_time = solver.WallTime()
+    best_bound, gap = search_bound_and_gap(solver, status)
+    timer.lap("solve")
 
-    # Create 'has_any_class' variables for each teacher
-    has_any_class = {}
-    for teacher_name in teachers:
-        if teacher_name not in teacher_names_with_classes:
-            has_any_class[teacher_name] = model.NewBoolVar(f"has_any_class_{teacher_name}")
-            # A teacher has a class if they're assigned to any subclass
-            teacher_assignments = []
-            for class_name, class_info in classes.items():
-                for subclass in class_info.subClasses:
-                    for i in range(subclass.num_teachers):
-                        teacher_assignments.append(
-                            assignments[(teacher_name, class_name, subclass.role, i)]
-                        )
-            model.Add(sum(teacher_assignments) >= 1).OnlyEnforceIf(has_any_class[teacher_name])
-            model.Add(sum(teacher_assignments) == 0).OnlyEnforceIf(
-                has_any_class[teacher_name].Not()
-            )
+    # Prepare the output
+    if status == cp_model.INFEASIBLE:
+        logger.warning("The problem is infeasible")
 
-    # Constraints
-    conflicts = ConflictModel()
-    seniority_preference = model.NewIntVar(0, 1000000, "seniority_preference")
-    seniority_terms = []
+    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+        # Only the assignments set to 1 are visited, in teacher order
+        result, unassigned = extract_matches(
+            solution_assignments(solver, template),
+            teachers,
+            classes,
+            teacher_names_with_classes,
+            template.subclass_hours,
+            conflicts,
+        )
+        output = Assignments(
+            matches=result,
+            unassigned=unassigned,
+            conflicts=conflicts,
+            status=status_map[status],
+            objective_stage=objective_stage,
+            wall_time=wall_time,
+            best_bound=best_bound,
+            gap=gap,
+            coverage_bound=template.coverage_bound,
+        )
+    else:
+        output = unsolved_assignments(
+            classes, status_map[status], objective_stage, wall_time, template.coverage_bound
+        )
+    timer.lap("extraction")
+
+    diagnostics = SolveDiagnostics(
+        build_times=template.build_times,
+        model_reused=template.num_uses > 1,
+        phase_times=timer.times,
+        num_variables=num_variables,
+        num_constraints=num_constraints,
+        response_stats=solver.ResponseStats(),
+    )
+    log_diagnostics(diagnostics, output.status)
+    if solver_options.diagnostics:
+        output.diagnostics = diagnostics
+    return output
 
-    for class_name, class_info in classes.items():
-        for subclass in class_info.subClasses:
-            num_teachers_needed = subclass.num_teachers
-            # A subclass is assigned if exactly num_teachers are assigned to it
-            actual_teachers = sum(
-                assignments[(teacher_name, class_name, subclass.role, i)]
-                for teacher_name in teachers
-                for i in range(num_teachers_needed)
-            )
 
-            # Constraint for full assignment
-            model.Add(actual_teachers == num_teachers_needed).OnlyEnforceIf(
-                is_assigned[(class_name, subclass.role)]
-            )
-            model.Add(actual_teachers < num_teachers_needed).OnlyEnforceIf(
-                is_assigned[(class_name, subclass.role)].Not()
-            )
+def solve_fast(
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    modules: list[Module],
+    teacher_names_with_classes: list[str],
+    pre_assignments: dict[str, dict[str, list[str]]],
+    solver_options: SolverOptions,
+    fixed_assignments: dict[AssignmentKey, bool] | None,
+) -> Assignments:
+    """
+    The "fast" mode of solve_timetable: no model is built, the timetable comes from
+    heuristic.py. The local search stops after FAST_MODE_MAX_TIME_IN_SECONDS or the
+    time limit of the options, if that is shorter.
+    """
+    timer = PhaseTimer()
+    eligible_teachers = get_eligible_teachers(teachers, classes)
+    subclass_hours = {
+        (class_name, subclass.role): count_hours(subclass.times)
+        for class_name, class_info in classes.items()
+        for subclass in class_info.subClasses
+    }
+    eligible_pairs = {
+        (teacher_name, class_name, role)
+        for (class_name, role), subclass_teachers in eligible_teachers.items()
+        for teacher_name in subclass_teachers
+    }
+    forced_assignments, possible = decided_assignments(
+        teachers, classes, pre_assignments, fixed_assignments, eligible_pairs
+    )
+    coverage_bound = max_coverage(teachers, classes, modules, eligible_teachers, subclass_hours)
+    timer.lap("eligibility")
 
-            # Constraints for partial assignments if multiple teachers are needed
-            if num_teachers_needed > 1:
-                for i in range(1, num_teachers_needed + 1):
-                    model.Add(actual_teachers >= i).OnlyEnforceIf(
-                        partially_assigned[(class_name, subclass.role, i)]
-                    )
-                    model.Add(actual_teachers < i).OnlyEnforceIf(
-                        partially_assigned[(class_name, subclass.role, i)].Not()
-                    )
+    if not possible:
+        logger.warning("The problem is infeasible")
+        output = unsolved_assignments(classes, "Infeasible", None, None, coverage_bound)
+    else:
+        max_time_in_seconds = FAST_MODE_MAX_TIME_IN_SECONDS
+        if solver_options.max_time_in_seconds is not None:
+            max_time_in_seconds = min(max_time_in_seconds, solver_options.max_time_in_seconds)
+        solution = fast_assignments(
+            teachers,
+            classes,
+            eligible_teachers,
+            subclass_hours,
+            teacher_names_with_classes,
+            forced_assignments,
+            OBJECTIVE_WEIGHTS,
+            max_time_in_seconds,
+        )
+        timer.lap("heuristic")
 
-            # Each teacher can be assigned at most once to each subclass
-            for teacher_name in teachers:
-                model.Add(
-                    sum(
-                        assignments[(teacher_name, class_name, subclass.role, i)]
-                        for i in range(subclass.num_teachers)
+        teacher_order = {teacher_name: i for i, teacher_name in enumerate(teachers)}
+        conflicts = ConflictModel()
+        for class_name, class_info in classes.items():
+            for subclass in class_info.subClasses:
+                if not eligible_teachers[(class_name, subclass.role)]:
+                    conflicts.add_classes_without_teachers(
+                        class_name, subclass.role, class_info.subject
                     )
-                    <= 1
-                )
+        result, unassigned = extract_matches(
+            sorted(solution, key=lambda assignment_key: teacher_order[assignment_key[0]]),
+            teachers,
+            classes,
+            teacher_names_with_classes,
+            subclass_hours,
+            conflicts,
+        )
+        output = Assignments(
+            matches=result,
+            unassigned=unassigned,
+            conflicts=conflicts,
+            status="Heuristic",
+            wall_time=sum(timer.times.values()),
+            coverage_bound=coverage_bound,
+        )
+    timer.lap("extraction")
+
+    diagnostics = SolveDiagnostics(
+        build_times={},
+        model_reused=False,
+        phase_times=timer.times,
+        num_variables=0,
+        num_constraints=0,
+        response_stats="",
+    )
+    log_diagnostics(diagnostics, output.status)
+    if solver_options.diagnostics:
+        output.diagnostics = diagnostics
+    return output
+
+
+def log_diagnostics(diagnostics: SolveDiagnostics, status: str) -> None:
+    """Log where the time of a solve went, with the full diagnostics as `extra`."""
+    logger.info(
+        "Solve finished with status %s: %d variables, %d constraints, build %s, solve %s",
+        status,
+        diagnostics.num_variables,
+        diagnostics.num_constraints,
+        {phase: round(seconds, 3) for phase, seconds in diagnostics.build_times.items()},
+        {phase: round(seconds, 3) for phase, seconds in diagnostics.phase_times.items()},
+        extra={"status": status, "diagnostics": asdict(diagnostics)},
+    )
+    logger.debug("CP-SAT response:\n%s", diagnostics.response_stats)
 
-            assigned_teachers = []
-            for teacher_name, teacher_info in teachers.items():
-                can_teach_info = next(
-                    (
-                        subject
-                        for subject in teacher_info.subject_he_know_how_to_teach
-                        if subject.subject == class_info.subject and subclass.role in subject.role
-                    ),
-                    None,
-                )
 
-                if not can_teach_info:
-                    for i in range(subclass.num_teachers):
-                        model.Add(assignments[(teacher_name, class_name, subclass.role, i)] == 0)
+def decided_assignments(
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    pre_assignments: dict[str, dict[str, list[str]]],
+    fixed_assignments: dict[AssignmentKey, bool] | None,
+    eligible_pairs: Container[AssignmentKey],
+) -> tuple[dict[AssignmentKey, bool], bool]:
+    """
+    Values a request decides for some assignments: the first num_teachers
+    pre-assigned teachers of each subclass teach it and the fixed assignments keep
+    their value. Fixed pairs outside `eligible_pairs` are ignored.
+
+    Returns:
+        The decided values and whether they can hold together: a teacher can't be
+        pre-assigned to a subclass they can never teach, nor a pair take both values.
+    """
+    decided: dict[AssignmentKey, bool] = {}
+    possible = True
+    for class_name, class_info in classes.items():
+        for subclass in class_info.subClasses:
+            pre_assigned_teachers = pre_assignments.get(class_name, {}).get(subclass.role, [])
+            for teacher_name in pre_assigned_teachers[: subclass.num_teachers]:
+                if teacher_name not in teachers:
                     continue
+                if (teacher_name, class_name, subclass.role) in eligible_pairs:
+                    decided[(teacher_name, class_name, subclass.role)] = True
+                else:
+                    possible = False
 
-                # Teacher must be available at the class times
-                is_available = True
-                for day, times in subclass.times.dict(exclude_none=True).items():
-                    if times is None:
-                        continue
-                    teacher_available_times = getattr(teacher_info.available_times, day, [])
-                    if teacher_available_times is None:
-                        teacher_available_times = []
-                    for time in times:
-                        if time not in teacher_available_times:
-                            for i in range(subclass.num_teachers):
-                                model.Add(
-                                    assignments[(teacher_name, class_name, subclass.role, i)] == 0
-                                )
-                            is_available = False
-                            break
-                    if not is_available:
-                        break
-
-                if is_available:
-                    assigned_teachers.append(teacher_name)
-                    # Add seniority preference
-                    for i in range(subclass.num_teachers):
-                        seniority_terms.append(
-                            assignments[(teacher_name, class_name, subclass.role, i)]
-                            * teacher_info.seniority
-                        )
-
-            if not assigned_teachers:
-                conflicts.add_classes_without_teachers(
-                    class_name, subclass.role, class_info.subject
-                )
+    if fixed_assignments is not None:
+        for assignment_key, value in fixed_assignments.items():
+            if assignment_key in eligible_pairs:
+                possible = possible and decided.setdefault(assignment_key, value) == value
+    return decided, possible
 
-    # Add the sum of all seniority terms
-    if seniority_terms:
-        model.Add(seniority_preference == sum(seniority_terms))
 
-    # A teacher can't teach multiple classes at the same time
-    for teacher_name in teachers:
-        for day in weekdays:
-            for time in modules_ids:  # Using the constrained range from your model
-                conflicting_subclasses = [
-                    (class_name, subclass.role, subclass.num_teachers)
-                    for class_name, class_info in classes.items()
-                    for subclass in class_info.subClasses
-                    if getattr(subclass.times, day) is not None
-                    and time in getattr(subclass.times, day)
-                ]
-                if conflicting_subclasses:
-                    model.Add(
-                        sum(
-                            assignments[(teacher_name, class_name, role, i)]
-                            for class_name, role, num_teachers in conflicting_subclasses
-                            for i in range(num_teachers)
-                        )
-                        <= 1
-                    )
+def extract_matches(
+    solution: Iterable[AssignmentKey],
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    teacher_names_with_classes: list[str],
+    subclass_hours: dict[SubclassKey, int],
+    conflicts: ConflictModel,
+) -> tuple[dict[str, dict], list[SubclassKey]]:
+    """
+    Matches and unassigned subclasses of the assignments set to 1 in `solution`,
+    which come in teacher order. The partially assigned subclasses, the teachers
+    over their weekly hours and the teachers without classes are added to
+    `conflicts`.
+    """
+    result: dict[str, dict] = {
+        class_name: {subclass.role: [] for subclass in class_info.subClasses}
+        for class_name, class_info in classes.items()
+    }
+    teacher_hours = dict.fromkeys(teachers, 0)
+    teachers_with_classes: set[str] = set()
+    for teacher_name, class_name, role in solution:
+        result[class_name][role].append(teacher_name)
+        teacher_hours[teacher_name] += subclass_hours[(class_name, role)]
+        teachers_with_classes.add(teacher_name)
+
+    unassigned: list[SubclassKey] = []
+    for class_name, class_info in classes.items():
+        for subclass in class_info.subClasses:
+            num_assigned = len(result[class_name][subclass.role])
+            if num_assigned == 0:
+                # Check for unassigned subclasses
+                unassigned.append((class_name, subclass.role))
+            elif num_assigned < subclass.num_teachers:
+                conflicts.add_partially_unassigned(
+                    class_name,
+                    subclass.role,
+                    num_assigned,
+                    subclass.num_teachers,
+                )
 
-    # Weekly hours constraint
+    # Check for weekly hours conflicts
     for teacher_name, teacher_info in teachers.items():
-        weekly_hours = sum(
-            assignments[(teacher_name, class_name, subclass.role, i)]
-            * sum(
-                len(getattr(subclass.times, day, []))
-                for day in weekdays
-                if getattr(subclass.times, day) is not None
+        if teacher_hours[teacher_name] > teacher_info.weekly_hours_max_work:
+            conflicts.add_teacher_has_more_than_weekly_hours(
+                teacher_name,
+                teacher_hours[teacher_name],
+                teacher_info.weekly_hours_max_work,
             )
+
+    # Add information about teachers without any classes
+    teachers_without_classes = [
+        teacher_name
+        for teacher_name in teachers
+        if teacher_name not in teacher_names_with_classes
+        and teacher_name not in teachers_with_classes
+    ]
+    if teachers_without_classes:
+        conflicts.add_teacher_without_any_classes(teachers_without_classes)
+    return result, unassigned
+
+
+def unsolved_assignments(
+    classes: dict[str, ClassModel],
+    status: str,
+    objective_stage: str | None,
+    wall_time: float | None,
+    coverage_bound: int | None,
+) -> Assignments:
+    """Result of a solve that found no solution: no matches and every subclass unassigned."""
+    empty_conflicts = ConflictModel(
+        teacher_without_any_classes=[],
+        teacher_has_more_than_weekly_hours=[],
+        classes_without_teachers=[],
+        partially_unassigned=[],
+    )
+    return Assignments(
+        matches={},
+        unassigned=[
+            (class_name, subclass.role)
             for class_name, class_info in classes.items()
             for subclass in class_info.subClasses
-            for i in range(subclass.num_teachers)
-        )
-        model.Add(weekly_hours <= teacher_info.weekly_hours_max_work)
+        ],
+        conflicts=empty_conflicts,
+        status=status,
+        objective_stage=objective_stage,
+        wall_time=wall_time,
+        coverage_bound=coverage_bound,
+    )
 
-    # Group preference
-    group_preference = model.NewIntVar(0, len(teachers) * len(classes) * 2, "group_preference")
-    group_matches = []
 
-    for teacher_name, teacher_info in teachers.items():
-        if teacher_info.groups is None:
-            continue
-        for group in teacher_info.groups:
-            for class_name, class_info in classes.items():
-                if class_info.subject == group.subject:
-                    group_match = model.NewBoolVar(f"group_match_{teacher_name}_{class_name}")
-
-                    teacher_role_assignments = []
-                    other_teacher_role_assignments = []
-
-                    # Check this teacher's assignments
-                    for subclass in class_info.subClasses:
-                        if subclass.role in group.my_role:
-                            for i in range(subclass.num_teachers):
-                                teacher_role_assignments.append(
-                                    assignments[(teacher_name, class_name, subclass.role, i)]
-                                )
-
-                    # Check other teachers' assignments
-                    for other_teacher_info in group.other_teacher:
-                        if other_teacher_info.teacher not in teachers:
-                            continue
-                        other_teacher = other_teacher_info.teacher
-                        other_teacher_assignments = []
-                        for subclass in class_info.subClasses:
-                            if subclass.role in other_teacher_info.role:
-                                for i in range(subclass.num_teachers):
-                                    other_teacher_assignments.append(
-                                        assignments[(other_teacher, class_name, subclass.role, i)]
-                                    )
-                        if other_teacher_assignments:
-                            other_teacher_role_assignments.append(
-                                model.NewBoolVar(f"other_{other_teacher}_{class_name}")
-                            )
-                            model.Add(sum(other_teacher_assignments) >= 1).OnlyEnforceIf(
-                                other_teacher_role_assignments[-1]
-                            )
-                            model.Add(sum(other_teacher_assignments) == 0).OnlyEnforceIf(
-                                other_teacher_role_assignments[-1].Not()
-                            )
-
-                    if teacher_role_assignments and other_teacher_role_assignments:
-                        teacher_assigned = model.NewBoolVar(
-                            f"teacher_{teacher_name}_assigned_{class_name}"
-                        )
-                        model.Add(sum(teacher_role_assignments) >= 1).OnlyEnforceIf(
-                            teacher_assigned
-                        )
-                        model.Add(sum(teacher_role_assignments) == 0).OnlyEnforceIf(
-                            teacher_assigned.Not()
-                        )
-
-                        model.AddBoolAnd(
-                            [teacher_assigned] + other_teacher_role_assignments
-                        ).OnlyEnforceIf(group_match)
-                        model.AddBoolOr(
-                            [teacher_assigned.Not()]
-                            + [x.Not() for x in other_teacher_role_assignments]
-                        ).OnlyEnforceIf(group_match.Not())
-
-                        group_matches.append(group_match)
-
-    if group_matches:
-        model.Add(group_preference == sum(group_matches))
-    else:
-        model.Add(group_preference == 0)
+def solution_assignments(solver: cp_model.CpSolver, template: ModelTemplate) -> list[AssignmentKey]:
+    """Keys of the assignments set to 1 in the solver's solution, read in bulk."""
+    solution = solver.ResponseProto().solution
+    values = np.fromiter(solution, dtype=np.int64, count=len(solution))
+    return [
+        template.assignment_keys[i] for i in np.flatnonzero(values[template.assignment_indices])
+    ]
 
-    # Multi-objective optimization
-    teacher_assignment_preference = sum(has_any_class.values())
-    total_assigned = sum(is_assigned.values())
-    partial_assignment_preference = sum(
-        partially_assigned[(class_name, subclass.role, i)] * i
-        for class_name, class_info in classes.items()
-        for subclass in class_info.subClasses
-        if subclass.num_teachers > 1
-        for i in range(1, subclass.num_teachers)
-    )
 
-    model.Maximize(
-        total_assigned * 1000000
-        + partial_assignment_preference * 100000
-        + teacher_assignment_preference * 10000
-        + group_preference * 100
-        + seniority_preference
-    )
+def fix_variable(model: cp_model.CpModel, variable: cp_model.IntVar, value: int) -> None:
+    """
+    Restrict the domain of a boolean `variable` of `model` to `value`.
 
-    # Solve the model
+    A variable already fixed to the other value can't be satisfied, so the model
+    is made infeasible like two contradicting constraints would.
+    """
+    # The repeated field of newer OR-Tools versions doesn't support negative indices
+    domain = model.Proto().variables[variable.Index()].domain
+    if len(domain) == 2 and domain[0] <= value <= domain[1]:
+        domain[0] = domain[1] = value
+    else:
+        model.AddBoolOr([])
+
+
+def configure_solver(
+    solver_options: SolverOptions, max_time_in_seconds: float | None = None
+) -> cp_model.CpSolver:
+    """Build a CP-SAT solver, `max_time_in_seconds` overrides the time limit of the options."""
+    solver = cp_model.CpSolver()
+    if max_time_in_seconds is None:
+        max_time_in_seconds = solver_options.max_time_in_seconds
+    if max_time_in_seconds is not None:
+        solver.parameters.max_time_in_seconds = max_time_in_seconds
+    if solver_options.num_workers is not None:
+        solver.parameters.num_workers = solver_options.num_workers
+    if solver_options.random_seed is not None:
+        solver.parameters.random_seed = solver_options.random_seed
+    if solver_options.relative_gap_limit is not None:
+        solver.parameters.relative_gap_limit = solver_options.relative_gap_limit
+    if solver_options.absolute_gap_limit is not None:
+        solver.parameters.absolute_gap_limit = solver_options.absolute_gap_limit
+    solver.parameters.log_search_progress = solver_options.log_search_progress
+    return solver
+
+
+def run_solver(
+    solver: cp_model.CpSolver,
+    model: cp_model.CpModel,
+    stop_event: StopEvent | None,
+    solution_callback: cp_model.CpSolverSolutionCallback | None = None,
+) -> int:
+    """Solve `model`, stopping the search as soon as `stop_event` is set."""
+    if stop_event is None:
+        return solver.Solve(model, solution_callback)
+
+    solved = threading.Event()
+
+    def stop_when_set() -> None:
+        # StopSearch does nothing before the search starts, so keep calling it
+        while not solved.is_set():
+            if stop_event.wait(0.1):
+                solver.StopSearch()
+                solved.wait(0.1)
+
+    watcher = threading.Thread(target=stop_when_set, daemon=True)
+    watcher.start()
+    try:
+        return solver.Solve(model, solution_callback)
+    finally:
+        solved.set()
+        watcher.join()
+
+
+def solve_hint(
+    model: cp_model.CpModel, solver_options: SolverOptions, stop_event: StopEvent | None
+) -> tuple[cp_model.CpSolver, int]:
+    """Complete the hint of `model` into a solution, keeping the hinted variables fixed."""
+    solver = configure_solver(solver_options)
+    solver.parameters.fix_variables_to_their_hinted_value = True
+    solver.parameters.stop_after_first_solution = True
+    return solver, run_solver(solver, model, stop_event)
+
+
+def search_bound_and_gap(
+    solver: cp_model.CpSolver, status: int
+) -> tuple[float | None, float | None]:
+    """Best objective bound and relative gap of the last solve, if it found a solution."""
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, None
+    best_bound = solver.BestObjectiveBound()
+    return best_bound, relative_gap(solver.ObjectiveValue(), best_bound)
+
+
+def solve_lexicographic(
+    model: cp_model.CpModel,
+    objectives: Mapping[str, cp_model.LinearExprT],
+    solver_options: SolverOptions,
+    stop_event: StopEvent | None = None,
+    progress_callback: ProgressCallback | None = None,
+    known_stage_values: dict[str, int] | None = None,
+) -> tuple[cp_model.CpSolver, int, str | None, float]:
+    """
+    Optimize the objectives one stage at a time, in priority order.
+
+    After each stage its value is fixed as a constraint and the solution found is
+    used as a hint for the next stage. If a stage finds no solution (e.g. it runs
+    out of time) the solution of the previous stage is kept. Each stage is limited
+    by its own entry of `stage_time_limits` and by what is left of the total
+    `max_time_in_seconds`. Once `stop_event` is set no further stage is started.
+    The status is only OPTIMAL if every stage was solved to optimality.
+    The stages in `known_stage_values` already know their optimal value, it is
+    fixed without solving them. If they come first and the next stage finds no
+    solution, the hint of the model, which reaches those values, is the result.
+
+    Returns:
+        The solver holding the last solution, its status, the name of the last
+        stage that produced a solution (None if the first one didn't) and the
+        wall time spent on all the stages.
+    """
     solver = cp_model.CpSolver()
-    status = solver.Solve(model)
+    status = cp_model.UNKNOWN
+    objective_stage = None
+    # Last stage skipped before any stage was solved
+    skipped_stage = None
+    all_stages_optimal = True
+    stage_time_limits = solver_options.stage_time_limits or {}
+    wall_time = 0.0
+    known_stage_values = known_stage_values or {}
+    for stage, expression in objectives.items():
+        if stage in known_stage_values:
+            if not isinstance(expression, int):
+                model.Add(expression >= known_stage_values[stage])
+            if objective_stage is None:
+                skipped_stage = stage
+            continue
+        time_limits = [stage_time_limits[stage]] if stage in stage_time_limits else []
+        if solver_options.max_time_in_seconds is not None:
+            time_limits.append(max(solver_options.max_time_in_seconds - wall_time, 0.0))
+        if objective_stage is not None and (
+            (time_limits and min(time_limits) <= 0)
+            or (stop_event is not None and stop_event.is_set())
+        ):
+            # The stages left aren't solved, the result isn't proven optimal
+            all_stages_optimal = False
+            break
+
+        model.Maximize(expression)
+        stage_solver = configure_solver(solver_options, min(time_limits, default=None))
+        if progress_callback is not None:
+            progress_callback.objective_stage, progress_callback.elapsed = stage, wall_time
+        stage_status = run_solver(stage_solver, model, stop_event, progress_callback)
+        wall_time += stage_solver.WallTime()
+        if stage_status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            if objective_stage is None:
+                if skipped_stage is not None:
+                    # The hint reaches the values of the skipped stages, keep it
+                    hint_solver, hint_status = solve_hint(model, solver_options, stop_event)
+                    wall_time += hint_solver.WallTime()
+                    if hint_status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                        return hint_solver, cp_model.FEASIBLE, skipped_stage, wall_time
+                return stage_solver, stage_status, None, wall_time
+            all_stages_optimal = False
+            break
+
+        solver, objective_stage = stage_solver, stage
+        all_stages_optimal = all_stages_optimal and stage_status == cp_model.OPTIMAL
+
+        # Keep this stage's value and warm start the next stage from this solution
+        if not isinstance(expression, int):
+            model.Add(expression >= round(stage_solver.ObjectiveValue()))
+        model.ClearHints()
+        for index, value in enumerate(stage_solver.ResponseProto().solution):
+            model.AddHint(model.GetIntVarFromProtoIndex(index), value)
+
+    status = cp_model.OPTIMAL if all_stages_optimal else cp_model.FEASIBLE
+    return solver, status, objective_stage, wall_time
+
+
+def solve_parts(
+    parts: list[Component],
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    modules: list[Module],
+    teacher_names_with_classes: list[str],
+    pre_assignments: dict[str, dict[str, list[str]]],
+    mode: SolveMode,
+    solver_options: SolverOptions,
+    previous_matches: dict[str, dict[RoleType, list[str]]] | None,
+    fixed_assignments: dict[AssignmentKey, bool] | None,
+    stop_event: StopEvent | None,
+) -> Assignments:
+    """
+    Solve each part as its own model in a process pool and merge the results.
 
-    # Prepare the output
-    result: dict[str, dict] = {}
-    if status == cp_model.INFEASIBLE:
-        print("The problem is infeasible")
-        print(solver.ResponseStats())
+    The parts share no variables and every objective is a sum over them, so the
+    merged result is as good as solving the whole model. Every part keeps the
+    full num_workers: with only one or two workers the CP-SAT portfolio loses the
+    subsolvers that close the has_any_class objective and gets much slower.
+    """
+    part_options = solver_options.model_copy(update={"num_processes": None})
 
-    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+    arguments = []
+    for part in parts:
+        part_teacher_names = set(part.teacher_names)
+        part_subclass_keys = set(part.subclass_keys)
+        part_classes = {}
         for class_name, class_info in classes.items():
-            result[class_name] = {}
-            for subclass in class_info.subClasses:
-                result[class_name][subclass.role] = []
-                assigned_teachers = []
-                for teacher_name in teachers:
-                    for i in range(subclass.num_teachers):
-                        if solver.Value(assignments[(teacher_name, class_name, subclass.role, i)]):
-                            assigned_teachers.append(teacher_name)
-
-                result[class_name][subclass.role] = assigned_teachers
-
-                if len(assigned_teachers) < subclass.num_teachers and len(assigned_teachers) > 0:
-                    conflicts.add_partially_unassigned(
-                        class_name,
-                        subclass.role,
-                        len(assigned_teachers),
-                        subclass.num_teachers,
+            subclasses = [
+                subclass
+                for subclass in class_info.subClasses
+                if (class_name, subclass.role) in part_subclass_keys
+            ]
+            if subclasses:
+                part_classes[class_name] = class_info.model_copy(update={"subClasses": subclasses})
+        arguments.append(
+            (
+                {name: info for name, info in teachers.items() if name in part_teacher_names},
+                part_classes,
+                modules,
+                [name for name in teacher_names_with_classes if name in part_teacher_names],
+                {name: info for name, info in pre_assignments.items() if name in part_classes},
+                mode,
+                part_options,
+                (
+                    {name: info for name, info in previous_matches.items() if name in part_classes}
+                    if previous_matches is not None
+                    else None
+                ),
+                (
+                    {
+                        key: value
+                        for key, value in fixed_assignments.items()
+                        if key[0] in part_teacher_names
+                    }
+                    if fixed_assignments is not None
+                    else None
+                ),
+            )
+        )
+
+    # Spawn instead of fork, the parent may already be running solver threads
+    context = multiprocessing.get_context("spawn")
+    if stop_event is None:
+        with ProcessPoolExecutor(max_workers=len(parts), mp_context=context) as executor:
+            results = list(executor.map(solve_timetable, *zip(*arguments)))
+        return merge_assignments(results, teachers, classes)
+
+    # `stop_event` may not be picklable, relay it to an event the processes can share
+    with context.Manager() as manager:
+        part_stop_event = manager.Event()
+        solved = threading.Event()
+
+        def relay_stop_event() -> None:
+            while not solved.is_set():
+                if stop_event.wait(0.1):
+                    part_stop_event.set()
+                    return
+
+        relay = threading.Thread(target=relay_stop_event, daemon=True)
+        relay.start()
+        try:
+            with ProcessPoolExecutor(max_workers=len(parts), mp_context=context) as executor:
+                results = list(
+                    executor.map(
+                        solve_timetable,
+                        *zip(*arguments),
+                        [part_stop_event] * len(parts),
                     )
+                )
+        finally:
+            solved.set()
+            relay.join()
+    return merge_assignments(results, teachers, classes)
 
-        # Check for unassigned subclasses
-        unassigned = [
-            (class_name, subclass.role)
-            for class_name, class_info in classes.items()
-            for subclass in class_info.subClasses
-            if not result[class_name][subclass.role]
-        ]
 
-        # Check for weekly hours conflicts
-        for teacher_name, teacher_info in teachers.items():
-            teacher_hours = sum(
-                (
-                    len(getattr(subclass.times, day, []))
-                    if getattr(subclass.times, day) is not None
-                    else 0
-                )
-                for class_name, class_assignments in result.items()
-                for role, assigned_teachers in class_assignments.items()
-                for subclass in classes[class_name].subClasses
-                if subclass.role == role
-                for day in weekdays
-                if teacher_name in assigned_teachers
+def merge_assignments(
+    results: list[Assignments],
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+) -> Assignments:
+    """
+    Combine the results of independent parts into the result of the whole problem.
+
+    If a part has no solution the whole problem has none. Otherwise matches,
+    unassigned subclasses and conflicts follow the order of `teachers` and
+    `classes`, the status is "Optimal" only if every part is optimal, the wall time
+    is the one of the slowest part and the gap is the largest one, which bounds
+    the gap of the sum. The coverage bounds of the parts add up. In lexicographic
+    mode the objective stage is the earliest one any part stopped at.
+    """
+    wall_time = max((result.wall_time or 0.0 for result in results), default=0.0)
+    stages = [result.objective_stage for result in results]
+    reached_stages = [stage for stage in stages if stage is not None]
+    objective_stage = None
+    if len(reached_stages) == len(results):
+        objective_stage = min(reached_stages, key=list(OBJECTIVE_WEIGHTS).index)
+
+    coverage_bounds = [result.coverage_bound for result in results]
+    coverage_bound = None
+    if all(bound is not None for bound in coverage_bounds):
+        coverage_bound = sum(bound for bound in coverage_bounds if bound is not None)
+
+    for failed_status in ("Infeasible", "Model Invalid", "Unknown"):
+        if any(result.status == failed_status for result in results):
+            return Assignments(
+                matches={},
+                unassigned=[
+                    (class_name, subclass.role)
+                    for class_name, class_info in classes.items()
+                    for subclass in class_info.subClasses
+                ],
+                conflicts=ConflictModel(),
+                status=failed_status,
+                objective_stage=objective_stage,
+                wall_time=wall_time,
+                coverage_bound=coverage_bound,
             )
-            if teacher_hours > teacher_info.weekly_hours_max_work:
-                conflicts.add_teacher_has_more_than_weekly_hours(
-                    teacher_name,
-                    teacher_hours,
-                    teacher_info.weekly_hours_max_work,
-                )
 
-        # Add information about teachers without any classes
-        teachers_without_classes = [
-            teacher_name
-            for teacher_name in teachers
-            if teacher_name not in teacher_names_with_classes
-            and not solver.Value(has_any_class[teacher_name])
-        ]
-        if teachers_without_classes:
-            conflicts.add_teacher_without_any_classes(teachers_without_classes)
-
-        return Assignments(matches=result, unassigned=unassigned, conflicts=conflicts, status=status_map[status])
-    else:
-        empty_conflicts = ConflictModel(
-            teacher_without_any_classes=[],
-            teacher_has_more_than_weekly_hours=[],
-            classes_without_teachers=[],
-            partially_unassigned=[],
+    # A class can be split between parts, each part holding some of its subclasses
+    matches: dict[str, dict] = {}
+    conflicts = ConflictModel()
+    for result in results:
+        for class_name, class_assignments in result.matches.items():
+            matches.setdefault(class_name, {}).update(class_assignments)
+        conflicts.add_teacher_without_any_classes(result.conflicts.teacher_without_any_classes)
+        conflicts.teacher_has_more_than_weekly_hours += (
+            result.conflicts.teacher_has_more_than_weekly_hours
         )
-        return Assignments(
-            matches={},
-            unassigned=[
-                (class_name, subclass.role)
-                for class_name, class_info in classes.items()
-                for subclass in class_info.subClasses
-            ],
-            conflicts=empty_conflicts,
-            status=status_map[status]
+        conflicts.classes_without_teachers += result.conflicts.classes_without_teachers
+        conflicts.partially_unassigned += result.conflicts.partially_unassigned
+
+    # Bounds of different lexicographic stages can't be added up
+    best_bound = gap = None
+    best_bounds = [result.best_bound for result in results if result.best_bound is not None]
+    gaps = [result.gap for result in results if result.gap is not None]
+    if len(set(stages)) == 1 and len(best_bounds) == len(gaps) == len(results):
+        best_bound, gap = sum(best_bounds), max(gaps)
+    part_diagnostics = [result.diagnostics for result in results if result.diagnostics]
+    return order_assignments(
+        Assignments(
+            matches=matches,
+            unassigned=[key for result in results for key in result.unassigned],
+            conflicts=conflicts,
+            status=(
+                "Optimal" if all(result.status == "Optimal" for result in results) else "Feasible"
+            ),
+            objective_stage=objective_stage,
+            wall_time=wall_time,
+            best_bound=best_bound,
+            gap=gap,
+            coverage_bound=coverage_bound,
+            diagnostics=(
+                merge_diagnostics(part_diagnostics)
+                if part_diagnostics and len(part_diagnostics) == len(results)
+                else None
+            ),
+        ),
+        teachers,
+        classes,
+    )
+
+
+def merge_diagnostics(diagnostics: list[SolveDiagnostics]) -> SolveDiagnostics:
+    """
+    Diagnostics of parts solved in parallel: each phase takes as long as in the
+    slowest part, the model sizes add up and the solver statistics are concatenated.
+    """
+
+    def slowest(times: list[dict[str, float]]) -> dict[str, float]:
+        merged: dict[str, float] = {}
+        for part_times in times:
+            for phase, seconds in part_times.items():
+                merged[phase] = max(merged.get(phase, 0.0), seconds)
+        return merged
+
+    return SolveDiagnostics(
+        build_times=slowest([part.build_times for part in diagnostics]),
+        model_reused=all(part.model_reused for part in diagnostics),
+        phase_times=slowest([part.phase_times for part in diagnostics]),
+        num_variables=sum(part.num_variables for part in diagnostics),
+        num_constraints=sum(part.num_constraints for part in diagnostics),
+        response_stats="\n".join(part.response_stats for part in diagnostics),
+    )
+
+
+def order_assignments(
+    assignments: Assignments,
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+) -> Assignments:
+    """
+    Copy of `assignments` whose matches, unassigned subclasses and conflicts follow
+    the order of `teachers` and `classes`, like a direct solve_timetable result.
+    """
+    teacher_order = {teacher_name: i for i, teacher_name in enumerate(teachers)}
+    subclass_order = {
+        (class_name, subclass.role): i
+        for i, (class_name, subclass) in enumerate(
+            (class_name, subclass)
+            for class_name, class_info in classes.items()
+            for subclass in class_info.subClasses
         )
+    }
+    matches: dict[str, dict] = {
+        class_name: {
+            subclass.role: sorted(
+                assignments.matches[class_name][subclass.role], key=teacher_order.__getitem__
+            )
+            for subclass in class_info.subClasses
+        }
+        for class_name, class_info in classes.items()
+        if class_name in assignments.matches
+    }
+    conflicts = assignments.conflicts
+    return Assignments(
+        matches=matches,
+        unassigned=sorted(assignments.unassigned, key=subclass_order.__getitem__),
+        conflicts=ConflictModel(
+            teacher_without_any_classes=sorted(
+                conflicts.teacher_without_any_classes, key=teacher_order.__getitem__
+            ),
+            teacher_has_more_than_weekly_hours=sorted(
+                conflicts.teacher_has_more_than_weekly_hours,
+                key=lambda conflict: teacher_order[conflict.teacher],
+            ),
+            classes_without_teachers=sorted(
+                conflicts.classes_without_teachers,
+                key=lambda conflict: subclass_order[(conflict.class_name, conflict.role)],
+            ),
+            partially_unassigned=sorted(
+                conflicts.partially_unassigned,
+                key=lambda conflict: subclass_order[(conflict.class_name, conflict.role)],
+            ),
+        ),
+        status=assignments.status,
+        objective_stage=assignments.objective_stage,
+        wall_time=assignments.wall_time,
+        best_bound=assignments.best_bound,
+        gap=assignments.gap,
+        coverage_bound=assignments.coverage_bound,
+        diagnostics=assignments.diagnostics,
+    )
@@ -0,0 +1,384 @@
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Mapping
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from .coverage import max_coverage, max_fully_assigned
+from .eligibility import AssignmentKey, SubclassKey, count_hours, get_eligible_teachers
+from .models import ClassModel, Module, RoleType, SubClassModel, TeacherModel
+from .overlap import build_overlap_cliques, keep_maximal
+from .timing import PhaseTimer
+
+# Number of compiled models kept by get_model_template
+MODEL_TEMPLATE_CACHE_SIZE = 8
+
+
+@dataclass
+class ModelTemplate:
+    """
+    The part of the CP-SAT model that only depends on teachers, classes and modules.
+
+    Every solve works on a `model.Clone()`. The variables below belong to `model`
+    but, as they are referenced by proto index, they are also valid in its clones.
+    """
+
+    model: cp_model.CpModel
+    eligible_teachers: dict[SubclassKey, list[str]]
+    # (teacher_name, class_name, role) -> assignment variable
+    assignments: dict[AssignmentKey, cp_model.IntVar]
+    # Keys of `assignments` and the proto index of their variables, in the same
+    # order, to read a whole solution at once
+    assignment_keys: list[AssignmentKey]
+    assignment_indices: np.ndarray
+    has_any_class: dict[str, cp_model.IntVar]
+    # Weekly hours of every subclass
+    subclass_hours: dict[SubclassKey, int]
+    objectives: Mapping[str, cp_model.LinearExprT]
+    # Most teachers any timetable can assign, counting a teacher once per
+    # subclass, and most subclasses it can fully assign. See coverage.py
+    coverage_bound: int
+    total_assigned_bound: int
+    # (class_name, role, subject) of the subclasses no teacher can teach
+    classes_without_teachers: list[tuple[str, RoleType, str]]
+    # Seconds spent in each phase of build_model_template
+    build_times: dict[str, float]
+    # Number of solves that got this template from get_model_template
+    num_uses: int = 0
+
+
+def build_model_template(
+    teachers: dict[str, TeacherModel], classes: dict[str, ClassModel], modules: list[Module]
+) -> ModelTemplate:
+    """Build the variables, constraints and objectives of the timetable model."""
+    model = cp_model.CpModel()
+    timer = PhaseTimer()
+
+    # Only pairs that pass the subject/role and availability checks get variables
+    eligible_teachers = get_eligible_teachers(teachers, classes)
+
+    teacher_subclasses: dict[str, list[tuple[str, SubClassModel]]] = {
+        teacher_name: [] for teacher_name in teachers
+    }
+    for class_name, class_info in classes.items():
+        for subclass in class_info.subClasses:
+            for teacher_name in eligible_teachers[(class_name, subclass.role)]:
+                teacher_subclasses[teacher_name].append((class_name, subclass))
+
+    subclass_hours = {
+        (class_name, subclass.role): count_hours(subclass.times)
+        for class_name, class_info in classes.items()
+        for subclass in class_info.subClasses
+    }
+
+    timer.lap("eligibility")
+
+    # Create variables, one per (teacher, subclass) pair. The teachers of a
+    # multi-teacher subclass are interchangeable, so there are no per-slot copies.
+    assignments: dict[AssignmentKey, cp_model.IntVar] = {}
+    for teacher_name, assignable_subclasses in teacher_subclasses.items():
+        for class_name, subclass in assignable_subclasses:
+            assignments[(teacher_name, class_name, subclass.role)] = model.NewBoolVar(
+                f"{teacher_name}_{class_name}_{subclass.role}"
+            )
+
+    # Create 'is_assigned' variables for each subclass that has eligible teachers
+    is_assigned = {}
+    partially_assigned = {}
+    for class_name, class_info in classes.items():
+        for subclass in class_info.subClasses:
+            if not eligible_teachers[(class_name, subclass.role)]:
+                continue
+            if subclass.num_teachers > 1:
+                # For multi-teacher classes, create variables for partial assignment
+                for i in range(1, subclass.num_teachers):
+                    partially_assigned[(class_name, subclass.role, i)] = model.NewBoolVar(
+                        f"partially_assigned_{class_name}_{subclass.role}_{i}"
+                    )
+
+            # Keep the original is_assigned variable for fully assigned classes
+            is_assigned[(class_name, subclass.role)] = model.NewBoolVar(
+                f"is_assigned_{class_name}_{subclass.role}"
+            )
+
+    # Create 'has_any_class' variables for each teacher that can teach something.
+    # Teachers that must have classes don't count, solve_timetable fixes theirs to 0.
+    has_any_class = {}
+    for teacher_name, assignable_subclasses in teacher_subclasses.items():
+        if not assignable_subclasses:
+            continue
+        has_any_class[teacher_name] = model.NewBoolVar(f"has_any_class_{teacher_name}")
+        # A teacher has a class if they're assigned to any subclass. The objective
+        # maximizes has_any_class, so only the has_any_class => assigned side is needed.
+        model.AddBoolOr(
+            [
+                assignments[(teacher_name, class_name, subclass.role)]
+                for class_name, subclass in assignable_subclasses
+            ]
+        ).OnlyEnforceIf(has_any_class[teacher_name])
+
+    timer.lap("variables")
+
+    # Constraints
+    classes_without_teachers: list[tuple[str, RoleType, str]] = []
+    seniority_variables = []
+    seniority_weights = []
+
+    for class_name, class_info in classes.items():
+        for subclass in class_info.subClasses:
+            subclass_teachers = eligible_teachers[(class_name, subclass.role)]
+            if not subclass_teachers:
+                classes_without_teachers.append((class_name, subclass.role, class_info.subject))
+                continue
+
+            num_teachers_needed = subclass.num_teachers
+            subclass_assignments = [
+                assignments[(teacher_name, class_name, subclass.role)]
+                for teacher_name in subclass_teachers
+            ]
+            actual_teachers = cp_model.LinearExpr.Sum(subclass_assignments)
+            # At most num_teachers can be assigned to a subclass
+            model.Add(actual_teachers <= num_teachers_needed)
+
+            # A subclass is assigned if exactly num_teachers are assigned to it. Like the
+            # partial assignments below, is_assigned is maximized by the objective, so it
+            # only needs the one-sided is_assigned => enough teachers encoding.
+            model.Add(actual_teachers >= num_teachers_needed).OnlyEnforceIf(
+                is_assigned[(class_name, subclass.role)]
+            )
+
+            # Constraints for partial assignments if multiple teachers are needed
+            for i in range(1, num_teachers_needed):
+                model.Add(actual_teachers >= i).OnlyEnforceIf(
+                    partially_assigned[(class_name, subclass.role, i)]
+                )
+
+            # Add seniority preference
+            seniority_variables += subclass_assignments
+            seniority_weights += [
+                teachers[teacher_name].seniority for teacher_name in subclass_teachers
+            ]
+
+    timer.lap("coverage_constraints")
+
+    # A teacher can't teach multiple classes at the same time: one at-most-one per
+    # overlap clique, restricted to the subclasses the teacher is eligible for.
+    # CP-SAT presolve turns these linear sums over booleans into AtMostOne.
+    teacher_cliques: dict[str, list[list[SubclassKey]]] = {}
+    for clique in build_overlap_cliques(classes, modules):
+        clique_by_teacher: dict[str, list[SubclassKey]] = {}
+        for class_name, role in clique:
+            for teacher_name in eligible_teachers[(class_name, role)]:
+                clique_by_teacher.setdefault(teacher_name, []).append((class_name, role))
+        for teacher_name, teacher_clique in clique_by_teacher.items():
+            if len(teacher_clique) > 1:
+                teacher_cliques.setdefault(teacher_name, []).append(teacher_clique)
+    for teacher_name, cliques in teacher_cliques.items():
+        for teacher_clique in keep_maximal(cliques):
+            model.Add(
+                cp_model.LinearExpr.Sum(
+                    [
+                        assignments[(teacher_name, class_name, role)]
+                        for class_name, role in teacher_clique
+                    ]
+                )
+                <= 1
+            )
+
+    timer.lap("overlap_constraints")
+
+    # Weekly hours constraint
+    for teacher_name, assignable_subclasses in teacher_subclasses.items():
+        if not assignable_subclasses:
+            continue
+        weekly_hours = cp_model.LinearExpr.WeightedSum(
+            [
+                assignments[(teacher_name, class_name, subclass.role)]
+                for class_name, subclass in assignable_subclasses
+            ],
+            [
+                subclass_hours[(class_name, subclass.role)]
+                for class_name, subclass in assignable_subclasses
+            ],
+        )
+        model.Add(weekly_hours <= teachers[teacher_name].weekly_hours_max_work)
+
+    timer.lap("weekly_hours_constraints")
+
+    # Group preference. Groups are usually declared by each of their teachers, so
+    # the "teacher teaches the class in one of these roles" indicators and the
+    # group matches over the same indicators are created once and shared.
+    class_names_by_subject: dict[str, list[str]] = {}
+    for class_name, class_info in classes.items():
+        class_names_by_subject.setdefault(class_info.subject, []).append(class_name)
+
+    teaches_class_indicators: dict[tuple[str, str, frozenset[RoleType]], cp_model.IntVar] = {}
+    # Indices of the indicators of a group match -> its variable and how many
+    # groups declare it
+    group_matches: dict[frozenset[int], cp_model.IntVar] = {}
+    group_match_counts: dict[frozenset[int], int] = {}
+
+    def group_roles(teacher_name: str, class_name: str, roles: list[RoleType]) -> list[RoleType]:
+        return [
+            subclass.role
+            for subclass in classes[class_name].subClasses
+            if subclass.role in roles and (teacher_name, class_name, subclass.role) in assignments
+        ]
+
+    def has_roles(class_name: str, roles: list[RoleType]) -> bool:
+        return any(subclass.role in roles for subclass in classes[class_name].subClasses)
+
+    def teaches_class(teacher_name: str, class_name: str, roles: list[RoleType]) -> cp_model.IntVar:
+        key = (teacher_name, class_name, frozenset(roles))
+        if key not in teaches_class_indicators:
+            if len(roles) == 1:
+                teaches_class_indicators[key] = assignments[(teacher_name, class_name, roles[0])]
+            else:
+                indicator = model.NewBoolVar(f"teaches_{teacher_name}_{class_name}")
+                model.AddBoolOr(
+                    [assignments[(teacher_name, class_name, role)] for role in roles]
+                ).OnlyEnforceIf(indicator)
+                teaches_class_indicators[key] = indicator
+        return teaches_class_indicators[key]
+
+    def can_teach_together(
+        class_name: str, roles: list[RoleType], other_roles: list[RoleType]
+    ) -> bool:
+        # Two teachers only fit in the same subclass if it needs more than one
+        num_teachers = {
+            subclass.role: subclass.num_teachers for subclass in classes[class_name].subClasses
+        }
+        return any(
+            role != other_role or num_teachers[role] > 1
+            for role in roles
+            for other_role in other_roles
+        )
+
+    for teacher_name, teacher_info in teachers.items():
+        for group in teacher_info.groups or []:
+            for class_name in class_names_by_subject.get(group.subject, []):
+                teacher_roles = group_roles(teacher_name, class_name, group.my_role)
+                if not teacher_roles:
+                    continue
+                indicators = [teaches_class(teacher_name, class_name, teacher_roles)]
+                possible = True
+                for other_teacher_info in group.other_teacher:
+                    other_teacher = other_teacher_info.teacher
+                    if other_teacher not in teachers or not has_roles(
+                        class_name, other_teacher_info.role
+                    ):
+                        continue
+                    other_roles = group_roles(other_teacher, class_name, other_teacher_info.role)
+                    if not other_roles or (
+                        other_teacher != teacher_name
+                        and not can_teach_together(class_name, teacher_roles, other_roles)
+                    ):
+                        # The group can never be matched in this class
+                        possible = False
+                        break
+                    indicators.append(teaches_class(other_teacher, class_name, other_roles))
+
+                if not possible or len(indicators) == 1:
+                    continue
+                key = frozenset(indicator.Index() for indicator in indicators)
+                if key not in group_matches:
+                    group_match = model.NewBoolVar(f"group_match_{teacher_name}_{class_name}")
+                    # group_match is maximized, so it only has to imply the indicators
+                    model.AddBoolAnd(indicators).OnlyEnforceIf(group_match)
+                    group_matches[key] = group_match
+                    group_match_counts[key] = 0
+                group_match_counts[key] += 1
+
+    timer.lap("group_constraints")
+
+    # Multi-objective optimization
+    objectives = {
+        "total_assigned": cp_model.LinearExpr.Sum(list(is_assigned.values())),
+        "partial_assignment": cp_model.LinearExpr.WeightedSum(
+            list(partially_assigned.values()), [i for (_, _, i) in partially_assigned]
+        ),
+        "teacher_assignment": cp_model.LinearExpr.Sum(list(has_any_class.values())),
+        "group_preference": cp_model.LinearExpr.WeightedSum(
+            list(group_matches.values()), list(group_match_counts.values())
+        ),
+        "seniority_preference": cp_model.LinearExpr.WeightedSum(
+            seniority_variables, seniority_weights
+        ),
+    }
+
+    timer.lap("objectives")
+
+    # The max flow bound on the coverage caps the sum of all the assignments and, through
+    # it, the total_assigned objective. Neither cut changes the solutions, they only
+    # give the search its bound from the start.
+    coverage_bound = max_coverage(teachers, classes, modules, eligible_teachers, subclass_hours)
+    total_assigned_bound = max_fully_assigned(classes, eligible_teachers, coverage_bound)
+    model.Add(cp_model.LinearExpr.Sum(list(assignments.values())) <= coverage_bound)
+    model.Add(objectives["total_assigned"] <= total_assigned_bound)
+
+    timer.lap("coverage_bound")
+
+    return ModelTemplate(
+        model=model,
+        eligible_teachers=eligible_teachers,
+        assignments=assignments,
+        assignment_keys=list(assignments),
+        assignment_indices=np.array(
+            [assignment.Index() for assignment in assignments.values()], dtype=np.int64
+        ),
+        has_any_class=has_any_class,
+        subclass_hours=subclass_hours,
+        objectives=objectives,
+        coverage_bound=coverage_bound,
+        total_assigned_bound=total_assigned_bound,
+        classes_without_teachers=classes_without_teachers,
+        build_times=timer.times,
+    )
+
+
+def template_key(
+    teachers: dict[str, TeacherModel], classes: dict[str, ClassModel], modules: list[Module]
+) -> str:
+    """Hash of everything the template depends on. Order matters, it decides the variable order."""
+    content = json.dumps(
+        [
+            [[name, teacher.model_dump()] for name, teacher in teachers.items()],
+            [[name, class_info.model_dump()] for name, class_info in classes.items()],
+            [module.id for module in modules],
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+_templates: OrderedDict[str, ModelTemplate] = OrderedDict()
+
+
+def get_model_template(
+    teachers: dict[str, TeacherModel], classes: dict[str, ClassModel], modules: list[Module]
+) -> ModelTemplate:
+    """
+    Compiled model for these teachers, classes and modules, built once and reused.
+
+    Requests that only change pre-assignments, the teachers that must have
+    classes, fixed assignments or hints skip the model construction. The last
+    MODEL_TEMPLATE_CACHE_SIZE templates are kept.
+    """
+    key = template_key(teachers, classes, modules)
+    template = _templates.get(key)
+    if template is None:
+        template = build_model_template(teachers, classes, modules)
+        _templates[key] = template
+        while len(_templates) > MODEL_TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+    _templates.move_to_end(key)
+    template.num_uses += 1
+    return template
+
+
+def clear_model_templates() -> None:
+    """Forget the cached templates, the next solves build their model again."""
+    _templates.clear()
@@ -1,12 +1,16 @@
+from .assignment_delta_model import AssignmentDelta
 from .assignments_model import (
     Assignments,
     ClassesWithoutTeachersConflict,
     ConflictModel,
     MoreThanWeeklyHoursConflict,
     PartiallyUnassignedConflict,
+    SolveDiagnostics,
 )
 from .class_model import ClassModel
 from .module import Module
 from .role_model import RoleModel, RoleType
+from .solve_progress_model import SolveProgress
+from .solver_options_model import SolverOptions
 from .sub_class_model import SubClassModel
 from .teacher_model import TeacherModel
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+
+class AssignmentDelta(BaseModel):
+    # Teachers whose data (availability, subjects, hours, ...) changed
+    changed_teachers: list[str] = Field(default_factory=list)
+    # Classes that changed, were added or were removed
+    changed_classes: list[str] = Field(default_factory=list)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import Field
 from pydantic.dataclasses import dataclass
 
@@ -62,9 +64,38 @@ class ConflictModel:
         )
 
 
+@dataclass
+class SolveDiagnostics:
+    # Seconds spent in each phase of building the model. If the model was reused
+    # from an earlier solve these are the times of that build.
+    build_times: dict[str, float]
+    model_reused: bool
+    # Seconds spent in each phase of this solve. "model_template" is the lookup and
+    # copy of the model, and its build unless it was reused.
+    phase_times: dict[str, float]
+    # Size of the model handed to CP-SAT
+    num_variables: int
+    num_constraints: int
+    # CpSolver.ResponseStats() of the last solve
+    response_stats: str
+
+
 @dataclass
 class Assignments:
     matches: dict[str, dict[RoleType, list[str]]]
     unassigned: list[tuple[str, RoleType]]
     conflicts: ConflictModel
+    # CP-SAT status name, or "Heuristic" for a timetable of the fast mode
     status: str
+    # Last objective stage solved in lexicographic mode
+    objective_stage: Optional[str] = None
+    # Search statistics of the solver, the bound and gap refer to the last objective solved
+    wall_time: Optional[float] = None
+    best_bound: Optional[float] = None
+    gap: Optional[float] = None
+    # Most teachers any timetable can assign, counting a teacher once per subclass.
+    # Computed with a max flow before the search, where each teacher takes at most one
+    # of the subclasses sharing the busiest slot of a subclass, other overlaps are relaxed.
+    coverage_bound: Optional[int] = None
+    # Only filled if SolverOptions.diagnostics is set
+    diagnostics: Optional[SolveDiagnostics] = None
@@ -0,0 +1,19 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from .role_model import RoleType
+
+
+class SolveProgress(BaseModel):
+    # Lexicographic stage being optimized, None in weighted mode
+    objective_stage: Optional[str] = None
+    objective: float
+    best_bound: float
+    gap: float
+    # Seconds since the solve started, including earlier lexicographic stages
+    wall_time: float
+    # Subclasses with all their teachers and with only some of them
+    assigned: int
+    partially_assigned: int
+    matches: Optional[dict[str, dict[RoleType, list[str]]]] = None
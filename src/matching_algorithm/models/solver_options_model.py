@@ -0,0 +1,22 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class SolverOptions(BaseModel):
+    # Wall time limit for the whole solve, shared by all the lexicographic stages
+    max_time_in_seconds: Optional[float] = Field(default=None, gt=0)
+    num_workers: Optional[int] = Field(default=None, ge=1)
+    random_seed: Optional[int] = None
+    relative_gap_limit: Optional[float] = Field(default=None, ge=0)
+    absolute_gap_limit: Optional[float] = Field(default=None, ge=0)
+    log_search_progress: bool = False
+    # Return phase timings, model size and solver statistics in Assignments.diagnostics
+    diagnostics: bool = False
+    # Solve the independent parts of the problem in up to this many processes
+    num_processes: Optional[int] = Field(default=None, ge=1)
+    # Time limit for each lexicographic stage, keyed by objective name
+    stage_time_limits: Optional[dict[str, float]] = None
+    # Hint the greedy timetable when there are no previous matches, and skip the
+    # total_assigned stage when it is already optimal
+    greedy_hint: bool = True
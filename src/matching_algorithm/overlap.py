@@ -0,0 +1,57 @@
+from .eligibility import WEEKDAYS, SubclassKey
+from .models import ClassModel, Module
+
+Slot = tuple[str, int]
+
+
+def build_slot_index(
+    classes: dict[str, ClassModel], modules: list[Module] | None = None
+) -> dict[Slot, list[SubclassKey]]:
+    """
+    Invert the subclass times into a (day, module) -> subclasses index.
+
+    If `modules` is given only times that belong to one of them are indexed. The
+    index is built in a single pass over the subclasses.
+    """
+    modules_ids = {module.id for module in modules} if modules is not None else None
+    slot_index: dict[Slot, list[SubclassKey]] = {}
+    for class_name, class_info in classes.items():
+        for subclass in class_info.subClasses:
+            for day in WEEKDAYS:
+                for time in getattr(subclass.times, day) or []:
+                    if modules_ids is None or time in modules_ids:
+                        slot_index.setdefault((day, time), []).append((class_name, subclass.role))
+    return slot_index
+
+
+def keep_maximal(sets: list[list[SubclassKey]]) -> list[list[SubclassKey]]:
+    """Drop the sets that are duplicated or contained in another set of the list."""
+    maximal: list[frozenset[SubclassKey]] = []
+    kept: list[list[SubclassKey]] = []
+    for keys in sorted(sets, key=len, reverse=True):
+        candidate = frozenset(keys)
+        if not any(candidate <= other for other in maximal):
+            maximal.append(candidate)
+            kept.append(keys)
+    return kept
+
+
+def build_overlap_cliques(
+    classes: dict[str, ClassModel], modules: list[Module] | None = None
+) -> list[list[SubclassKey]]:
+    """
+    Maximal sets of subclasses that share a (day, module) slot.
+
+    On each day the subclasses are intervals over the modules, so the subclasses
+    occupying a slot form a clique of the interval graph and the maximal ones are
+    its maximal cliques. Any two subclasses that overlap are in at least one of
+    them, so "no teacher teaches two overlapping subclasses" is the same as "no
+    teacher teaches two subclasses of the same clique".
+    """
+    return keep_maximal(
+        [
+            subclasses
+            for subclasses in build_slot_index(classes, modules).values()
+            if len(subclasses) > 1
+        ]
+    )
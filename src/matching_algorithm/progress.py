@@ -0,0 +1,71 @@
+from typing import Callable
+
+from ortools.sat.python import cp_model
+
+from .eligibility import AssignmentKey, SubclassKey
+from .models import ClassModel, SolveProgress
+
+
+def relative_gap(objective: float, best_bound: float) -> float:
+    return abs(best_bound - objective) / max(1.0, abs(objective))
+
+
+class ProgressCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Report every improving solution of the search to `on_progress`.
+
+    The coverage counts are rebuilt from the assignment variables of each
+    solution, the full matches only if `include_matches` is set. The lexicographic
+    mode updates `objective_stage` and `elapsed` before each stage.
+    """
+
+    def __init__(
+        self,
+        assignments: dict[AssignmentKey, cp_model.IntVar],
+        classes: dict[str, ClassModel],
+        eligible_teachers: dict[SubclassKey, list[str]],
+        on_progress: Callable[[SolveProgress], None],
+        include_matches: bool = False,
+    ) -> None:
+        super().__init__()
+        self.assignments = assignments
+        self.classes = classes
+        self.eligible_teachers = eligible_teachers
+        self.on_progress = on_progress
+        self.include_matches = include_matches
+        self.objective_stage: str | None = None
+        self.elapsed = 0.0
+
+    def on_solution_callback(self) -> None:
+        assigned = partially_assigned = 0
+        matches: dict[str, dict] | None = {} if self.include_matches else None
+        for class_name, class_info in self.classes.items():
+            for subclass in class_info.subClasses:
+                assigned_teachers = [
+                    teacher_name
+                    for teacher_name in self.eligible_teachers[(class_name, subclass.role)]
+                    if self.BooleanValue(
+                        self.assignments[(teacher_name, class_name, subclass.role)]
+                    )
+                ]
+                if len(assigned_teachers) >= subclass.num_teachers:
+                    assigned += 1
+                elif assigned_teachers:
+                    partially_assigned += 1
+                if matches is not None:
+                    matches.setdefault(class_name, {})[subclass.role] = assigned_teachers
+
+        objective = self.ObjectiveValue()
+        best_bound = self.BestObjectiveBound()
+        self.on_progress(
+            SolveProgress(
+                objective_stage=self.objective_stage,
+                objective=objective,
+                best_bound=best_bound,
+                gap=relative_gap(objective, best_bound),
+                wall_time=self.elapsed + self.WallTime(),
+                assigned=assigned,
+                partially_assigned=partially_assigned,
+                matches=matches,
+            )
+        )
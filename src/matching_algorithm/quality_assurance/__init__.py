@@ -1,3 +1,4 @@
-from .check_conflicts import are_conflicts
+from .check_conflicts import Violation, are_conflicts
 from .diagnose_infeasibility import diagnose_infeasibility
+from .explain_unassigned import Cause, Explanation, explain_unassigned
 from .validate_unassigned import check_solution, validate_unassigned_classes
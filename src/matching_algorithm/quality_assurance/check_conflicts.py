@@ -1,103 +1,125 @@
-from ..models import ClassModel, RoleType, SubClassModel, TeacherModel
+from typing import Literal, Optional
+
+from pydantic.dataclasses import dataclass
+
+from ..eligibility import SlotMasks, SubclassKey, count_hours
+from ..models import ClassModel, Module, RoleType, TeacherModel
+from ..overlap import build_slot_index
+
+ViolationKind = Literal[
+    "teacher_cannot_teach_class",
+    "teacher_has_more_than_weekly_hours",
+    "teacher_teach_more_than_one_class_at_same_time",
+]
+
+
+@dataclass
+class Violation:
+    kind: ViolationKind
+    teacher: str
+    # The subclass involved, None for the weekly hours of a teacher
+    class_name: Optional[str] = None
+    role: Optional[RoleType] = None
 
 
 def are_conflicts(
     assignment: dict[str, dict[RoleType, list[str]]],
     teachers: dict[str, TeacherModel],
     classes: dict[str, ClassModel],
-) -> bool:
+    modules: list[Module] | None = None,
+) -> list[Violation]:
+    """
+    Every way `assignment` breaks the hard constraints of the timetable.
+
+    A teacher can't teach a subclass if they don't know its subject and role, if
+    they aren't available at all of its times or if the teacher, class or role
+    doesn't exist. A teacher can't exceed their weekly hours nor teach two
+    subclasses that share a slot of overlap.build_slot_index, the slots the solver
+    constrains: with `modules` only the times of those modules count. The result is
+    empty, so falsy, when there are no conflicts. Runs in time linear in the number
+    of assignments, plus the size of the teachers and subclasses it looks at.
+    """
+    # One bit per slot, so two subclasses overlap iff their masks share a bit. Only
+    # the assigned classes can overlap, so the others are left out of the index.
+    assigned_classes = {name: classes[name] for name in assignment if name in classes}
+    overlap_masks: dict[SubclassKey, int] = {}
+    slot_index = build_slot_index(assigned_classes, modules)
+    for slot_bit, slot_subclasses in enumerate(slot_index.values()):
+        for subclass_key in slot_subclasses:
+            overlap_masks[subclass_key] = overlap_masks.get(subclass_key, 0) | 1 << slot_bit
+    slot_masks = SlotMasks()
+    subclass_masks: dict[SubclassKey, tuple[int, int]] = {}
+    teacher_masks: dict[str, int] = {}
+    teacher_subject_roles: dict[str, set[tuple[str, str]]] = {}
+    teacher_hours: dict[str, int] = {}
+    teacher_booked: dict[str, int] = {}
+    teacher_subclasses: dict[str, set[SubclassKey]] = {}
+
+    violations: list[Violation] = []
     for class_name, class_assigned_teachers in assignment.items():
+        class_info = classes.get(class_name)
+        subclasses = (
+            {subclass.role: subclass for subclass in class_info.subClasses} if class_info else {}
+        )
         for selected_role, teachers_assigned in class_assigned_teachers.items():
+            key = (class_name, selected_role)
+            subclass = subclasses.get(selected_role)
+            if subclass is not None and key not in subclass_masks:
+                subclass_masks[key] = (slot_masks.mask(subclass.times), count_hours(subclass.times))
+
             for teacher_name in teachers_assigned:
-                if not teacher_can_teach_class(
-                    teachers[teacher_name], classes[class_name], selected_role
+                teacher = teachers.get(teacher_name)
+                if teacher is None or class_info is None or subclass is None:
+                    violations.append(
+                        Violation(
+                            "teacher_cannot_teach_class", teacher_name, class_name, selected_role
+                        )
+                    )
+                    continue
+                if teacher_name not in teacher_masks:
+                    teacher_masks[teacher_name] = slot_masks.mask(teacher.available_times)
+                    teacher_subject_roles[teacher_name] = {
+                        (subject.subject, role)
+                        for subject in teacher.subject_he_know_how_to_teach
+                        for role in subject.role
+                    }
+                    teacher_hours[teacher_name] = 0
+                    teacher_booked[teacher_name] = 0
+                    teacher_subclasses[teacher_name] = set()
+
+                subclass_mask, hours = subclass_masks[key]
+                knows_subject = (class_info.subject, selected_role) in teacher_subject_roles[
+                    teacher_name
+                ]
+                is_available = not subclass_mask & ~teacher_masks[teacher_name]
+                if not knows_subject or not is_available:
+                    violations.append(
+                        Violation(
+                            "teacher_cannot_teach_class", teacher_name, class_name, selected_role
+                        )
+                    )
+
+                overlap_mask = overlap_masks.get(key, 0)
+                if (
+                    key in teacher_subclasses[teacher_name]
+                    or overlap_mask & teacher_booked[teacher_name]
                 ):
-                    print("teacher_cannot_teach_class")
-                    return True
-    # Check for weekly hours and time conflicts
-    teachers_classes: dict[str, list[tuple[ClassModel, RoleType]]] = {}
-    for class_name, class_assigned_teachers in assignment.items():
-        for selected_role, teachers_assigned in class_assigned_teachers.items():
-            for teacher_name in teachers_assigned:
-                if teacher_name not in teachers_classes:
-                    teachers_classes[teacher_name] = []
-                teachers_classes[teacher_name].append((classes[class_name], selected_role))
-    for teacher_name, classes_that_he_teach in teachers_classes.items():
-        if teacher_has_more_than_weekly_hours(teachers[teacher_name], classes_that_he_teach):
-            print("teacher_has_more_than_weekly_hours")
-            return True
-        if teacher_teach_more_than_one_class_at_same_time(classes_that_he_teach):
-            print("teacher_teach_more_than_one_class_at_same_time")
-            return True
-    return False
-
-
-def teacher_has_more_than_weekly_hours(
-    teacher: TeacherModel, classes_that_he_teach: list[tuple[ClassModel, RoleType]]
-) -> bool:
-    weekly_hours = sum(
-        sum(
-            len(times)
-            for times in get_subclass(class_, role).times.dict(exclude_none=True).values()
-            if times is not None
-        )
-        for class_, role in classes_that_he_teach
-    )
-    return weekly_hours > teacher.weekly_hours_max_work
-
-
-def teacher_teach_more_than_one_class_at_same_time(
-    classes_that_he_teach: list[tuple[ClassModel, RoleType]]
-) -> bool:
-    booked_time: dict[str, dict] = {
-        "Monday": {},
-        "Tuesday": {},
-        "Wednesday": {},
-        "Thursday": {},
-        "Friday": {},
-    }
-
-    for class_, role in classes_that_he_teach:
-        subclass = get_subclass(class_, role)
-        times_dict = subclass.times.dict(exclude_none=True)
-        for day, times in times_dict.items():
-            if times:  # Check if times is not None
-                for time in times:
-                    if time in booked_time[day]:
-                        return True
-                    booked_time[day][time] = True
-    return False
-
-
-def teacher_can_teach_class(
-    teacher: TeacherModel, class_: ClassModel, selected_role: RoleType
-) -> bool:
-    if not teacher_know_subject(teacher, class_.subject, selected_role):
-        return False
-
-    # Check if teacher is free at the time
-    subclass = get_subclass(class_, selected_role)
-    times_dict = subclass.times.dict(exclude_none=True)
-    for day, times in times_dict.items():
-        if times and not teacher_is_available_at_time(teacher, day, times):
-            return False
-    return True
-
-
-def get_subclass(class_: ClassModel, role: RoleType) -> SubClassModel:
-    return next(subclass for subclass in class_.subClasses if subclass.role == role)
-
-
-def teacher_know_subject(teacher: TeacherModel, subject: str, selected_role: RoleType) -> bool:
-    return any(
-        subject_model.subject == subject and selected_role in subject_model.role
-        for subject_model in teacher.subject_he_know_how_to_teach
-    )
-
-
-def teacher_is_available_at_time(teacher: TeacherModel, day: str, times: list[int]) -> bool:
-    teacher_times = teacher.available_times.dict(exclude_none=True).get(day, [])
-    return all(time in teacher_times for time in times)
+                    violations.append(
+                        Violation(
+                            "teacher_teach_more_than_one_class_at_same_time",
+                            teacher_name,
+                            class_name,
+                            selected_role,
+                        )
+                    )
+                teacher_subclasses[teacher_name].add(key)
+                teacher_booked[teacher_name] |= overlap_mask
+                teacher_hours[teacher_name] += hours
+
+    for teacher_name, hours in teacher_hours.items():
+        if hours > teachers[teacher_name].weekly_hours_max_work:
+            violations.append(Violation("teacher_has_more_than_weekly_hours", teacher_name))
+    return violations
 
 
 if __name__ == "__main__":
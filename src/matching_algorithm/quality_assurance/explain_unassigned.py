@@ -0,0 +1,300 @@
+from typing import Literal, Optional
+
+from ortools.sat.python import cp_model
+from pydantic.dataclasses import dataclass
+
+from ..eligibility import AssignmentKey, SubclassKey, build_eligibility_matrix, count_hours
+from ..models import Assignments, ClassModel, Module, RoleType, TeacherModel
+from ..overlap import build_overlap_cliques
+
+CauseKind = Literal[
+    # Fewer teachers know the subject and role than the subclass needs
+    "not_enough_capable_teachers",
+    "weekly_hours",
+    "availability",
+    "pre_assignment",
+    "must_have_class",
+    # Another subclass would lose the teachers it has in the result
+    "keep_assigned",
+]
+
+
+@dataclass
+class Cause:
+    kind: CauseKind
+    teacher: Optional[str] = None
+    class_name: Optional[str] = None
+    role: Optional[RoleType] = None
+
+
+@dataclass
+class Explanation:
+    class_name: str
+    role: RoleType
+    # "blocked": the subclass can't get all its teachers without dropping one of
+    # the causes. "assignable": it can, the search left it out to favour the
+    # other objectives or ran out of time. "unknown": a solve hit the time limit.
+    status: Literal["blocked", "assignable", "unknown"]
+    causes: list[Cause]
+
+
+class ExplainModel:
+    """
+    The timetable model with an assumption literal per group of constraints a
+    planner can act on, so an infeasible solve names the groups that clash.
+
+    Unlike the solver model it has a variable for every teacher that knows the
+    subject and role of a subclass. The teachers that aren't available at its
+    times are only kept out by their availability literal.
+    """
+
+    def __init__(
+        self,
+        teachers: dict[str, TeacherModel],
+        classes: dict[str, ClassModel],
+        modules: list[Module],
+        assignments: Assignments,
+        teacher_names_with_classes: list[str],
+        pre_assignments: dict[str, dict[str, list[str]]],
+    ) -> None:
+        self.model = cp_model.CpModel()
+        # Proto index of an assumption literal -> what it stands for
+        self.causes: dict[int, Cause] = {}
+        # Assumptions every explanation starts from, all of them hold in `assignments`
+        self.assumptions: list[cp_model.IntVar] = []
+        # Literals that ask for a subclass to be fully assigned, or to keep the
+        # teachers it has in `assignments`
+        self.required: dict[SubclassKey, cp_model.IntVar] = {}
+        self.keep: dict[SubclassKey, cp_model.IntVar] = {}
+        # How many teachers know the subject and role of each subclass, and how many it needs
+        self.num_capable: dict[SubclassKey, tuple[int, int]] = {}
+
+        eligibility = build_eligibility_matrix(teachers, classes)
+        subclasses = {
+            (class_name, subclass.role): subclass
+            for class_name, class_info in classes.items()
+            for subclass in class_info.subClasses
+        }
+        self.assignments: dict[AssignmentKey, cp_model.IntVar] = {}
+        teacher_subclasses: dict[str, list[SubclassKey]] = {
+            teacher_name: [] for teacher_name in teachers
+        }
+        subclass_teachers: dict[SubclassKey, list[str]] = {key: [] for key in subclasses}
+        unavailable: dict[str, list[cp_model.IntVar]] = {}
+        for i, key in enumerate(eligibility.subclass_keys):
+            for j, teacher_name in enumerate(eligibility.teacher_names):
+                if not eligibility.knows_subject[i, j]:
+                    continue
+                class_name, role = key
+                assignment = self.model.NewBoolVar(f"{teacher_name}_{class_name}_{role}")
+                self.assignments[(teacher_name, class_name, role)] = assignment
+                teacher_subclasses[teacher_name].append(key)
+                subclass_teachers[key].append(teacher_name)
+                if not eligibility.eligible[i, j]:
+                    unavailable.setdefault(teacher_name, []).append(assignment)
+
+        for teacher_name, assignments_out_of_hours in unavailable.items():
+            availability = self.add_assumption(Cause("availability", teacher=teacher_name))
+            for assignment in assignments_out_of_hours:
+                self.model.Add(assignment == 0).OnlyEnforceIf(availability)
+
+        result_teachers: dict[SubclassKey, list[str]] = {
+            (class_name, role): assigned_teachers
+            for class_name, class_assignments in assignments.matches.items()
+            for role, assigned_teachers in class_assignments.items()
+        }
+        for key, subclass in subclasses.items():
+            class_name, role = key
+            actual_teachers = cp_model.LinearExpr.Sum(
+                [
+                    self.assignments[(teacher_name, class_name, role)]
+                    for teacher_name in subclass_teachers[key]
+                ]
+            )
+            self.model.Add(actual_teachers <= subclass.num_teachers)
+            self.num_capable[key] = (len(subclass_teachers[key]), subclass.num_teachers)
+            self.required[key] = self.model.NewBoolVar(f"required_{class_name}_{role}")
+            self.model.Add(actual_teachers >= subclass.num_teachers).OnlyEnforceIf(
+                self.required[key]
+            )
+            num_assigned = len(result_teachers.get(key, []))
+            if num_assigned:
+                self.keep[key] = self.add_assumption(
+                    Cause("keep_assigned", class_name=class_name, role=role)
+                )
+                self.model.Add(actual_teachers >= num_assigned).OnlyEnforceIf(self.keep[key])
+
+        # A teacher is never in two places at once, whatever the assumptions
+        for clique in build_overlap_cliques(classes, modules):
+            clique_teachers: dict[str, list[SubclassKey]] = {}
+            for key in clique:
+                for teacher_name in subclass_teachers[key]:
+                    clique_teachers.setdefault(teacher_name, []).append(key)
+            for teacher_name, teacher_clique in clique_teachers.items():
+                if len(teacher_clique) > 1:
+                    self.model.Add(
+                        cp_model.LinearExpr.Sum(
+                            [
+                                self.assignments[(teacher_name, class_name, role)]
+                                for class_name, role in teacher_clique
+                            ]
+                        )
+                        <= 1
+                    )
+
+        for teacher_name, keys in teacher_subclasses.items():
+            if not keys:
+                continue
+            weekly_hours = self.add_assumption(Cause("weekly_hours", teacher=teacher_name))
+            self.model.Add(
+                cp_model.LinearExpr.WeightedSum(
+                    [
+                        self.assignments[(teacher_name, class_name, role)]
+                        for class_name, role in keys
+                    ],
+                    [count_hours(subclasses[key].times) for key in keys],
+                )
+                <= teachers[teacher_name].weekly_hours_max_work
+            ).OnlyEnforceIf(weekly_hours)
+
+        for (class_name, role), subclass in subclasses.items():
+            pre_assigned_teachers = pre_assignments.get(class_name, {}).get(role, [])
+            for teacher_name in pre_assigned_teachers[: subclass.num_teachers]:
+                if teacher_name not in teachers:
+                    continue
+                pre_assignment = self.add_assumption(
+                    Cause("pre_assignment", teacher=teacher_name, class_name=class_name, role=role)
+                )
+                assignment = self.assignments.get((teacher_name, class_name, role))
+                if assignment is None:
+                    # The teacher doesn't know the subject, the pre-assignment can't hold
+                    self.model.AddBoolOr([]).OnlyEnforceIf(pre_assignment)
+                else:
+                    self.model.Add(assignment == 1).OnlyEnforceIf(pre_assignment)
+
+        # Only the must-have teachers that got classes, so the result satisfies every
+        # assumption and any conflict involves the subclass being explained
+        teachers_with_classes = {
+            teacher_name
+            for assigned_teachers in result_teachers.values()
+            for teacher_name in assigned_teachers
+        }
+        for teacher_name in teacher_names_with_classes:
+            if teacher_name not in teachers_with_classes:
+                continue
+            must_have_class = self.add_assumption(Cause("must_have_class", teacher=teacher_name))
+            self.model.AddBoolOr(
+                [
+                    self.assignments[(teacher_name, class_name, role)]
+                    for class_name, role in teacher_subclasses[teacher_name]
+                ]
+            ).OnlyEnforceIf(must_have_class)
+
+    def add_assumption(self, cause: Cause) -> cp_model.IntVar:
+        literal = self.model.NewBoolVar(f"assume_{len(self.causes)}")
+        self.causes[literal.Index()] = cause
+        self.assumptions.append(literal)
+        return literal
+
+    def solve(
+        self, assumptions: list[cp_model.IntVar], max_time_in_seconds: float
+    ) -> tuple[int, list[int]]:
+        """Status of the model under `assumptions` and, if infeasible, the indices of a core."""
+        self.model.ClearAssumptions()
+        self.model.AddAssumptions(assumptions)
+        solver = cp_model.CpSolver()
+        # Cores are only extracted by a single worker. Presolve doesn't pay off, the
+        # model is plain propagation and it would run again for every solve
+        solver.parameters.num_workers = 1
+        solver.parameters.cp_model_presolve = False
+        solver.parameters.max_time_in_seconds = max_time_in_seconds
+        status = solver.Solve(self.model)
+        if status != cp_model.INFEASIBLE:
+            return status, []
+        return status, list(solver.SufficientAssumptionsForInfeasibility())
+
+    def explain(
+        self, key: SubclassKey, max_time_in_seconds: float, minimize: bool = False
+    ) -> Explanation:
+        """
+        Why subclass `key` can't get all its teachers.
+
+        The core CP-SAT returns is sufficient but not always minimal. With
+        `minimize` each of its assumptions is dropped in turn and kept out if the
+        rest still clash, which costs a solve per assumption.
+        """
+        class_name, role = key
+        num_capable, num_teachers = self.num_capable[key]
+        if num_capable < num_teachers:
+            causes = [Cause("not_enough_capable_teachers", class_name=class_name, role=role)]
+            return Explanation(class_name=class_name, role=role, status="blocked", causes=causes)
+
+        required = self.required[key]
+        # The subclass itself may keep fewer teachers than it has
+        assumptions = [required] + [
+            literal for literal in self.assumptions if literal is not self.keep.get(key)
+        ]
+        status, core = self.solve(assumptions, max_time_in_seconds)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return Explanation(class_name=class_name, role=role, status="assignable", causes=[])
+        if status != cp_model.INFEASIBLE:
+            return Explanation(class_name=class_name, role=role, status="unknown", causes=[])
+
+        literals = {literal.Index(): literal for literal in assumptions}
+        core = [index for index in core if index != required.Index()]
+        for index in list(core) if minimize else []:
+            if index not in core:
+                continue
+            candidate = [other for other in core if other != index]
+            status, smaller_core = self.solve(
+                [required] + [literals[other] for other in candidate], max_time_in_seconds
+            )
+            if status == cp_model.INFEASIBLE:
+                core = [other for other in candidate if other in smaller_core]
+
+        causes = [self.causes[index] for index in core]
+        if not causes:
+            causes = [Cause("not_enough_capable_teachers", class_name=class_name, role=role)]
+        return Explanation(class_name=class_name, role=role, status="blocked", causes=causes)
+
+
+def explain_unassigned(
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    modules: list[Module],
+    assignments: Assignments,
+    teacher_names_with_classes: list[str] | None = None,
+    pre_assignments: dict[str, dict[str, list[str]]] | None = None,
+    max_time_in_seconds: float = 10.0,
+    minimize: bool = False,
+) -> list[Explanation]:
+    """
+    Explain why each unassigned or partially assigned subclass of a result is
+    missing teachers.
+
+    The model is built once with assumption literals for every teacher's weekly
+    hours and availability, every pre-assignment, the must-have teachers and
+    the coverage every other subclass has in `assignments`. Each subclass is
+    then required to be fully assigned and CP-SAT's
+    SufficientAssumptionsForInfeasibility gives the groups that prevent it in a
+    single solve.
+
+    Args:
+        teachers, classes, modules, teacher_names_with_classes, pre_assignments:
+            The arguments the result was solved with
+        assignments: The solve_timetable result to explain
+        max_time_in_seconds: Time limit of each CP-SAT solve
+        minimize: Shrink every core to a minimal set of causes, a solve per cause
+    """
+    explain_model = ExplainModel(
+        teachers,
+        classes,
+        modules,
+        assignments,
+        teacher_names_with_classes or [],
+        pre_assignments or {},
+    )
+    missing = list(assignments.unassigned) + [
+        (partial.class_name, partial.role) for partial in assignments.conflicts.partially_unassigned
+    ]
+    return [explain_model.explain(key, max_time_in_seconds, minimize) for key in missing]
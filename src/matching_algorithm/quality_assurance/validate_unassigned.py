@@ -1,97 +1,80 @@
-from typing import Any, Optional
+from typing import Any
 
-from ..models import Assignments, ClassModel, RoleType, SubClassModel, TeacherModel
+from ..eligibility import SlotMasks, count_hours
+from ..models import Assignments, ClassModel, SubClassModel, TeacherModel
 
 
 def validate_unassigned_classes(
     teachers: dict[str, TeacherModel], classes: dict[str, ClassModel], assignments: Assignments
 ) -> list[dict[str, Any]]:
+    """
+    Unassigned and partially assigned subclasses that some teacher could still take.
+
+    A teacher could take a subclass if they know its subject and role, are
+    available at its times, have enough weekly hours left and aren't booked at
+    any of its times. The booked hours and times of every teacher are compiled
+    once from the matches, so each candidate check is a few lookups.
+    """
     validation_issues = []
 
-    def can_teacher_take_class(
-        teacher: str,
-        teacher_info: TeacherModel,
-        class_info: ClassModel,
-        subclass: SubClassModel,
-        current_assignments: dict[str, dict[RoleType, list[str]]],
-    ) -> tuple[bool, Optional[str]]:
-        # Check if teacher can teach this subject and role
-        can_teach = any(
-            subject.subject == class_info.subject and subclass.role in subject.role
-            for subject in teacher_info.subject_he_know_how_to_teach
-        )
-        if not can_teach:
-            return False, "Cannot teach subject"
-
-        # Check time availability
-        subclass_times = subclass.times.dict(exclude_none=True)
-        teacher_times = teacher_info.available_times.dict(exclude_none=True)
-
-        for day, times in subclass_times.items():
-            if times:  # Check if times is not None
-                for time in times:
-                    if time not in teacher_times.get(day, []):
-                        return False, "Time conflict with availability"
-
-        # Check weekly hours
-        current_hours = sum(
-            len(sub.times.dict(exclude_none=True).get(day, []))
-            for c_name, c_assignments in current_assignments.items()
-            for r, assigned_teachers in c_assignments.items()
-            for sub in classes[c_name].subClasses
-            if sub.role == r
-            for day in sub.times.dict(exclude_none=True)
-            if teacher in assigned_teachers
-        )
-
-        class_hours = sum(len(times) for times in subclass_times.values() if times is not None)
-
-        if current_hours + class_hours > teacher_info.weekly_hours_max_work:
-            return False, "Exceeds weekly hours"
-
-        # Check for time conflicts with already assigned classes
-        for day, times in subclass_times.items():
-            if times:  # Check if times is not None
-                for time in times:
-                    for c_name, c_assignments in current_assignments.items():
-                        for r, assigned_teachers in c_assignments.items():
-                            if teacher in assigned_teachers:
-                                conflict_subclass = next(
-                                    s for s in classes[c_name].subClasses if s.role == r
-                                )
-                                conflict_times = conflict_subclass.times.dict(exclude_none=True)
-                                if day in conflict_times and time in conflict_times[day]:
-                                    return False, "Time conflict with other assignments"
-
-        return True, None
+    slot_masks = SlotMasks()
+    subclasses = {
+        (class_name, subclass.role): subclass
+        for class_name, class_info in classes.items()
+        for subclass in class_info.subClasses
+    }
+    booked_hours = dict.fromkeys(teachers, 0)
+    booked_slots = dict.fromkeys(teachers, 0)
+    for class_name, class_assignments in assignments.matches.items():
+        for role, assigned_teachers in class_assignments.items():
+            subclass = subclasses[(class_name, role)]
+            subclass_mask = slot_masks.mask(subclass.times)
+            subclass_hours = count_hours(subclass.times)
+            for teacher in assigned_teachers:
+                if teacher in teachers:
+                    booked_hours[teacher] += subclass_hours
+                    booked_slots[teacher] |= subclass_mask
+
+    available_slots = {
+        teacher: slot_masks.mask(teacher_info.available_times)
+        for teacher, teacher_info in teachers.items()
+    }
+    # (subject, role) -> teachers that know it, in the order of `teachers`
+    teachers_by_subject_role: dict[tuple[str, str], list[str]] = {}
+    for teacher, teacher_info in teachers.items():
+        for subject in teacher_info.subject_he_know_how_to_teach:
+            for role in subject.role:
+                subject_role_teachers = teachers_by_subject_role.setdefault(
+                    (subject.subject, role), []
+                )
+                if not subject_role_teachers or subject_role_teachers[-1] != teacher:
+                    subject_role_teachers.append(teacher)
+
+    def get_potential_teachers(
+        class_info: ClassModel, subclass: SubClassModel, assigned_teachers: list[str]
+    ) -> list[dict[str, Any]]:
+        subclass_mask = slot_masks.mask(subclass.times)
+        subclass_hours = count_hours(subclass.times)
+        return [
+            {
+                "teacher": teacher,
+                "current_hours": booked_hours[teacher],
+                "available_hours": teachers[teacher].weekly_hours_max_work - booked_hours[teacher],
+            }
+            for teacher in teachers_by_subject_role.get((class_info.subject, subclass.role), [])
+            if teacher not in assigned_teachers
+            # Available at every time of the subclass
+            and not subclass_mask & ~available_slots[teacher]
+            and booked_hours[teacher] + subclass_hours <= teachers[teacher].weekly_hours_max_work
+            # Not teaching another class at any of those times
+            and not subclass_mask & booked_slots[teacher]
+        ]
 
     # Check completely unassigned classes
     for class_name, role in assignments.unassigned:
         class_info = classes[class_name]
-        subclass = next(s for s in class_info.subClasses if s.role == role)
-
-        potential_teachers = []
-        for teacher, teacher_info in teachers.items():
-            can_teach, reason = can_teacher_take_class(
-                teacher, teacher_info, class_info, subclass, assignments.matches
-            )
-            if can_teach:
-                current_hours = sum(
-                    len(sub.times.dict(exclude_none=True).get(day, []))
-                    for c_name, c_assignments in assignments.matches.items()
-                    for r, assigned_teachers in c_assignments.items()
-                    for sub in classes[c_name].subClasses
-                    if sub.role == r
-                    for day in sub.times.dict(exclude_none=True)
-                    if teacher in assigned_teachers
-                )
-                potential_teachers.append(
-                    {
-                        "teacher": teacher,
-                        "current_hours": current_hours,
-                        "available_hours": teacher_info.weekly_hours_max_work - current_hours,
-                    }
-                )
+        subclass = subclasses[(class_name, role)]
+        potential_teachers = get_potential_teachers(class_info, subclass, [])
 
         if potential_teachers:
             validation_issues.append(
@@ -110,33 +93,11 @@ def validate_unassigned_classes(
         class_name = partial.class_name
         role = partial.role
         class_info = classes[class_name]
-        subclass = next(s for s in class_info.subClasses if s.role == role)
-        potential_teachers = []
-
-        for teacher, teacher_info in teachers.items():
-            if teacher in assignments.matches[class_name][role]:
-                continue  # Skip already assigned teachers
-
-            can_teach, reason = can_teacher_take_class(
-                teacher, teacher_info, class_info, subclass, assignments.matches
-            )
-            if can_teach:
-                current_hours = sum(
-                    len(sub.times.dict(exclude_none=True).get(day, []))
-                    for c_name, c_assignments in assignments.matches.items()
-                    for r, assigned_teachers in c_assignments.items()
-                    for sub in classes[c_name].subClasses
-                    if sub.role == r
-                    for day in sub.times.dict(exclude_none=True)
-                    if teacher in assigned_teachers
-                )
-                potential_teachers.append(
-                    {
-                        "teacher": teacher,
-                        "current_hours": current_hours,
-                        "available_hours": teacher_info.weekly_hours_max_work - current_hours,
-                    }
-                )
+        subclass = subclasses[(class_name, role)]
+        # Skip already assigned teachers
+        potential_teachers = get_potential_teachers(
+            class_info, subclass, assignments.matches[class_name][role]
+        )
 
         if potential_teachers:
             validation_issues.append(
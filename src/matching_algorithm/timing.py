@@ -0,0 +1,14 @@
+import time
+
+
+class PhaseTimer:
+    """Wall time of consecutive phases, each lap closes the phase that was running."""
+
+    def __init__(self) -> None:
+        self.times: dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.times[phase] = self.times.get(phase, 0.0) + now - self._last
+        self._last = now
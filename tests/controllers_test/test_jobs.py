@@ -0,0 +1,113 @@
+import json
+import random
+import time
+import unittest
+from typing import Callable
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.controllers.solver_pool import SolverPool
+from tests.controllers_test.test_solver_pool import request
+from tests.matching_algorithm_test.simulate_real_scenario import (
+    ClassesGenerator,
+    TeachersGenerator,
+    get_modules,
+)
+
+
+def long_request() -> dict:
+    """A request whose search runs until its time limit unless it is stopped."""
+    random.seed(0)
+    return {
+        "teachers": TeachersGenerator().create_teachers(60),
+        "classes": ClassesGenerator().create_classes(200),
+        "modules": [module.model_dump() for module in get_modules()],
+        "teacher_names_with_classes": [],
+        "preassigned": None,
+        # Deterministic, so the result could be cached
+        "solver_options": {"max_time_in_seconds": 60, "num_workers": 1, "random_seed": 0},
+    }
+
+
+class TestJobs(unittest.TestCase):
+    def setUp(self) -> None:
+        # A single solve at a time, so a second job waits in the queue
+        self.pool = SolverPool(max_concurrent_solves=1, max_queued_solves=2, retry_after=1)
+        patcher = patch("src.controllers.jobs.job_store.pool", self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.pool.shutdown)
+        self.client = TestClient(app)
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+    def wait_for(self, job_id: str, done: Callable[[dict], bool]) -> dict:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            job = self.client.get(f"/assignTeachers/jobs/{job_id}").json()
+            if done(job):
+                return job
+            time.sleep(0.1)
+        self.fail(f"Job {job_id} timed out")
+
+    def test_job_lifecycle(self) -> None:
+        cache_entries = self.client.get("/assignTeachers/cache/stats").json()["memory_entries"]
+        running = self.client.post("/assignTeachers/jobs", json=long_request())
+        self.assertEqual(running.status_code, 202)
+        running_id = running.json()["id"]
+        queued = self.client.post("/assignTeachers/jobs", json=request).json()
+        self.assertEqual(queued["status"], "queued")
+
+        running_job = self.wait_for(running_id, lambda job: job["status"] == "running")
+        self.assertIsNone(running_job["result"])
+        self.assertEqual(
+            self.client.get(f"/assignTeachers/jobs/{queued['id']}").json()["status"], "queued"
+        )
+
+        # A queued job is dropped
+        cancelled = self.client.delete(f"/assignTeachers/jobs/{queued['id']}").json()
+        self.assertEqual(cancelled["status"], "cancelled")
+        self.assertIsNone(cancelled["result"])
+
+        # A running one stops with the best solution so far
+        self.wait_for(running_id, lambda job: job["progress"] is not None)
+        self.assertEqual(
+            self.client.delete(f"/assignTeachers/jobs/{running_id}").json()["status"], "cancelled"
+        )
+        stopped = self.wait_for(running_id, lambda job: job["result"] is not None)
+        self.assertEqual(stopped["status"], "cancelled")
+        self.assertEqual(stopped["result"]["status"], "Feasible")
+        self.assertTrue(stopped["result"]["matches"])
+        # The stopped search isn't what the request solves to, it isn't cached
+        self.assertEqual(
+            self.client.get("/assignTeachers/cache/stats").json()["memory_entries"], cache_entries
+        )
+
+        done = self.client.post("/assignTeachers/jobs", json=request).json()
+        finished = self.wait_for(done["id"], lambda job: job["status"] in ("done", "failed"))
+        self.assertEqual(finished["status"], "done")
+        self.assertEqual(finished["result"]["matches"], {"class1": {"Teórico": ["teacher1"]}})
+
+        self.assertEqual(self.client.get("/assignTeachers/jobs/missing").status_code, 404)
+
+    def test_progress_stream(self) -> None:
+        job = self.client.post("/assignTeachers/jobs", json=request).json()
+        with self.client.stream("GET", f"/assignTeachers/jobs/{job['id']}/progress") as response:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+            lines = [json.loads(line) for line in response.iter_lines() if line]
+
+        self.assertTrue(lines)
+        *progress, last = lines
+        self.assertTrue(progress)
+        self.assertTrue(all(line["event"] == "progress" for line in progress))
+        self.assertEqual(progress[-1]["progress"]["assigned"], 1)
+        self.assertEqual(last["event"], "job")
+        self.assertEqual(last["job"]["status"], "done")
+        self.assertEqual(last["job"]["result"]["matches"], {"class1": {"Teórico": ["teacher1"]}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.controllers.DTO.in_models.assignment_request_model import AssignmentRequestModel
+from src.controllers.result_cache import (
+    ResultCache,
+    is_deterministic,
+    normalize_request,
+    request_key,
+)
+from src.matching_algorithm import Assignments, ConflictModel, SolverOptions
+
+request: dict = {
+    "teachers": {
+        "teacher1": {
+            "seniority": 2,
+            "subject_he_know_how_to_teach": [
+                {"subject": "Math", "role": ["Teórico", "Tecnología"]}
+            ],
+            "available_times": {"Monday": [9, 10], "Tuesday": [9]},
+            "weekly_hours_max_work": 10,
+        },
+        "José": {
+            "seniority": 1,
+            "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+            "available_times": {"Monday": [9, 10]},
+            "weekly_hours_max_work": 10,
+        },
+    },
+    "classes": {
+        "class1": {
+            "subject": "Math",
+            "subClasses": [
+                {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1},
+                {"role": "Tecnología", "times": {"Tuesday": [9]}, "num_teachers": 1},
+            ],
+        },
+    },
+    "modules": [{"id": 9, "time": "9:00 - 10:00", "turn": "test"}],
+    "teacher_names_with_classes": ["teacher1", "José"],
+    "preassigned": None,
+}
+
+# The same request with every dict and set-like list in another order and a name
+# written with a combining accent and a trailing space
+reordered_request: dict = {
+    "teachers": {
+        "Jose\u0301 ": request["teachers"]["José"],
+        "teacher1": {
+            **request["teachers"]["teacher1"],
+            "subject_he_know_how_to_teach": [
+                {"subject": "Math", "role": ["Tecnología", "Teórico"]}
+            ],
+            "available_times": {"Tuesday": [9], "Monday": [10, 9]},
+        },
+    },
+    "classes": {
+        "class1": {
+            "subject": "Math",
+            "subClasses": list(reversed(request["classes"]["class1"]["subClasses"])),
+        },
+    },
+    "modules": request["modules"],
+    "teacher_names_with_classes": ["Jose\u0301", "teacher1"],
+    "preassigned": None,
+}
+
+solver_options = SolverOptions(num_workers=1, random_seed=0)
+
+
+def key_of(data: dict, options: SolverOptions = solver_options) -> str:
+    return request_key(normalize_request(AssignmentRequestModel(**data)), options)
+
+
+def assignments_with_status(status: str) -> Assignments:
+    return Assignments(
+        matches={"class1": {"Teórico": ["teacher1"]}},
+        unassigned=[],
+        conflicts=ConflictModel(),
+        status=status,
+    )
+
+
+class TestRequestKey(unittest.TestCase):
+    def test_key_ignores_order_and_name_normalization(self) -> None:
+        self.assertEqual(key_of(request), key_of(reordered_request))
+
+    def test_key_depends_on_the_solver_options(self) -> None:
+        self.assertNotEqual(
+            key_of(request), key_of(request, SolverOptions(num_workers=1, random_seed=1))
+        )
+        self.assertEqual(
+            key_of(request),
+            key_of(request, solver_options.model_copy(update={"log_search_progress": True})),
+        )
+
+    def test_key_keeps_repeated_hours(self) -> None:
+        # The solver counts the repeated hour, so the subclass is longer
+        repeated_hour = {
+            **request,
+            "classes": {
+                "class1": {
+                    "subject": "Math",
+                    "subClasses": [
+                        {"role": "Teórico", "times": {"Monday": [9, 9, 10]}, "num_teachers": 1}
+                    ],
+                },
+            },
+        }
+        single_hour = {
+            **repeated_hour,
+            "classes": {
+                "class1": {
+                    "subject": "Math",
+                    "subClasses": [
+                        {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}
+                    ],
+                },
+            },
+        }
+        self.assertNotEqual(key_of(repeated_hour), key_of(single_hour))
+
+    def test_key_keeps_the_order_of_pre_assigned_teachers(self) -> None:
+        self.assertNotEqual(
+            key_of({**request, "preassigned": {"class1": {"Teórico": ["teacher1", "José"]}}}),
+            key_of({**request, "preassigned": {"class1": {"Teórico": ["José", "teacher1"]}}}),
+        )
+
+    def test_only_single_worker_seeded_solves_are_deterministic(self) -> None:
+        self.assertTrue(is_deterministic(solver_options))
+        self.assertFalse(is_deterministic(SolverOptions(num_workers=1)))
+        self.assertFalse(is_deterministic(SolverOptions(num_workers=8, random_seed=0)))
+
+
+class TestResultCache(unittest.TestCase):
+    def test_memory_is_a_lru(self) -> None:
+        cache = ResultCache(max_entries=2, ttl=60)
+        for key in ("a", "b"):
+            cache.put(key, assignments_with_status("Optimal"))
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", assignments_with_status("Optimal"))
+        # "b" is the least recently used
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        stats = cache.get_stats()
+        self.assertEqual((stats.memory_hits, stats.misses, stats.memory_entries), (3, 1, 2))
+
+    def test_entries_expire(self) -> None:
+        cache = ResultCache(max_entries=2, ttl=60)
+        with patch("src.controllers.result_cache.time.time", return_value=1000.0):
+            cache.put("a", assignments_with_status("Optimal"))
+        with patch("src.controllers.result_cache.time.time", return_value=1060.0):
+            self.assertIsNotNone(cache.get("a"))
+        with patch("src.controllers.result_cache.time.time", return_value=1061.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get_stats().memory_entries, 0)
+
+    def test_only_results_that_depend_on_the_problem_are_stored(self) -> None:
+        cache = ResultCache(max_entries=4, ttl=60)
+        for status in ("Optimal", "Infeasible", "Feasible", "Unknown", "Heuristic"):
+            cache.put(status, assignments_with_status(status))
+        self.assertEqual(list(cache.entries), ["Optimal", "Infeasible"])
+
+    def test_disk_tier_outlives_the_memory_tier(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            ResultCache(
+                max_entries=2, ttl=60, directory=Path(directory), max_disk_bytes=10**6
+            ).put("a", assignments_with_status("Optimal"))
+            cache = ResultCache(max_entries=2, ttl=60, directory=Path(directory))
+            self.assertEqual(cache.get("a"), assignments_with_status("Optimal"))
+            self.assertIsNotNone(cache.get("a"))
+            stats = cache.get_stats()
+            self.assertEqual((stats.disk_hits, stats.memory_hits, stats.disk_entries), (1, 1, 1))
+
+    def test_disk_tier_evicts_the_oldest_files(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(
+                max_entries=1, ttl=60, directory=Path(directory), max_disk_bytes=10**6
+            )
+            cache.put("a", assignments_with_status("Optimal"))
+            # Room for two results
+            cache.max_disk_bytes = 2 * (Path(directory) / "a.json").stat().st_size
+            cache.put("b", assignments_with_status("Optimal"))
+            now = time.time()
+            os.utime(Path(directory) / "a.json", (now - 20, now - 20))
+            os.utime(Path(directory) / "b.json", (now - 10, now - 10))
+            cache.put("c", assignments_with_status("Optimal"))
+            self.assertEqual(
+                sorted(path.stem for path in Path(directory).glob("*.json")), ["b", "c"]
+            )
+            # "a" is in neither tier anymore
+            self.assertIsNone(cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.controllers.solver_pool import SolverPool, SolverPoolFullError
+
+request: dict = {
+    "teachers": {
+        "teacher1": {
+            "seniority": 2,
+            "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+            "available_times": {"Monday": [9, 10]},
+            "weekly_hours_max_work": 10,
+        },
+    },
+    "classes": {
+        "class1": {
+            "subject": "Math",
+            "subClasses": [{"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}],
+        },
+    },
+    "modules": [{"id": 9, "time": "9:00 - 10:00", "turn": "test"}],
+    "teacher_names_with_classes": [],
+    "preassigned": None,
+}
+
+
+class TestSolverPool(unittest.TestCase):
+    def test_saturated_pool_rejects_with_retry_after(self) -> None:
+        # One running and one queued solve, both slots already taken
+        pool = SolverPool(max_concurrent_solves=1, max_queued_solves=1, retry_after=42)
+        pool.pending = 2
+        with (
+            patch("src.controllers.matching_algorithm.solver_pool", pool),
+            patch("src.controllers.jobs.job_store.pool", pool),
+            TestClient(app) as client,
+        ):
+            for path in ("/assignTeachers/", "/assignTeachers/jobs"):
+                response = client.post(path, json=request)
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response.headers["Retry-After"], "42")
+        self.assertEqual(pool.pending, 2)
+
+    def test_solves_once_the_pool_has_room(self) -> None:
+        pool = SolverPool(max_concurrent_solves=1, max_queued_solves=0, retry_after=42)
+        with (
+            patch("src.controllers.matching_algorithm.solver_pool", pool),
+            TestClient(app) as client,
+        ):
+            response = client.post("/assignTeachers/", json=request)
+            pool.shutdown()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["matches"], {"class1": {"Teórico": ["teacher1"]}})
+        self.assertEqual(pool.pending, 0)
+
+    def test_cancelled_solve_keeps_its_slot_until_the_worker_returns(self) -> None:
+        pool = SolverPool(max_concurrent_solves=1, max_queued_solves=0, retry_after=42)
+
+        async def cancel_running_solve() -> tuple[int, float]:
+            start_time = time.time()
+            future = pool.submit(time.sleep, 2)
+            # Long enough for the work to be handed to the process
+            await asyncio.sleep(0.5)
+            future.cancel()
+            pending_after_cancel = pool.pending
+            with self.assertRaises(SolverPoolFullError):
+                pool.submit(time.sleep, 0)
+            while pool.pending > 0 and time.time() - start_time < 60:
+                await asyncio.sleep(0.05)
+            return pending_after_cancel, time.time() - start_time
+
+        try:
+            pending_after_cancel, released_after = asyncio.run(cancel_running_solve())
+        finally:
+            pool.shutdown()
+        self.assertEqual(pending_after_cancel, 1)
+        self.assertEqual(pool.pending, 0)
+        # Released when the worker returned, not when the future was cancelled
+        self.assertGreaterEqual(released_after, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
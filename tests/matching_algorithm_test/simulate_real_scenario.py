@@ -7,7 +7,9 @@ from pathlib import Path
 root_folder = Path(__file__, "../../..").resolve()
 sys.path.append(str(root_folder))
 
+from src.matching_algorithm import Assignments, ClassModel, SolverOptions, TeacherModel
 from src.matching_algorithm.matching_algorithm import Module, solve_timetable
+from src.matching_algorithm.model_template import clear_model_templates
 from src.matching_algorithm.quality_assurance import (
     are_conflicts,
     check_solution,
@@ -175,6 +177,37 @@ class ClassesGenerator:
         return classes
 
 
+# Time to get a good solution (within 0.01% of the bound) after a small edit (one class
+# removed), without and with the previous result as a hint
+def benchmark_warm_start(
+    teachers: dict[str, TeacherModel],
+    classes: dict[str, ClassModel],
+    modules: list[Module],
+    assignments: Assignments,
+    time_limit: float = 10.0,
+) -> None:
+    edited_classes = dict(list(classes.items())[1:])
+    # Without the greedy hint, the previous matches are the only difference between the runs
+    solver_options = SolverOptions(
+        max_time_in_seconds=time_limit, relative_gap_limit=0.0001, greedy_hint=False
+    )
+    for label, previous_matches in [("cold", None), ("warm start", assignments.matches)]:
+        # Both runs build their model from scratch
+        clear_model_templates()
+        start_time = time.time()
+        resolved = solve_timetable(
+            teachers,
+            edited_classes,
+            modules,
+            solver_options=solver_options,
+            previous_matches=previous_matches,
+        )
+        print(
+            f"Re-solve ({label}): {time.time() - start_time:.2f} seconds, "
+            f"status {resolved.status}, gap {resolved.gap}"
+        )
+
+
 if __name__ == "__main__":
     # Create 60 teachers
     teachers_generator = TeachersGenerator()
@@ -200,7 +233,7 @@ if __name__ == "__main__":
     print("unassigned: ", assignments.unassigned)
     print(f"Algorithm duration: {algorithm_duration} seconds")
     assert not are_conflicts(
-        assignments.matches, teachers, classes
+        assignments.matches, teachers, classes, modules
     ), "Error, there are conflicts in the timetable"
     issues = diagnose_infeasibility(teachers, classes)
     for issue in issues:
@@ -208,6 +241,8 @@ if __name__ == "__main__":
 
     check_solution(teachers, classes, assignments)
 
+    benchmark_warm_start(teachers, classes, modules, assignments)
+
     results_path = root_folder / "json_input_tests"
     results_path.mkdir(exist_ok=True)
     teachers_dict = {name: teacher.dict() for name, teacher in teachers.items()}
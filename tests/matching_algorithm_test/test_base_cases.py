@@ -1,4 +1,5 @@
 import sys
+import threading
 import unittest
 from pathlib import Path
 from typing import Optional
@@ -6,10 +7,19 @@ from typing import Optional
 root_folder = Path(__file__, "../../..").resolve()
 sys.path.append(str(root_folder))
 
-from src.matching_algorithm import ConflictModel, Module, solve_timetable
+from src.matching_algorithm import (
+    ConflictModel,
+    Module,
+    SolveProgress,
+    SolverOptions,
+    solve_timetable,
+)
 from src.matching_algorithm.models import PartiallyUnassignedConflict
 from src.matching_algorithm.quality_assurance import are_conflicts
-from tests.matching_algorithm_test.util import convert_teachers_and_classes_dict_to_model
+from tests.matching_algorithm_test.util import (
+    convert_teachers_and_classes_dict_to_model,
+    teacher_dict,
+)
 
 
 class TestSolveTimetable(unittest.TestCase):
@@ -537,6 +547,33 @@ class TestSolveTimetable(unittest.TestCase):
         self.assertEqual(assignments.conflicts.teacher_without_any_classes, ["teacher1"])
         self.check_no_conflicts(assignments.conflicts, ["teacher_without_any_classes"])
 
+    def test_select_seniority_over_group_with_a_member_that_can_not_teach(self) -> None:
+        monday: dict = {"Monday": [9, 10, 11]}
+        teachers_dict = {
+            "teacher1": teacher_dict("Arq1", monday, group_with=["teacher2", "teacher3"]),
+            "teacher2": teacher_dict("Arq1", monday, group_with=["teacher1", "teacher3"]),
+            # Not available on Monday, the group can never be complete
+            "teacher3": teacher_dict(
+                "Arq1", {"Tuesday": [9, 10, 11]}, group_with=["teacher1", "teacher2"]
+            ),
+            "teacher4": teacher_dict("Arq1", monday, seniority=8),
+        }
+        classes_dict = {
+            "class1": {
+                "subject": "Arq1",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 2},
+                ],
+            },
+        }
+        teachers, classes = convert_teachers_and_classes_dict_to_model(teachers_dict, classes_dict)
+        modules = self.get_modules()
+        for mode in ("weighted", "fast"):
+            assignments = solve_timetable(teachers, classes, modules, mode=mode)
+            self.assertIn("teacher4", assignments.matches["class1"]["Teórico"])
+            self.assertFalse(are_conflicts(assignments.matches, teachers, classes))
+            self.assertEqual(assignments.unassigned, [])
+
     def test_constrains_teacher_can_be_assigned_at_most_once_to_each_subclass(self) -> None:
         teachers_dict = {
             "teacher1": {
@@ -1040,6 +1077,285 @@ class TestSolveTimetable(unittest.TestCase):
         self.assertEqual(assignments.unassigned, [])
         self.check_no_conflicts(assignments.conflicts)
 
+    def test_lexicographic_mode_select_group_over_seniority(self) -> None:
+        group_teacher = {
+            "seniority": 1,
+            "subject_he_know_how_to_teach": [{"subject": "Arq1", "role": ["Teórico"]}],
+            "available_times": {"Monday": [9, 10, 11]},
+            "weekly_hours_max_work": 10,
+        }
+        teachers_dict = {
+            "teacher1": {
+                **group_teacher,
+                "groups": [
+                    {
+                        "my_role": ["Teórico"],
+                        "subject": "Arq1",
+                        "other_teacher": [{"teacher": "teacher2", "role": ["Teórico"]}],
+                    }
+                ],
+            },
+            "teacher2": {
+                **group_teacher,
+                "groups": [
+                    {
+                        "my_role": ["Teórico"],
+                        "subject": "Arq1",
+                        "other_teacher": [{"teacher": "teacher1", "role": ["Teórico"]}],
+                    }
+                ],
+            },
+            "teacher3": {**group_teacher, "seniority": 8},
+        }
+        classes_dict = {
+            "class1": {
+                "subject": "Arq1",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 2},
+                ],
+            },
+        }
+
+        teachers, classes = convert_teachers_and_classes_dict_to_model(teachers_dict, classes_dict)
+        modules = self.get_modules()
+        assignments = solve_timetable(teachers, classes, modules, mode="lexicographic")
+        self.assertEqual(assignments.matches, {"class1": {"Teórico": ["teacher1", "teacher2"]}})
+        self.assertEqual(assignments.status, "Optimal")
+        self.assertEqual(assignments.objective_stage, "seniority_preference")
+        self.assertEqual(assignments.conflicts.teacher_without_any_classes, ["teacher3"])
+
+    def test_lexicographic_mode_keeps_pre_assignments(self) -> None:
+        teachers_dict = {
+            "teacher1": {
+                "seniority": 2,
+                "subject_he_know_how_to_teach": [{"subject": "Arq1", "role": ["Teórico"]}],
+                "available_times": {"Monday": [9, 10]},
+                "weekly_hours_max_work": 10,
+            },
+            "teacher2": {
+                "seniority": 1,
+                "subject_he_know_how_to_teach": [{"subject": "Arq1", "role": ["Teórico"]}],
+                "available_times": {"Monday": [9, 10]},
+                "weekly_hours_max_work": 10,
+            },
+        }
+        classes_dict = {
+            "class1": {
+                "subject": "Arq1",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}
+                ],
+            },
+        }
+        pre_assignments = {"class1": {"Teórico": ["teacher2"]}}
+        teachers, classes = convert_teachers_and_classes_dict_to_model(teachers_dict, classes_dict)
+        modules = self.get_modules()
+        assignments = solve_timetable(
+            teachers, classes, modules, pre_assignments=pre_assignments, mode="lexicographic"
+        )
+        self.assertEqual(assignments.matches, {"class1": {"Teórico": ["teacher2"]}})
+        self.assertEqual(assignments.conflicts.teacher_without_any_classes, ["teacher1"])
+
+    def test_lexicographic_mode_stopped_early_is_not_optimal(self) -> None:
+        teachers_dict = {
+            "teacher1": {
+                "seniority": 2,
+                "subject_he_know_how_to_teach": [{"subject": "Arq1", "role": ["Teórico"]}],
+                "available_times": {"Monday": [9, 10]},
+                "weekly_hours_max_work": 10,
+            },
+        }
+        classes_dict = {
+            "class1": {
+                "subject": "Arq1",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}
+                ],
+            },
+        }
+        teachers, classes = convert_teachers_and_classes_dict_to_model(teachers_dict, classes_dict)
+        stop_event = threading.Event()
+        stop_event.set()
+        assignments = solve_timetable(
+            teachers, classes, self.get_modules(), mode="lexicographic", stop_event=stop_event
+        )
+        # Only the first stage solved runs, the later ones are never proven
+        self.assertEqual(assignments.status, "Feasible")
+        self.assertNotEqual(assignments.objective_stage, "seniority_preference")
+        self.assertEqual(assignments.matches, {"class1": {"Teórico": ["teacher1"]}})
+
+    def test_lexicographic_mode_keeps_greedy_solution_of_skipped_stage(self) -> None:
+        teachers_dict = {
+            "teacher1": {
+                "seniority": 2,
+                "subject_he_know_how_to_teach": [{"subject": "Arq1", "role": ["Teórico"]}],
+                "available_times": {"Monday": [9, 10]},
+                "weekly_hours_max_work": 10,
+            },
+        }
+        classes_dict = {
+            "class1": {
+                "subject": "Arq1",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}
+                ],
+            },
+        }
+        teachers, classes = convert_teachers_and_classes_dict_to_model(teachers_dict, classes_dict)
+        # The greedy timetable reaches the bound of total_assigned, so that stage is
+        # skipped, and the next one has no time to find a solution
+        solver_options = SolverOptions(stage_time_limits={"partial_assignment": 1e-9})
+        assignments = solve_timetable(
+            teachers,
+            classes,
+            self.get_modules(),
+            mode="lexicographic",
+            solver_options=solver_options,
+        )
+        self.assertEqual(assignments.status, "Feasible")
+        self.assertEqual(assignments.objective_stage, "total_assigned")
+        self.assertEqual(assignments.matches, {"class1": {"Teórico": ["teacher1"]}})
+
+    def test_solver_options_and_search_stats(self) -> None:
+        teachers_dict = {
+            "teacher1": {
+                "seniority": 2,
+                "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+                "available_times": {"Monday": [9, 10]},
+                "weekly_hours_max_work": 10,
+            }
+        }
+        classes_dict = {
+            "class1": {
+                "subject": "Math",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}
+                ],
+            },
+        }
+        teachers, classes = convert_teachers_and_classes_dict_to_model(teachers_dict, classes_dict)
+        modules = self.get_modules()
+        solver_options = SolverOptions(max_time_in_seconds=10, num_workers=1, random_seed=1)
+        assignments = solve_timetable(teachers, classes, modules, solver_options=solver_options)
+        self.assertEqual(assignments.matches, {"class1": {"Teórico": ["teacher1"]}})
+        self.assertEqual(assignments.status, "Optimal")
+        self.assertIsNotNone(assignments.wall_time)
+        self.assertEqual(assignments.gap, 0)
+        self.assertEqual(assignments.best_bound, 1000000 + 10000 + 2)
+
+    def test_progress_reports_improving_solutions(self) -> None:
+        teachers_dict = {
+            "teacher1": {
+                "seniority": 2,
+                "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+                "available_times": {"Monday": [9, 10]},
+                "weekly_hours_max_work": 10,
+            }
+        }
+        classes_dict = {
+            "class1": {
+                "subject": "Math",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 2}
+                ],
+            },
+        }
+        teachers, classes = convert_teachers_and_classes_dict_to_model(teachers_dict, classes_dict)
+        modules = self.get_modules()
+        progress: list[SolveProgress] = []
+        assignments = solve_timetable(
+            teachers,
+            classes,
+            modules,
+            mode="lexicographic",
+            on_progress=progress.append,
+            progress_matches=True,
+        )
+        self.assertEqual(assignments.status, "Optimal")
+        self.assertTrue(progress)
+        last = progress[-1]
+        self.assertEqual(last.objective_stage, "seniority_preference")
+        self.assertEqual(last.objective, 2)
+        self.assertEqual(last.gap, 0)
+        self.assertEqual((last.assigned, last.partially_assigned), (0, 1))
+        self.assertEqual(last.matches, assignments.matches)
+
+    def test_diagnostics_report_phases_and_model_size(self) -> None:
+        teachers_dict = {
+            "teacher1": {
+                "seniority": 2,
+                "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+                "available_times": {"Monday": [9, 10]},
+                "weekly_hours_max_work": 10,
+            }
+        }
+        classes_dict = {
+            "class1": {
+                "subject": "Math",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}
+                ],
+            },
+        }
+        teachers, classes = convert_teachers_and_classes_dict_to_model(teachers_dict, classes_dict)
+        modules = self.get_modules()
+        self.assertIsNone(solve_timetable(teachers, classes, modules).diagnostics)
+
+        assignments = solve_timetable(
+            teachers, classes, modules, solver_options=SolverOptions(diagnostics=True)
+        )
+        diagnostics = assignments.diagnostics
+        assert diagnostics is not None
+        self.assertTrue(diagnostics.model_reused)
+        self.assertEqual(
+            list(diagnostics.build_times),
+            [
+                "eligibility",
+                "variables",
+                "coverage_constraints",
+                "overlap_constraints",
+                "weekly_hours_constraints",
+                "group_constraints",
+                "objectives",
+                "coverage_bound",
+            ],
+        )
+        self.assertEqual(
+            list(diagnostics.phase_times),
+            ["model_template", "request_constraints", "solve", "extraction"],
+        )
+        # The assignment, is_assigned and has_any_class variables
+        self.assertEqual(diagnostics.num_variables, 3)
+        self.assertGreater(diagnostics.num_constraints, 0)
+        self.assertIn("CpSolverResponse", diagnostics.response_stats)
+
+    def test_previous_matches_hint_ignores_unknown_teachers_and_classes(self) -> None:
+        teachers_dict = {
+            "teacher1": {
+                "seniority": 2,
+                "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+                "available_times": {"Monday": [9, 10]},
+                "weekly_hours_max_work": 10,
+            }
+        }
+        classes_dict = {
+            "class1": {
+                "subject": "Math",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}
+                ],
+            },
+        }
+        previous_matches = {
+            "class1": {"Teórico": ["teacher1", "removed_teacher"]},
+            "removed_class": {"Teórico": ["teacher1"]},
+        }
+        teachers, classes = convert_teachers_and_classes_dict_to_model(teachers_dict, classes_dict)
+        modules = self.get_modules()
+        assignments = solve_timetable(teachers, classes, modules, previous_matches=previous_matches)
+        self.assertEqual(assignments.matches, {"class1": {"Teórico": ["teacher1"]}})
+        self.assertEqual(assignments.status, "Optimal")
+
 
 if __name__ == "__main__":
     unittest.main()
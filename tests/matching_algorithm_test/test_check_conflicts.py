@@ -1,7 +1,7 @@
 import unittest
 
-from src.matching_algorithm.models import RoleType
-from src.matching_algorithm.quality_assurance import are_conflicts
+from src.matching_algorithm.models import Module, RoleType
+from src.matching_algorithm.quality_assurance import Violation, are_conflicts
 from tests.matching_algorithm_test.util import convert_teachers_and_classes_dict_to_model
 
 
@@ -39,6 +39,10 @@ class TestCheckConflicts(unittest.TestCase):
         self.teachers["teacher1"]["subject_he_know_how_to_teach"] = []
         teachers, classes = convert_teachers_and_classes_dict_to_model(self.teachers, self.classes)
         self.assertTrue(are_conflicts(self.assignment, teachers, classes))
+        self.assertEqual(
+            are_conflicts(self.assignment, teachers, classes),
+            [Violation("teacher_cannot_teach_class", "teacher1", "class1", "Teórico")],
+        )
 
     def test_teacher_cannot_teach_class_because_of_role(self) -> None:
         self.teachers["teacher1"]["subject_he_know_how_to_teach"][0]["role"] = ["Tecnología"]  # type: ignore
@@ -49,11 +53,70 @@ class TestCheckConflicts(unittest.TestCase):
         self.teachers["teacher1"]["weekly_hours_max_work"] = 1
         teachers, classes = convert_teachers_and_classes_dict_to_model(self.teachers, self.classes)
         self.assertTrue(are_conflicts(self.assignment, teachers, classes))
+        self.assertEqual(
+            are_conflicts(self.assignment, teachers, classes),
+            [Violation("teacher_has_more_than_weekly_hours", "teacher1")],
+        )
+
+    def test_teacher_cannot_teach_class_because_of_availability(self) -> None:
+        self.teachers["teacher1"]["available_times"] = {"Monday": [9]}
+        teachers, classes = convert_teachers_and_classes_dict_to_model(self.teachers, self.classes)
+        self.assertEqual(
+            are_conflicts(self.assignment, teachers, classes),
+            [Violation("teacher_cannot_teach_class", "teacher1", "class1", "Teórico")],
+        )
+
+    def test_unknown_teacher_cannot_teach_class(self) -> None:
+        self.assignment["class1"]["Teórico"].append("teacher2")
+        teachers, classes = convert_teachers_and_classes_dict_to_model(self.teachers, self.classes)
+        self.assertEqual(
+            are_conflicts(self.assignment, teachers, classes),
+            [Violation("teacher_cannot_teach_class", "teacher2", "class1", "Teórico")],
+        )
 
     def test_teacher_teach_more_than_one_class_at_same_time(self) -> None:
         self.assignment["class2"] = {"Teórico": ["teacher1"]}
         teachers, classes = convert_teachers_and_classes_dict_to_model(self.teachers, self.classes)
         self.assertTrue(are_conflicts(self.assignment, teachers, classes))
+        self.assertEqual(
+            are_conflicts(self.assignment, teachers, classes),
+            [
+                Violation(
+                    "teacher_teach_more_than_one_class_at_same_time",
+                    "teacher1",
+                    "class2",
+                    "Teórico",
+                )
+            ],
+        )
+
+    def test_only_times_in_the_modules_overlap(self) -> None:
+        # class1 and class2 only share Monday at 9, which isn't one of the modules
+        self.assignment["class2"] = {"Teórico": ["teacher1"]}
+        teachers, classes = convert_teachers_and_classes_dict_to_model(self.teachers, self.classes)
+        modules = [Module(id=10, time="10:00 - 11:00", turn="test")]
+        self.assertEqual(are_conflicts(self.assignment, teachers, classes, modules), [])
+        self.assertTrue(are_conflicts(self.assignment, teachers, classes))
+
+    def test_all_violations_are_reported(self) -> None:
+        self.teachers["teacher1"]["weekly_hours_max_work"] = 2
+        self.teachers["teacher1"]["available_times"] = {"Tuesday": [9, 10]}
+        self.assignment["class2"] = {"Teórico": ["teacher1"]}
+        teachers, classes = convert_teachers_and_classes_dict_to_model(self.teachers, self.classes)
+        self.assertEqual(
+            are_conflicts(self.assignment, teachers, classes),
+            [
+                Violation("teacher_cannot_teach_class", "teacher1", "class1", "Teórico"),
+                Violation("teacher_cannot_teach_class", "teacher1", "class2", "Teórico"),
+                Violation(
+                    "teacher_teach_more_than_one_class_at_same_time",
+                    "teacher1",
+                    "class2",
+                    "Teórico",
+                ),
+                Violation("teacher_has_more_than_weekly_hours", "teacher1"),
+            ],
+        )
 
 
 if __name__ == "__main__":
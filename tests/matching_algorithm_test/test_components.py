@@ -0,0 +1,127 @@
+import unittest
+
+from src.matching_algorithm import Module, SolverOptions, solve_timetable
+from src.matching_algorithm.components import find_components, pack_components
+from src.matching_algorithm.eligibility import get_eligible_teachers
+from tests.matching_algorithm_test.util import convert_teachers_and_classes_dict_to_model
+
+teachers: dict = {
+    "teacher1": {
+        "seniority": 5,
+        "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+        "available_times": {"Monday": [9, 10]},
+        "weekly_hours_max_work": 10,
+    },
+    "teacher2": {
+        "seniority": 1,
+        "subject_he_know_how_to_teach": [{"subject": "Science", "role": ["Teórico"]}],
+        "available_times": {"Monday": [9, 10]},
+        "weekly_hours_max_work": 10,
+    },
+    "teacher3": {
+        "seniority": 3,
+        "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+        "available_times": {"Monday": [9, 10]},
+        "weekly_hours_max_work": 10,
+    },
+    "teacher4": {
+        "seniority": 1,
+        "subject_he_know_how_to_teach": [{"subject": "History", "role": ["Teórico"]}],
+        "available_times": {"Friday": [9, 10]},
+        "weekly_hours_max_work": 10,
+    },
+}
+
+classes: dict = {
+    "class1": {
+        "subject": "Math",
+        "subClasses": [{"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 2}],
+    },
+    "class2": {
+        "subject": "Science",
+        "subClasses": [{"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}],
+    },
+    "class3": {
+        "subject": "Art",
+        "subClasses": [{"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}],
+    },
+    "class4": {
+        "subject": "Math",
+        "subClasses": [{"role": "Teórico", "times": {"Tuesday": [9]}, "num_teachers": 1}],
+    },
+}
+
+
+class TestComponents(unittest.TestCase):
+    def setUp(self) -> None:
+        self.teachers, self.classes = convert_teachers_and_classes_dict_to_model(teachers, classes)
+        self.modules = [Module(id=i, time=f"{i}:00 - {i+1}:00", turn="test") for i in range(24)]
+
+    def test_find_components(self) -> None:
+        components = find_components(
+            self.teachers, self.classes, get_eligible_teachers(self.teachers, self.classes), {}
+        )
+        self.assertEqual(
+            [(component.teacher_names, component.subclass_keys) for component in components],
+            [
+                (["teacher1", "teacher3"], [("class1", "Teórico")]),
+                (["teacher2"], [("class2", "Teórico")]),
+                (["teacher4"], []),
+                ([], [("class3", "Teórico")]),
+                ([], [("class4", "Teórico")]),
+            ],
+        )
+        self.assertEqual([component.num_pairs for component in components], [2, 1, 0, 0, 0])
+
+    def test_pre_assignments_join_components(self) -> None:
+        components = find_components(
+            self.teachers,
+            self.classes,
+            get_eligible_teachers(self.teachers, self.classes),
+            {"class2": {"Teórico": ["teacher4"]}},
+        )
+        self.assertEqual(
+            components[1].teacher_names,
+            ["teacher2", "teacher4"],
+        )
+
+    def test_pack_components(self) -> None:
+        components = find_components(
+            self.teachers, self.classes, get_eligible_teachers(self.teachers, self.classes), {}
+        )
+        parts = pack_components(components, 2)
+        self.assertEqual([part.num_pairs for part in parts], [2, 1])
+        self.assertEqual(
+            sorted(key for part in parts for key in part.subclass_keys),
+            sorted(key for component in components for key in component.subclass_keys),
+        )
+
+    def test_parallel_solve_matches_single_model(self) -> None:
+        single = solve_timetable(self.teachers, self.classes, self.modules)
+        parallel = solve_timetable(
+            self.teachers,
+            self.classes,
+            self.modules,
+            solver_options=SolverOptions(num_processes=2, num_workers=2),
+        )
+        self.assertEqual(parallel.matches, single.matches)
+        self.assertEqual(parallel.unassigned, single.unassigned)
+        self.assertEqual(parallel.conflicts, single.conflicts)
+        self.assertEqual(parallel.status, "Optimal")
+        self.assertEqual(parallel.best_bound, single.best_bound)
+
+    def test_parallel_solve_infeasible_part(self) -> None:
+        assignments = solve_timetable(
+            self.teachers,
+            self.classes,
+            self.modules,
+            pre_assignments={"class2": {"Teórico": ["teacher4"]}},
+            solver_options=SolverOptions(num_processes=2),
+        )
+        self.assertEqual(assignments.status, "Infeasible")
+        self.assertEqual(assignments.matches, {})
+        self.assertEqual(len(assignments.unassigned), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
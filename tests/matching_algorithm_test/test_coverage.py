@@ -0,0 +1,86 @@
+import unittest
+
+from src.matching_algorithm import Module, SolverOptions, solve_timetable
+from src.matching_algorithm.coverage import greedy_assignments
+from src.matching_algorithm.model_template import build_model_template
+from tests.matching_algorithm_test.util import (
+    class_dict,
+    convert_teachers_and_classes_dict_to_model,
+    teacher_dict,
+)
+
+available_times: dict = {"Monday": [9, 10], "Tuesday": [9, 10], "Wednesday": [9, 10]}
+
+# class1 and class2 share Monday at 10, a teacher can only take one of them
+classes: dict = {
+    "class1": class_dict("Math", {"Monday": [9, 10]}),
+    "class2": class_dict("Math", {"Monday": [10]}),
+    "class3": class_dict("Math", {"Tuesday": [9, 10]}),
+    "class4": class_dict("Math", {"Wednesday": [9, 10]}),
+}
+
+
+class TestCoverage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modules = [Module(id=i, time=f"{i}:00 - {i+1}:00", turn="test") for i in range(24)]
+
+    def coverage_bound(self, weekly_hours_max_work: int) -> int:
+        teachers, classes_model = convert_teachers_and_classes_dict_to_model(
+            {
+                "teacher1": teacher_dict(
+                    "Math", available_times, weekly_hours_max_work=weekly_hours_max_work
+                )
+            },
+            classes,
+        )
+        return build_model_template(teachers, classes_model, self.modules).coverage_bound
+
+    def test_bound_counts_the_subclasses_that_fit_in_the_weekly_hours(self) -> None:
+        # class2 and one of the two hour classes
+        self.assertEqual(self.coverage_bound(4), 2)
+
+    def test_bound_counts_subclasses_sharing_a_slot_once(self) -> None:
+        self.assertEqual(self.coverage_bound(10), 3)
+
+    def test_greedy_keeps_fixed_assignments(self) -> None:
+        teachers, classes_model = convert_teachers_and_classes_dict_to_model(
+            {
+                "teacher1": teacher_dict("Math", available_times, weekly_hours_max_work=10),
+                "teacher2": teacher_dict("Math", available_times, weekly_hours_max_work=10),
+            },
+            classes,
+        )
+        template = build_model_template(teachers, classes_model, self.modules)
+        greedy = greedy_assignments(
+            teachers,
+            classes_model,
+            template.eligible_teachers,
+            template.subclass_hours,
+            {("teacher2", "class3", "Teórico"): True, ("teacher1", "class2", "Teórico"): False},
+        )
+        self.assertIn(("teacher2", "class3", "Teórico"), greedy.assignments)
+        self.assertIn(("teacher2", "class2", "Teórico"), greedy.assignments)
+        self.assertNotIn(("teacher1", "class2", "Teórico"), greedy.assignments)
+        self.assertEqual(greedy.num_fully_assigned, 4)
+        self.assertEqual(template.total_assigned_bound, 4)
+
+    def test_solve_reports_the_coverage_bound(self) -> None:
+        teachers, classes_model = convert_teachers_and_classes_dict_to_model(
+            {"teacher1": teacher_dict("Math", available_times, weekly_hours_max_work=10)}, classes
+        )
+        for mode in ("weighted", "lexicographic"):
+            for greedy_hint in (True, False):
+                assignments = solve_timetable(
+                    teachers,
+                    classes_model,
+                    self.modules,
+                    solver_options=SolverOptions(greedy_hint=greedy_hint),
+                    mode=mode,
+                )
+                self.assertEqual(assignments.status, "Optimal")
+                self.assertEqual(assignments.coverage_bound, 3)
+                self.assertEqual(len(assignments.unassigned), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from src.matching_algorithm.eligibility import build_eligibility_matrix
+from tests.matching_algorithm_test.util import convert_teachers_and_classes_dict_to_model
+
+
+class TestEligibilityMatrix(unittest.TestCase):
+    def setUp(self) -> None:
+        self.teachers = {
+            "teacher1": {
+                "seniority": 2,
+                "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+                "available_times": {"Monday": [9, 10], "Tuesday": [9]},
+                "weekly_hours_max_work": 10,
+            },
+            "teacher2": {
+                "seniority": 2,
+                "subject_he_know_how_to_teach": [
+                    {"subject": "Math", "role": ["Teórico", "Tecnología"]}
+                ],
+                "available_times": {"Monday": [9]},
+                "weekly_hours_max_work": 10,
+            },
+        }
+        self.classes = {
+            "class1": {
+                "subject": "Math",
+                "subClasses": [
+                    {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1},
+                    {"role": "Tecnología", "times": {"Monday": [9]}, "num_teachers": 1},
+                ],
+            },
+            "class2": {
+                "subject": "Science",
+                "subClasses": [{"role": "Teórico", "times": {"Tuesday": [9]}, "num_teachers": 1}],
+            },
+        }
+
+    def test_eligible_teachers(self) -> None:
+        teachers, classes = convert_teachers_and_classes_dict_to_model(self.teachers, self.classes)
+        eligibility = build_eligibility_matrix(teachers, classes)
+        self.assertEqual(
+            eligibility.eligible_teachers(),
+            {
+                ("class1", "Teórico"): ["teacher1"],
+                ("class1", "Tecnología"): ["teacher2"],
+                ("class2", "Teórico"): [],
+            },
+        )
+
+    def test_knows_subject_ignores_availability(self) -> None:
+        teachers, classes = convert_teachers_and_classes_dict_to_model(self.teachers, self.classes)
+        eligibility = build_eligibility_matrix(teachers, classes)
+        self.assertEqual(
+            eligibility.knows_subject.tolist(), [[True, True], [False, True], [False, False]]
+        )
+
+    def test_no_teachers(self) -> None:
+        teachers, classes = convert_teachers_and_classes_dict_to_model({}, self.classes)
+        eligibility = build_eligibility_matrix(teachers, classes)
+        self.assertEqual(eligibility.eligible.shape, (3, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+
+from src.matching_algorithm import Module, solve_timetable
+from src.matching_algorithm.quality_assurance import Cause, Explanation, explain_unassigned
+from tests.matching_algorithm_test.util import convert_teachers_and_classes_dict_to_model
+
+teachers: dict = {
+    "teacher1": {
+        "seniority": 2,
+        "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+        "available_times": {"Monday": [9, 10], "Tuesday": [9, 10]},
+        "weekly_hours_max_work": 3,
+    },
+    "teacher2": {
+        "seniority": 2,
+        "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+        "available_times": {"Friday": [9, 10]},
+        "weekly_hours_max_work": 10,
+    },
+}
+
+classes: dict = {
+    "class1": {
+        "subject": "Math",
+        "subClasses": [{"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}],
+    },
+    "class2": {
+        "subject": "Math",
+        "subClasses": [{"role": "Teórico", "times": {"Tuesday": [9, 10]}, "num_teachers": 1}],
+    },
+    "class3": {
+        "subject": "Math",
+        "subClasses": [{"role": "Teórico", "times": {"Tuesday": [9, 10]}, "num_teachers": 3}],
+    },
+}
+
+
+class TestExplainUnassigned(unittest.TestCase):
+    def setUp(self) -> None:
+        self.teachers, self.classes = convert_teachers_and_classes_dict_to_model(teachers, classes)
+        self.modules = [Module(id=i, time=f"{i}:00 - {i+1}:00", turn="test") for i in range(24)]
+
+    def test_explains_weekly_hours_and_availability(self) -> None:
+        teachers_model, classes_model = convert_teachers_and_classes_dict_to_model(
+            teachers, {"class1": classes["class1"], "class2": classes["class2"]}
+        )
+        assignments = solve_timetable(teachers_model, classes_model, self.modules)
+        # teacher1 only has hours for one of the classes
+        self.assertEqual(len(assignments.unassigned), 1)
+        class_name, role = assignments.unassigned[0]
+        assigned_class_name = "class2" if class_name == "class1" else "class1"
+        explanations = explain_unassigned(
+            teachers_model, classes_model, self.modules, assignments, minimize=True
+        )
+        self.assertEqual(len(explanations), 1)
+        self.assertEqual(explanations[0].status, "blocked")
+        # teacher1 would go over their hours unless the other class loses them,
+        # teacher2 isn't available on Monday nor Tuesday
+        self.assertCountEqual(
+            explanations[0].causes,
+            [
+                Cause("weekly_hours", teacher="teacher1"),
+                Cause("keep_assigned", class_name=assigned_class_name, role="Teórico"),
+                Cause("availability", teacher="teacher2"),
+            ],
+        )
+
+    def test_not_enough_capable_teachers(self) -> None:
+        assignments = solve_timetable(self.teachers, self.classes, self.modules)
+        explanations = explain_unassigned(self.teachers, self.classes, self.modules, assignments)
+        self.assertIn(
+            Explanation(
+                class_name="class3",
+                role="Teórico",
+                status="blocked",
+                causes=[Cause("not_enough_capable_teachers", class_name="class3", role="Teórico")],
+            ),
+            explanations,
+        )
+
+    def test_pre_assignment_blocks_subclass(self) -> None:
+        teachers_model, classes_model = convert_teachers_and_classes_dict_to_model(
+            {**teachers, "teacher1": {**teachers["teacher1"], "weekly_hours_max_work": 10}},
+            {"class2": classes["class2"], "class4": classes["class2"]},
+        )
+        pre_assignments = {"class4": {"Teórico": ["teacher1"]}}
+        assignments = solve_timetable(
+            teachers_model, classes_model, self.modules, pre_assignments=pre_assignments
+        )
+        self.assertEqual(assignments.unassigned, [("class2", "Teórico")])
+        explanations = explain_unassigned(
+            teachers_model,
+            classes_model,
+            self.modules,
+            assignments,
+            pre_assignments=pre_assignments,
+        )
+        self.assertEqual(explanations[0].status, "blocked")
+        self.assertCountEqual(
+            explanations[0].causes,
+            [
+                Cause("pre_assignment", teacher="teacher1", class_name="class4", role="Teórico"),
+                Cause("availability", teacher="teacher2"),
+            ],
+        )
+
+    def test_subclass_left_out_by_the_objective_is_assignable(self) -> None:
+        teachers_model, classes_model = convert_teachers_and_classes_dict_to_model(
+            teachers, {"class1": classes["class1"]}
+        )
+        assignments = solve_timetable(teachers_model, classes_model, self.modules)
+        # An empty result, as if the search had stopped before finding anything
+        assignments.matches = {"class1": {"Teórico": []}}
+        assignments.unassigned = [("class1", "Teórico")]
+        explanations = explain_unassigned(teachers_model, classes_model, self.modules, assignments)
+        self.assertEqual(
+            explanations,
+            [Explanation(class_name="class1", role="Teórico", status="assignable", causes=[])],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
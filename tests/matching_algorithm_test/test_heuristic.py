@@ -0,0 +1,95 @@
+import random
+import unittest
+
+from src.matching_algorithm import Module, SolverOptions, solve_timetable
+from src.matching_algorithm.quality_assurance import are_conflicts
+from tests.matching_algorithm_test.simulate_real_scenario import (
+    ClassesGenerator,
+    TeachersGenerator,
+    get_modules,
+)
+from tests.matching_algorithm_test.util import (
+    class_dict,
+    convert_teachers_and_classes_dict_to_model,
+    teacher_dict,
+)
+
+monday: dict = {"Monday": [9, 10, 11]}
+
+# teacher1 and teacher2 are a group, teacher3 is the most senior
+teachers: dict = {
+    "teacher1": teacher_dict("Arq1", monday, group_with=["teacher2"]),
+    "teacher2": teacher_dict("Arq1", monday, group_with=["teacher1"]),
+    "teacher3": teacher_dict("Arq1", monday, seniority=8),
+}
+
+
+class TestFastMode(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modules = [Module(id=i, time=f"{i}:00 - {i+1}:00", turn="test") for i in range(24)]
+
+    def test_local_search_selects_group_over_seniority(self) -> None:
+        teachers_model, classes = convert_teachers_and_classes_dict_to_model(
+            teachers, {"class1": class_dict("Arq1", {"Monday": [9, 10]}, num_teachers=2)}
+        )
+        assignments = solve_timetable(teachers_model, classes, self.modules, mode="fast")
+        self.assertEqual(assignments.status, "Heuristic")
+        self.assertCountEqual(assignments.matches["class1"]["Teórico"], ["teacher1", "teacher2"])
+        self.assertEqual(assignments.unassigned, [])
+        self.assertEqual(assignments.conflicts.teacher_without_any_classes, ["teacher3"])
+
+    def test_keeps_pre_assignments(self) -> None:
+        teachers_model, classes = convert_teachers_and_classes_dict_to_model(
+            teachers, {"class1": class_dict("Arq1", {"Monday": [9, 10]})}
+        )
+        assignments = solve_timetable(
+            teachers_model,
+            classes,
+            self.modules,
+            pre_assignments={"class1": {"Teórico": ["teacher1"]}},
+            mode="fast",
+        )
+        self.assertEqual(assignments.matches, {"class1": {"Teórico": ["teacher1"]}})
+
+    def test_pre_assignment_a_teacher_can_not_teach_is_infeasible(self) -> None:
+        teachers_model, classes = convert_teachers_and_classes_dict_to_model(
+            {"teacher1": teacher_dict("Arq1", {"Tuesday": [9, 10]})},
+            {"class1": class_dict("Arq1", {"Monday": [9, 10]})},
+        )
+        assignments = solve_timetable(
+            teachers_model,
+            classes,
+            self.modules,
+            pre_assignments={"class1": {"Teórico": ["teacher1"]}},
+            mode="fast",
+        )
+        self.assertEqual(assignments.status, "Infeasible")
+        self.assertEqual(assignments.matches, {})
+
+    def test_result_has_no_conflicts_and_warm_starts_cp_sat(self) -> None:
+        random.seed(0)
+        teachers_model, classes = convert_teachers_and_classes_dict_to_model(
+            TeachersGenerator().create_teachers(30), ClassesGenerator().create_classes(60)
+        )
+        fast = solve_timetable(teachers_model, classes, get_modules(), mode="fast")
+        self.assertEqual(fast.status, "Heuristic")
+        self.assertFalse(are_conflicts(fast.matches, teachers_model, classes, get_modules()))
+        self.assertLessEqual(
+            sum(len(names) for roles in fast.matches.values() for names in roles.values()),
+            fast.coverage_bound,
+        )
+
+        assignments = solve_timetable(
+            teachers_model,
+            classes,
+            get_modules(),
+            previous_matches=fast.matches,
+            solver_options=SolverOptions(max_time_in_seconds=5),
+        )
+        self.assertIn(assignments.status, ("Optimal", "Feasible"))
+        self.assertFalse(are_conflicts(assignments.matches, teachers_model, classes, get_modules()))
+        self.assertLessEqual(len(assignments.unassigned), len(fast.unassigned))
+
+
+if __name__ == "__main__":
+    unittest.main()
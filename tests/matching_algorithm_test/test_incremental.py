@@ -0,0 +1,133 @@
+import copy
+import unittest
+
+from src.matching_algorithm import AssignmentDelta, Module, solve_incremental, solve_timetable
+from src.matching_algorithm.quality_assurance import are_conflicts
+from tests.matching_algorithm_test.util import convert_teachers_and_classes_dict_to_model
+
+teachers: dict = {
+    "teacher1": {
+        "seniority": 5,
+        "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+        "available_times": {"Monday": [9, 10]},
+        "weekly_hours_max_work": 10,
+    },
+    "teacher2": {
+        "seniority": 1,
+        "subject_he_know_how_to_teach": [{"subject": "Math", "role": ["Teórico"]}],
+        "available_times": {"Monday": [9, 10]},
+        "weekly_hours_max_work": 10,
+    },
+    "teacher3": {
+        "seniority": 1,
+        "subject_he_know_how_to_teach": [{"subject": "Science", "role": ["Teórico"]}],
+        "available_times": {"Tuesday": [9, 10]},
+        "weekly_hours_max_work": 10,
+    },
+    "teacher4": {
+        "seniority": 5,
+        "subject_he_know_how_to_teach": [{"subject": "Science", "role": ["Teórico"]}],
+        "available_times": {"Tuesday": [9, 10]},
+        "weekly_hours_max_work": 10,
+    },
+}
+
+classes: dict = {
+    "class1": {
+        "subject": "Math",
+        "subClasses": [{"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}],
+    },
+    "class2": {
+        "subject": "Science",
+        "subClasses": [{"role": "Teórico", "times": {"Tuesday": [9, 10]}, "num_teachers": 1}],
+    },
+}
+
+
+class TestSolveIncremental(unittest.TestCase):
+    def setUp(self) -> None:
+        self.teachers = copy.deepcopy(teachers)
+        self.classes = copy.deepcopy(classes)
+        self.modules = [Module(id=i, time=f"{i}:00 - {i+1}:00", turn="test") for i in range(24)]
+
+    def test_changed_teacher_is_replaced(self) -> None:
+        teachers_model, classes_model = convert_teachers_and_classes_dict_to_model(
+            self.teachers, self.classes
+        )
+        previous = solve_timetable(teachers_model, classes_model, self.modules)
+        self.assertEqual(previous.matches["class1"], {"Teórico": ["teacher1"]})
+
+        self.teachers["teacher1"]["available_times"] = {"Friday": [9, 10]}
+        teachers_model, classes_model = convert_teachers_and_classes_dict_to_model(
+            self.teachers, self.classes
+        )
+        assignments = solve_incremental(
+            teachers_model,
+            classes_model,
+            self.modules,
+            previous,
+            AssignmentDelta(changed_teachers=["teacher1"]),
+        )
+        self.assertEqual(
+            assignments.matches,
+            {"class1": {"Teórico": ["teacher2"]}, "class2": {"Teórico": ["teacher4"]}},
+        )
+        self.assertFalse(
+            are_conflicts(assignments.matches, teachers_model, classes_model, self.modules)
+        )
+
+    def test_assignments_outside_the_change_are_kept(self) -> None:
+        teachers_model, classes_model = convert_teachers_and_classes_dict_to_model(
+            self.teachers, self.classes
+        )
+        previous = solve_timetable(teachers_model, classes_model, self.modules)
+        # A previous result that isn't optimal for class2 must not be touched
+        previous.matches["class2"] = {"Teórico": ["teacher3"]}
+
+        self.classes["class3"] = {
+            "subject": "Math",
+            "subClasses": [{"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1}],
+        }
+        teachers_model, classes_model = convert_teachers_and_classes_dict_to_model(
+            self.teachers, self.classes
+        )
+        assignments = solve_incremental(
+            teachers_model, classes_model, self.modules, previous, AssignmentDelta()
+        )
+        self.assertEqual(assignments.matches["class2"], {"Teórico": ["teacher3"]})
+        self.assertEqual(
+            sorted(
+                assignments.matches["class1"]["Teórico"] + assignments.matches["class3"]["Teórico"]
+            ),
+            ["teacher1", "teacher2"],
+        )
+
+    def test_unrelated_class_keeps_its_teacher_after_a_class_edit(self) -> None:
+        # The Science teachers know Math too, but class2 doesn't overlap class1
+        for teacher_name in ("teacher3", "teacher4"):
+            self.teachers[teacher_name]["subject_he_know_how_to_teach"].append(
+                {"subject": "Math", "role": ["Teórico"]}
+            )
+        teachers_model, classes_model = convert_teachers_and_classes_dict_to_model(
+            self.teachers, self.classes
+        )
+        previous = solve_timetable(teachers_model, classes_model, self.modules)
+        previous.matches["class2"] = {"Teórico": ["teacher3"]}
+
+        self.classes["class1"]["subClasses"][0]["times"] = {"Monday": [9]}
+        teachers_model, classes_model = convert_teachers_and_classes_dict_to_model(
+            self.teachers, self.classes
+        )
+        assignments = solve_incremental(
+            teachers_model,
+            classes_model,
+            self.modules,
+            previous,
+            AssignmentDelta(changed_classes=["class1"]),
+        )
+        self.assertEqual(assignments.matches["class1"], {"Teórico": ["teacher1"]})
+        self.assertEqual(assignments.matches["class2"], {"Teórico": ["teacher3"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
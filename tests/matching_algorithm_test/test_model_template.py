@@ -0,0 +1,66 @@
+import unittest
+
+from src.matching_algorithm import Module
+from src.matching_algorithm.model_template import build_model_template, get_model_template
+from tests.matching_algorithm_test.util import (
+    class_dict,
+    convert_teachers_and_classes_dict_to_model,
+    teacher_dict,
+)
+
+teachers: dict = {
+    "teacher1": teacher_dict("Arq1", {"Monday": [9, 10]}, group_with=["teacher2"]),
+    "teacher2": teacher_dict("Arq1", {"Monday": [9, 10]}, group_with=["teacher1"]),
+}
+
+
+class TestModelTemplate(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modules = [Module(id=i, time=f"{i}:00 - {i+1}:00", turn="test") for i in range(24)]
+
+    def test_symmetric_groups_share_one_group_match(self) -> None:
+        group_teachers, classes = convert_teachers_and_classes_dict_to_model(
+            teachers, {"class1": class_dict("Arq1", {"Monday": [9, 10]}, 2)}
+        )
+        template = build_model_template(group_teachers, classes, self.modules)
+        # Both teachers declare the same group, so it gets a single variable counted twice
+        model = template.model.Clone()
+        model.Maximize(template.objectives["group_preference"])
+        objective = model.Proto().objective
+        self.assertEqual(
+            [model.Proto().variables[i].name for i in objective.vars],
+            ["group_match_teacher1_class1"],
+        )
+        self.assertEqual([abs(coeff) for coeff in objective.coeffs], [2])
+        # 2 assignments, is_assigned, partially_assigned, 2 has_any_class and the group match
+        self.assertEqual(len(template.model.Proto().variables), 7)
+
+    def test_group_that_cannot_fit_in_the_class_is_pruned(self) -> None:
+        group_teachers, classes = convert_teachers_and_classes_dict_to_model(
+            teachers, {"class1": class_dict("Arq1", {"Monday": [9, 10]}, 1)}
+        )
+        template = build_model_template(group_teachers, classes, self.modules)
+        self.assertFalse(
+            any(
+                variable.name.startswith("group_match")
+                for variable in template.model.Proto().variables
+            )
+        )
+
+    def test_template_is_reused(self) -> None:
+        group_teachers, classes = convert_teachers_and_classes_dict_to_model(
+            teachers, {"class1": class_dict("Arq1", {"Monday": [9, 10]}, 2)}
+        )
+        template = get_model_template(group_teachers, classes, self.modules)
+        same_teachers, same_classes = convert_teachers_and_classes_dict_to_model(
+            teachers, {"class1": class_dict("Arq1", {"Monday": [9, 10]}, 2)}
+        )
+        self.assertIs(get_model_template(same_teachers, same_classes, self.modules), template)
+        _, other_classes = convert_teachers_and_classes_dict_to_model(
+            teachers, {"class1": class_dict("Arq1", {"Monday": [9, 10]}, 1)}
+        )
+        self.assertIsNot(get_model_template(group_teachers, other_classes, self.modules), template)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from src.matching_algorithm.overlap import build_overlap_cliques
+from tests.matching_algorithm_test.util import convert_classes_model_to_dict
+
+
+class TestOverlapCliques(unittest.TestCase):
+    def test_long_subclass_gives_one_clique(self) -> None:
+        classes = convert_classes_model_to_dict(
+            {
+                "class1": {
+                    "subject": "Math",
+                    "subClasses": [
+                        {"role": "Teórico", "times": {"Monday": [9, 10, 11]}, "num_teachers": 1}
+                    ],
+                },
+                "class2": {
+                    "subject": "Math",
+                    "subClasses": [
+                        {"role": "Teórico", "times": {"Monday": [9, 10, 11]}, "num_teachers": 1}
+                    ],
+                },
+            }
+        )
+        self.assertEqual(
+            build_overlap_cliques(classes), [[("class1", "Teórico"), ("class2", "Teórico")]]
+        )
+
+    def test_cliques_are_maximal(self) -> None:
+        classes = convert_classes_model_to_dict(
+            {
+                "class1": {
+                    "subject": "Math",
+                    "subClasses": [
+                        {"role": "Teórico", "times": {"Monday": [9, 10]}, "num_teachers": 1},
+                        {"role": "Tecnología", "times": {"Tuesday": [9]}, "num_teachers": 1},
+                    ],
+                },
+                "class2": {
+                    "subject": "Math",
+                    "subClasses": [
+                        {"role": "Teórico", "times": {"Monday": [10, 11]}, "num_teachers": 1}
+                    ],
+                },
+                "class3": {
+                    "subject": "Math",
+                    "subClasses": [
+                        {"role": "Teórico", "times": {"Monday": [10]}, "num_teachers": 1}
+                    ],
+                },
+            }
+        )
+        self.assertEqual(
+            build_overlap_cliques(classes),
+            [[("class1", "Teórico"), ("class2", "Teórico"), ("class3", "Teórico")]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
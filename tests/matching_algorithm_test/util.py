@@ -15,3 +15,38 @@ def convert_teachers_model_to_dict(teachers: dict[str, dict]) -> dict[str, Teach
 
 def convert_classes_model_to_dict(classes: dict[str, dict]) -> dict[str, ClassModel]:
     return {k: ClassModel(**v) for k, v in classes.items()}
+
+
+def teacher_dict(
+    subject: str,
+    available_times: dict[str, list[int]],
+    seniority: int = 1,
+    weekly_hours_max_work: int = 10,
+    group_with: list[str] | None = None,
+) -> dict:
+    """A teacher of the Teórico role of `subject`, in a group with `group_with` if given."""
+    teacher: dict = {
+        "seniority": seniority,
+        "subject_he_know_how_to_teach": [{"subject": subject, "role": ["Teórico"]}],
+        "available_times": available_times,
+        "weekly_hours_max_work": weekly_hours_max_work,
+    }
+    if group_with is not None:
+        teacher["groups"] = [
+            {
+                "my_role": ["Teórico"],
+                "subject": subject,
+                "other_teacher": [
+                    {"teacher": other_teacher, "role": ["Teórico"]} for other_teacher in group_with
+                ],
+            }
+        ]
+    return teacher
+
+
+def class_dict(subject: str, times: dict[str, list[int]], num_teachers: int = 1) -> dict:
+    """A class of `subject` with a single Teórico subclass."""
+    return {
+        "subject": subject,
+        "subClasses": [{"role": "Teórico", "times": times, "num_teachers": num_teachers}],
+    }